@@ -1,16 +1,42 @@
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException
-from fastapi.responses import JSONResponse, HTMLResponse, FileResponse
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request
+from fastapi.responses import JSONResponse, HTMLResponse, FileResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
-from storage import init_db, get_session, Upload, Score
-from features import load_kpi_csv, to_matrix
-from model import load_model, train, score
-from charts import save_kpi_chart
-from summarize import extract_incidents, generate_ai_kpi_summary
-from random_forest_model import analyze_with_random_forest
-from pdf_report import generate_kpi_pdf_report, cleanup_pdf_file
+from fastapi.concurrency import run_in_threadpool
+from storage import init_db, count_uploads, create_upload, database_stats, get_upload_summary, list_upload_stats, load_upload_frame, UPLOADS_PAGE_SIZE
+from model import MODEL_PATH
+from job_queue import job_queue
+from pipeline import process_kpi_upload, KPI_STAGES
+from log_scanner import scan_log_stream, DECODE_ERRORS
+from log_store import (
+    LogEventWriter,
+    create_log_upload,
+    delete_log_upload,
+    finish_log_upload,
+    get_log_upload,
+    list_log_uploads,
+    log_event_histogram,
+    query_log_events,
+    LOG_EVENTS_PAGE_SIZE,
+    LOG_UPLOADS_PAGE_SIZE,
+)
+from summarize import aextract_incidents, agenerate_ai_kpi_summary, ai_call_log, AI_MAX_CONCURRENCY, AI_DEADLINE_SECONDS
+from summary_cache import invalidate_summaries
+from kpi_stats import get_upload_stats
+from random_forest_model import analyze_with_random_forest, slice_columns, status_rows, throughput_rows, PREDICTION_OUTPUTS, RF_MODEL_DIR, RF_MODELS
+from model_registry import model_registry
+from singleflight import request_flight, async_request_flight
+from artifact_store import artifact_store, sniff_content_type
+from chart_renderer import chart_renderer, chart_key, CHART_RETRY_AFTER_SECONDS
+from pdf_pipeline import pdf_renderer, pdf_key, cached_pdf, PDF_RETRY_AFTER_SECONDS, PDF_WAIT_SECONDS
+from correlation import correlate_upload, CORRELATION_WINDOW_SECONDS, CORRELATION_MATCH_LIMIT
+import asyncio
+import re
 import tempfile
 import os
 import json
+import codecs
+from urllib.parse import urlencode
+import zstandard
 from datetime import datetime
 
 app = FastAPI(
@@ -38,7 +64,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Using the generate_ai_kpi_summary function from summarize.py
+# Bytes read per await when spooling uploads to disk
+UPLOAD_READ_BYTES = 1024 * 1024
+
+# Cache-Control for artifacts served by key (revalidated via ETag) and by digest (never change)
+ARTIFACT_CACHE_CONTROL = "public, max-age=300, must-revalidate"
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# One entity tag of an If-None-Match list, optionally weak
+ENTITY_TAG_RE = re.compile(r'(?:W/)?"[^"]*"')
+
+# Log uploads accepted by /logs/summarize, optionally gzip or zstd compressed
+LOG_EXTENSIONS = tuple(
+    ext + suffix for ext in (".log", ".txt") for suffix in ("", ".gz", ".zst", ".zstd")
+)
+
+# Using the agenerate_ai_kpi_summary function from summarize.py
 
 @app.get("/", response_class=HTMLResponse)
 def home():
@@ -268,7 +308,7 @@ def home():
                     
                     <form id="logForm">
                         <div class="border-2 border-dashed border-green-500/30 dark:border-green-500/30 rounded-2xl p-8 text-center bg-green-500/5 dark:bg-green-500/5 transition-all duration-300 hover:border-green-500/50 dark:hover:border-green-500/50 hover:bg-green-500/10 dark:hover:bg-green-500/10 mb-6">
-                            <input type="file" name="file" accept=".log,.txt" required class="w-full text-slate-700 dark:text-slate-300 file:mr-4 file:py-2 file:px-4 file:rounded-lg file:border-0 file:text-sm file:font-semibold file:bg-green-500 file:text-white hover:file:bg-green-600 transition-colors">
+                            <input type="file" name="file" accept=".log,.txt,.gz,.zst" required class="w-full text-slate-700 dark:text-slate-300 file:mr-4 file:py-2 file:px-4 file:rounded-lg file:border-0 file:text-sm file:font-semibold file:bg-green-500 file:text-white hover:file:bg-green-600 transition-colors">
                             <p class="mt-4 text-sm text-black dark:text-slate-400">
                                 <i class="fas fa-info-circle mr-2"></i>
                                 Supports ERROR, WARN, CRIT, ALARM, INFO log levels
@@ -452,6 +492,21 @@ def home():
                 resultDiv.innerHTML = `<div class="bg-red-100 border-l-4 border-red-500 rounded-xl p-6 mt-6 animate-slide-up"><i class="fas fa-exclamation-triangle text-red-600 text-2xl mb-3"></i><div class="text-red-800 font-medium">Error: ${error}</div></div>`;
             }
             
+            async function waitForJob(jobId) {
+                // Poll the background job until its result is ready
+                while (true) {
+                    const response = await fetch(`/jobs/${jobId}/result`);
+                    const data = await response.json();
+                    if (response.status === 200) {
+                        return data;
+                    }
+                    if (response.status !== 202) {
+                        throw new Error(data.detail || 'Processing failed');
+                    }
+                    await new Promise(resolve => setTimeout(resolve, 1000));
+                }
+            }
+            
             document.getElementById('kpiForm').onsubmit = async (e) => {
                 e.preventDefault();
                 showLoading('kpiForm', 'kpiBtn');
@@ -462,12 +517,13 @@ def home():
                         method: 'POST',
                         body: formData
                     });
-                    const data = await response.json();
+                    const job = await response.json();
                     
                     if (response.ok) {
+                        const data = await waitForJob(job.job_id);
                         showSuccess('kpiForm', 'kpiBtn', data, true);
                     } else {
-                        showError('kpiForm', 'kpiBtn', data.detail || 'Upload failed');
+                        showError('kpiForm', 'kpiBtn', job.detail || job.error || 'Upload failed');
                     }
                 } catch (error) {
                     showError('kpiForm', 'kpiBtn', error.message);
@@ -1693,6 +1749,15 @@ def health_api():
     """API endpoint for programmatic health checks"""
     return {"status": "ok", "service": "netops-ai-pipeline", "version": "2.0.0"}
 
+@app.get("/models")
+def models_api():
+    """Version and metadata of the model artifacts cached in this process"""
+    rf_paths = model_registry.set_paths(RF_MODEL_DIR) or {}
+    return {
+        "isolation_forest": model_registry.info(MODEL_PATH),
+        **{name: model_registry.info(rf_paths[name]) if name in rf_paths else None for name in RF_MODELS},
+    }
+
 @app.get("/system-status", response_class=HTMLResponse)
 def system_status_page():
     """User-friendly system status and overview page"""
@@ -2153,721 +2218,745 @@ def docs_api():
 
 
 
-@app.post("/upload")
+@app.post("/upload", status_code=202)
 async def upload(file: UploadFile = File(...), train_if_missing: bool = Form(True)):
-    """Upload KPI CSV file for AI-powered anomaly detection and analysis"""
+    """Upload KPI CSV file for AI-powered anomaly detection and analysis.
+
+    Processing runs in a background job; poll /jobs/{job_id} for progress and
+    fetch /jobs/{job_id}/result once it completes.
+    """
     if not file.filename.endswith(".csv"):
         raise HTTPException(status_code=400, detail="Only CSV files are supported")
+    if not train_if_missing and not os.path.exists(MODEL_PATH):
+        return JSONResponse(
+            {"error": "model missing; set train_if_missing=true"}, status_code=400
+        )
 
+    # Spool the upload to disk without holding the whole file in memory
     tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".csv")
-    tmp.write(await file.read())
+    while chunk := await file.read(UPLOAD_READ_BYTES):
+        tmp.write(chunk)
     tmp.close()
 
-    up_id = None
-    with get_session() as s:
-        u = Upload(filename=file.filename)
-        s.add(u)
-        s.commit()
-        s.refresh(u)
-        up_id = u.id
+    up_id = await run_in_threadpool(create_upload, file.filename)
 
-    try:
-        df = load_kpi_csv(tmp.name)
-        X = to_matrix(df)
-        m = load_model()
-        if m is None and train_if_missing:
-            m = train(X)
-        elif m is None:
-            return JSONResponse(
-                {"error": "model missing; set train_if_missing=true"}, status_code=400
-            )
+    job = job_queue.submit(
+        "kpi_upload",
+        process_kpi_upload,
+        tmp.name,
+        up_id,
+        file.filename,
+        train_if_missing,
+        stages=KPI_STAGES,
+    )
+    return {
+        "job_id": job.id,
+        "upload_id": up_id,
+        "filename": file.filename,
+        "status": job.status,
+        "status_url": f"/jobs/{job.id}",
+        "result_url": f"/jobs/{job.id}/result",
+    }
 
-        pred, sc = score(m, X)
-        df_out = df.copy()
-        df_out["anomaly"] = pred
-        df_out["score"] = sc
-
-        chart_path = f"temp_chart_{up_id}.png"
-        save_kpi_chart(df_out, chart_path)
-
-        with get_session() as s:
-            for row in df_out[["cell_id", "timestamp", "anomaly", "score", "PRB_Util", "RRC_Conn", "Throughput_Mbps", "BLER"]].itertuples(
-                index=False, name=None
-            ):
-                s.add(
-                    Score(
-                        upload_id=up_id,
-                        cell_id=str(row[0]),
-                        ts=str(row[1]),
-                        anomaly=int(row[2]),
-                        score=float(row[3]),
-                        prb_util=float(row[4]),
-                        rrc_conn=float(row[5]),
-                        throughput_mbps=float(row[6]),
-                        bler=float(row[7]),
-                    )
-                )
-            s.commit()
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str):
+    """Get status, stage progress and timings for a background job"""
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
 
-        return {
-            "upload_id": up_id,
-            "filename": file.filename,
-            "total_samples": len(df_out),
-            "summary": df_out["anomaly"].value_counts().to_dict(),
-            "chart": chart_path,
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Processing error: {str(e)}")
-    finally:
-        os.unlink(tmp.name)
+@app.get("/jobs/{job_id}/result")
+def job_result(job_id: str):
+    """Get the result of a finished background job (202 while still running)"""
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status == "failed":
+        raise HTTPException(status_code=500, detail=f"Processing error: {job.error}")
+    if job.status != "completed":
+        return JSONResponse(job.to_dict(), status_code=202, headers={"Retry-After": "1"})
+    return job.result
+
+@app.get("/stats/{upload_id}")
+def upload_stats(upload_id: int, cells: int = 20):
+    """Descriptive statistics of an upload: totals, per-KPI quantiles and the `cells` most anomalous cells"""
+    stats = get_upload_stats(upload_id)
+    if stats is None:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return {"upload_id": upload_id, **stats, "per_cell": stats["per_cell"][: max(0, cells)]}
 
 @app.get("/report/{upload_id}")
 def report(upload_id: int):
-    """Get detailed anomaly detection report for an upload"""
-    with get_session() as s:
-        rows = s.query(Score).filter(Score.upload_id == upload_id).all()
-    if not rows:
+    """Get detailed anomaly detection report for an upload (read from its UploadSummary row)"""
+    summary = get_upload_summary(upload_id)
+    if summary is None or summary["total"] == 0:
         raise HTTPException(status_code=404, detail="Upload not found")
 
-    anomalies = sum(1 for r in rows if r.anomaly == -1)
     return {
         "upload_id": upload_id,
-        "total": len(rows),
-        "anomalies": anomalies,
-        "anomaly_rate": round(anomalies / len(rows) * 100, 2) if rows else 0,
+        "total": summary["total"],
+        "anomalies": summary["anomalies"],
+        "anomaly_rate": summary["anomaly_rate"],
+        "cells": summary["cells"],
+        "first_ts": summary["first_ts"],
+        "last_ts": summary["last_ts"],
+        "kpis": summary["kpis"],
         "timestamp": datetime.now().isoformat(),
     }
 
-@app.get("/pdf/{upload_id}")
-def get_pdf_report(upload_id: int):
-    """Download KPI analysis as PDF report"""
-    pdf_path = None
-    try:
-        with get_session() as s:
-            rows = s.query(Score).filter(Score.upload_id == upload_id).all()
-        if not rows:
-            raise HTTPException(status_code=404, detail="Upload not found")
+async def load_kpi_summary(upload_id: int):
+    """Upload frame, anomalies, AI summary and statistics for an upload.
 
-        # Convert database rows back to DataFrame
-        import pandas as pd
-        
-        data_list = []
-        for row in rows:
-            data_list.append({
-                'cell_id': row.cell_id,
-                'timestamp': row.ts,
-                'anomaly': row.anomaly,
-                'score': row.score,
-                'PRB_Util': row.prb_util or 0.0,
-                'RRC_Conn': row.rrc_conn or 0.0,
-                'Throughput_Mbps': row.throughput_mbps or 0.0,
-                'BLER': row.bler or 0.0
-            })
-        
-        df = pd.DataFrame(data_list)
-        
-        # Get anomalies
-        anomalies = df[df['anomaly'] == -1]
+    Concurrent requests for the same upload share one computation; the
+    returned objects are shared too and must not be modified.
+    """
+    def load():
+        df = load_upload_frame(upload_id)
+        if df.empty:
+            return df, df, None
+        # Anomalies and the statistics persisted at ingest
+        return df, df[df['anomaly'] == -1], get_upload_stats(upload_id)
+
+    async def compute():
+        # pandas work runs in the threadpool; only the LLM call is awaited on the loop
+        df, anomalies, stats = await run_in_threadpool(load)
+        if df.empty:
+            return df, df, None, None
         
         # Generate AI summary if available (skip if it fails)
-        ai_summary = None
+        ai_result = None
         try:
-            ai_summary = generate_ai_kpi_summary(df, anomalies, df['score'])
+            ai_result = await agenerate_ai_kpi_summary(df, anomalies, df['score'], upload_id=upload_id, stats=stats)
         except Exception as ai_error:
             # AI summary generation failed - handled gracefully
-            # Continue without AI summary
             pass
-        
-        # Generate PDF report
-        pdf_path = generate_kpi_pdf_report(upload_id, df, anomalies, ai_summary)
-        
-        # Return PDF file
-        return FileResponse(
-            pdf_path,
-            media_type='application/pdf',
-            filename=f'NetOps_KPI_Report_{upload_id}.pdf',
-            headers={'Content-Disposition': f'attachment; filename=NetOps_KPI_Report_{upload_id}.pdf'}
-        )
-        
-    except Exception as e:
-        # PDF generation error - handled gracefully
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=f"PDF generation error: {str(e)}")
-    # Note: File cleanup is handled by the operating system for temporary files
-    # The temporary file will be automatically cleaned up when the system restarts
+        return df, anomalies, ai_result, stats
+    
+    return await async_request_flight.do(("kpi_summary", upload_id), compute)
 
-@app.get("/ai-summary/{upload_id}", response_class=HTMLResponse)
-def ai_summary(upload_id: int):
-    """Get AI-generated insights and recommendations for an upload"""
-    try:
-        with get_session() as s:
-            rows = s.query(Score).filter(Score.upload_id == upload_id).all()
-        if not rows:
-            raise HTTPException(status_code=404, detail="Upload not found")
+@app.get("/pdf/{upload_id}")
+async def get_pdf_report(
+    upload_id: int,
+    request: Request,
+    log_upload_id: int | None = None,
+    window_seconds: int = CORRELATION_WINDOW_SECONDS,
+    wait: float = PDF_WAIT_SECONDS,
+):
+    """Download KPI analysis as PDF report.
+
+    With log_upload_id the report gets a log incident correlation section.
+    Reports are generated by background workers and cached per upload and
+    summary version, so repeat downloads are served from the artifact store
+    (ETag / 304 aware). A report still being generated after `wait` seconds
+    answers 202 with Retry-After.
+    """
+    if log_upload_id is None:
+        window_seconds = None
+    elif await run_in_threadpool(get_log_upload, log_upload_id) is None:
+        raise HTTPException(status_code=404, detail="Log upload not found")
+
+    key = pdf_key(upload_id, log_upload_id, window_seconds)
+    info = await run_in_threadpool(cached_pdf, upload_id, log_upload_id, window_seconds)
+    future = None
+    if info is None:
+        status = pdf_renderer.status(key)
+        if status is not None and status["status"] not in ("done", "missing"):
+            future = pdf_renderer.future(key)
+            if future is None:
+                # A concurrent download finished and forgot this render after
+                # the status check; its report is normally cached by now
+                info = await run_in_threadpool(cached_pdf, upload_id, log_upload_id, window_seconds)
+    if info is None:
+        if future is None:
+            summary = await run_in_threadpool(get_upload_summary, upload_id)
+            if summary is None or summary["total"] == 0:
+                raise HTTPException(status_code=404, detail="Upload not found")
+            # The AI summary comes from this loop, under its LLM concurrency
+            # limit; the worker process only lays out the report
+            _, _, ai_summary, _ = await load_kpi_summary(upload_id)
+            future = pdf_renderer.submit(key, upload_id, log_upload_id, window_seconds, ai_summary)
 
-        # Convert database rows back to DataFrame for AI analysis
-        import pandas as pd
-        
-        # Create DataFrame from stored scores and KPI data
-        data_list = []
-        for row in rows:
-            data_list.append({
-                'cell_id': row.cell_id,
-                'timestamp': row.ts,
-                'anomaly': row.anomaly,
-                'score': row.score,
-                'PRB_Util': row.prb_util or 0.0,
-                'RRC_Conn': row.rrc_conn or 0.0,
-                'Throughput_Mbps': row.throughput_mbps or 0.0,
-                'BLER': row.bler or 0.0
-            })
-        
-        df = pd.DataFrame(data_list)
-        
-        # Get anomalies
-        anomalies = df[df['anomaly'] == -1]
-        
-        # Generate AI summary using the function
         try:
-            ai_result = generate_ai_kpi_summary(df, anomalies, df['score'])
-        except Exception as ai_error:
-            # AI summary generation error - handled gracefully
-            # Fallback to basic summary
-            ai_result = {
-                "summary": f"Network performance analysis completed. {len(anomalies)} anomalies detected out of {len(df)} total samples.",
-                "insights": [
-                    f"Anomaly detection rate: {(len(anomalies) / len(df) * 100):.1f}%",
-                    f"Total data points analyzed: {len(df)}",
-                    f"Critical cells requiring attention: {len(anomalies)}"
-                ],
-                "recommendations": [
-                    "Investigate cells with highest anomaly scores",
-                    "Monitor network performance trends",
-                    "Consider capacity optimization if anomaly rate > 5%"
-                ],
-                "severity": "MEDIUM"
-            }
-        
-        # Create user-friendly HTML response
-        insights_html = ""
-        for insight in ai_result.get("insights", []):
-            insights_html += f'<li>{insight}</li>'
-        
-        recommendations_html = ""
-        for rec in ai_result.get("recommendations", []):
-            recommendations_html += f'<li>{rec}</li>'
-        
-        severity = ai_result.get("severity", "MEDIUM")
-        severity_color = {
-            "LOW": "#10b981",
-            "MEDIUM": "#f59e0b", 
-            "HIGH": "#ef4444"
-        }.get(severity, "#f59e0b")
-        
-        anomaly_rate = (len(anomalies) / len(df) * 100) if len(df) > 0 else 0
-        
-        # Extract JavaScript config to avoid nested f-string issues
-        tailwind_config = """
-                tailwind.config = {
-                    darkMode: 'class',
-                    theme: {
-                        extend: {
-                            colors: {
-                                brand: {
-                                    50: '#eff6ff',
-                                    100: '#dbeafe',
-                                    200: '#bfdbfe',
-                                    300: '#93c5fd',
-                                    400: '#60a5fa',
-                                    500: '#3b82f6',
-                                    600: '#2563eb',
-                                    700: '#1d4ed8',
-                                    800: '#1e40af',
-                                    900: '#1e3a8a',
-                                }
+            # shield: a client giving up must not cancel the shared render
+            info = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout=max(wait, 0))
+        except asyncio.TimeoutError:
+            return JSONResponse(
+                {
+                    "upload_id": upload_id,
+                    # The render may have finished and been forgotten since
+                    **(pdf_renderer.status(key) or {"status": "running"}),
+                    "pdf": str(request.url.remove_query_params("wait")),
+                },
+                status_code=202,
+                headers={"Retry-After": str(PDF_RETRY_AFTER_SECONDS)},
+            )
+        except Exception as e:
+            pdf_renderer.forget(key)
+            raise HTTPException(status_code=500, detail=f"PDF generation error: {str(e)}")
+        if info is None:
+            raise HTTPException(status_code=404, detail="Upload not found")
+
+    pdf_renderer.forget(key)
+    return artifact_response(
+        request,
+        info["digest"],
+        info["content_type"],
+        cache_control="private, no-cache",
+        filename=f'NetOps_KPI_Report_{upload_id}.pdf',
+    )
+
+def render_ai_summary_page(ai_result, stats) -> str:
+    """HTML page of an upload's AI summary (plain string work, run off the event loop)"""
+    if ai_result is None:
+        # AI summary generation error - handled gracefully
+        # Fallback to basic summary
+        ai_result = {
+            "summary": f"Network performance analysis completed. {stats['anomalies']} anomalies detected out of {stats['total']} total samples.",
+            "insights": [
+                f"Anomaly detection rate: {stats['anomaly_rate']:.1f}%",
+                f"Total data points analyzed: {stats['total']}",
+                f"Critical cells requiring attention: {stats['anomalies']}"
+            ],
+            "recommendations": [
+                "Investigate cells with highest anomaly scores",
+                "Monitor network performance trends",
+                "Consider capacity optimization if anomaly rate > 5%"
+            ],
+            "severity": "MEDIUM"
+        }
+    
+    # Create user-friendly HTML response
+    insights_html = ""
+    for insight in ai_result.get("insights", []):
+        insights_html += f'<li>{insight}</li>'
+    
+    recommendations_html = ""
+    for rec in ai_result.get("recommendations", []):
+        recommendations_html += f'<li>{rec}</li>'
+    
+    severity = ai_result.get("severity", "MEDIUM")
+    severity_color = {
+        "LOW": "#10b981",
+        "MEDIUM": "#f59e0b", 
+        "HIGH": "#ef4444"
+    }.get(severity, "#f59e0b")
+    
+    anomaly_rate = stats["anomaly_rate"]
+    
+    # Extract JavaScript config to avoid nested f-string issues
+    tailwind_config = """
+            tailwind.config = {
+                darkMode: 'class',
+                theme: {
+                    extend: {
+                        colors: {
+                            brand: {
+                                50: '#eff6ff',
+                                100: '#dbeafe',
+                                200: '#bfdbfe',
+                                300: '#93c5fd',
+                                400: '#60a5fa',
+                                500: '#3b82f6',
+                                600: '#2563eb',
+                                700: '#1d4ed8',
+                                800: '#1e40af',
+                                900: '#1e3a8a',
                             }
                         }
                     }
                 }
-        """
-        
-        # Extract JavaScript theme toggle to avoid syntax issues
-        theme_toggle_js = """
-            // Theme toggle functionality
-            function toggleTheme() {
-                const html = document.documentElement;
-                const themeIcon = document.getElementById('theme-icon');
-                
-                if (html.classList.contains('dark')) {
-                    html.classList.remove('dark');
-                    html.classList.add('light');
-                    themeIcon.className = 'fas fa-moon';
-                    localStorage.setItem('theme', 'light');
-                } else {
-                    html.classList.remove('light');
-                    html.classList.add('dark');
-                    themeIcon.className = 'fas fa-sun';
-                    localStorage.setItem('theme', 'dark');
-                }
             }
-            
-            // Check for saved theme preference
-            const savedTheme = localStorage.getItem('theme') || 'light';
+    """
+    
+    # Extract JavaScript theme toggle to avoid syntax issues
+    theme_toggle_js = """
+        // Theme toggle functionality
+        function toggleTheme() {
             const html = document.documentElement;
             const themeIcon = document.getElementById('theme-icon');
             
-            if (savedTheme === 'dark') {
-                html.classList.remove('light');
-                html.classList.add('dark');
-                themeIcon.className = 'fas fa-sun';
-            } else {
+            if (html.classList.contains('dark')) {
                 html.classList.remove('dark');
                 html.classList.add('light');
                 themeIcon.className = 'fas fa-moon';
+                localStorage.setItem('theme', 'light');
+            } else {
+                html.classList.remove('light');
+                html.classList.add('dark');
+                themeIcon.className = 'fas fa-sun';
+                localStorage.setItem('theme', 'dark');
             }
-        """
+        }
         
-        return f"""
-        <!DOCTYPE html>
-        <html class="light">
-        <head>
-            <title>Network Performance Analysis Report - NetOps AI Pipeline</title>
-            <meta charset="UTF-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <link href="https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700;800&display=swap" rel="stylesheet">
-            <link href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css" rel="stylesheet">
-            <script src="https://cdn.tailwindcss.com"></script>
-            <script>
-                {tailwind_config}
-            </script>
-            <style>
-                * {{ margin: 0; padding: 0; box-sizing: border-box; }}
-                
-                body {{ 
-                    font-family: 'Inter', -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-                    background: linear-gradient(135deg, #f8fafc 0%, #e2e8f0 50%, #cbd5e1 100%);
-                    color: #1e293b;
-                    line-height: 1.7;
-                    min-height: 100vh;
-                    font-weight: 400;
-                    transition: all 0.3s ease;
-                }}
-                
-                .dark body {{
-                    background: linear-gradient(135deg, #0f172a 0%, #1e293b 50%, #334155 100%);
-                    color: #f1f5f9;
-                }}
-                
-                .container {{ 
-                    max-width: 1200px; 
-                    margin: 0 auto; 
-                    padding: 30px 20px;
-                }}
-                
-                .back-btn {{
-                    position: fixed;
-                    top: 30px;
-                    left: 30px;
-                    background: rgba(255,255,255,0.1);
-                    color: #ffffff;
-                    padding: 12px 24px;
-                    border-radius: 12px;
-                    text-decoration: none;
-                    transition: all 0.3s ease;
-                    backdrop-filter: blur(20px);
-                    display: inline-flex;
-                    align-items: center;
-                    gap: 10px;
-                    font-weight: 500;
-                    border: 1px solid rgba(255,255,255,0.2);
-                    z-index: 1000;
-                }}
-                
-                .back-btn:hover {{
-                    background: rgba(255,255,255,0.2);
-                    transform: translateY(-2px);
-                    box-shadow: 0 10px 25px rgba(0,0,0,0.2);
-                }}
-                
-                .theme-toggle {{
-                    position: fixed;
-                    top: 30px;
-                    right: 30px;
-                    background: rgba(255,255,255,0.1);
-                    color: #ffffff;
-                    padding: 12px;
-                    border-radius: 12px;
-                    text-decoration: none;
-                    transition: all 0.3s ease;
-                    backdrop-filter: blur(20px);
-                    border: none;
-                    cursor: pointer;
-                    font-size: 1.2em;
-                    z-index: 1000;
-                    border: 1px solid rgba(255,255,255,0.2);
-                }}
-                
-                .theme-toggle:hover {{
-                    background: rgba(255,255,255,0.2);
-                    transform: translateY(-2px);
-                    box-shadow: 0 10px 25px rgba(0,0,0,0.2);
-                }}
-                
-                .dark .theme-toggle {{
-                    background: rgba(0,0,0,0.2);
-                    color: #e2e8f0;
-                    border: 1px solid rgba(255,255,255,0.1);
-                }}
-                
-                .dark .theme-toggle:hover {{
-                    background: rgba(0,0,0,0.3);
-                }}
-                
-                .header {{
-                    background: linear-gradient(135deg, #1e3a8a 0%, #3b82f6 50%, #60a5fa 100%);
-                    padding: 50px 40px;
-                    border-radius: 24px;
-                    text-align: center;
-                    margin-bottom: 40px;
-                    box-shadow: 0 25px 50px rgba(0,0,0,0.3);
-                    position: relative;
-                    overflow: hidden;
-                }}
-                
-                .header::before {{
-                    content: '';
-                    position: absolute;
-                    top: 0;
-                    left: 0;
-                    right: 0;
-                    bottom: 0;
-                    background: url('data:image/svg+xml,<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 100"><defs><pattern id="grid" width="10" height="10" patternUnits="userSpaceOnUse"><path d="M 10 0 L 0 0 0 10" fill="none" stroke="rgba(255,255,255,0.1)" stroke-width="0.5"/></pattern></defs><rect width="100" height="100" fill="url(%23grid)"/></svg>');
-                    opacity: 0.3;
-                }}
-                
-                .header h1 {{
-                    font-size: 2.8em;
-                    font-weight: 800;
-                    margin-bottom: 15px;
-                    color: #ffffff;
-                    position: relative;
-                    z-index: 1;
-                }}
-                
-                .header p {{
-                    font-size: 1.3em;
-                    opacity: 0.95;
-                    font-weight: 400;
-                    margin-bottom: 25px;
-                    position: relative;
-                    z-index: 1;
-                }}
-                
-                .severity-badge {{
-                    display: inline-block;
-                    background: rgba(255,255,255,0.1);
-                    color: {severity_color};
-                    padding: 12px 24px;
-                    border-radius: 25px;
-                    font-weight: 700;
-                    font-size: 0.95em;
-                    text-transform: uppercase;
-                    letter-spacing: 1px;
-                    border: 2px solid {severity_color};
-                    position: relative;
-                    z-index: 1;
-                    backdrop-filter: blur(10px);
-                }}
-                
-                .section {{
-                    background: rgba(255,255,255,0.08);
-                    backdrop-filter: blur(20px);
-                    border: 1px solid rgba(255,255,255,0.15);
-                    border-radius: 20px;
-                    padding: 35px;
-                    margin-bottom: 30px;
-                    box-shadow: 0 15px 35px rgba(0,0,0,0.1);
-                }}
-                
-                .section h3 {{
-                    color: #ffffff;
-                    font-size: 1.5em;
-                    margin-bottom: 25px;
-                    display: flex;
-                    align-items: center;
-                    gap: 15px;
-                    font-weight: 700;
-                }}
-                
-                .section h3 i {{
-                    font-size: 1.2em;
-                    color: #60a5fa;
-                }}
-                
-                .metrics-grid {{
-                    display: grid;
-                    grid-template-columns: repeat(auto-fit, minmax(180px, 1fr));
-                    gap: 25px;
-                    margin: 25px 0;
-                }}
-                
-                .metric-card {{
-                    background: rgba(255,255,255,0.1);
-                    border-radius: 16px;
-                    padding: 25px;
-                    text-align: center;
-                    border: 1px solid rgba(255,255,255,0.1);
-                    transition: all 0.3s ease;
-                }}
-                
-                .metric-card:hover {{
-                    background: rgba(255,255,255,0.15);
-                    transform: translateY(-3px);
-                    box-shadow: 0 10px 25px rgba(0,0,0,0.2);
-                }}
-                
-                .metric-value {{
-                    font-size: 2.2em;
-                    font-weight: 800;
-                    color: #60a5fa;
-                    margin-bottom: 8px;
-                }}
-                
-                .metric-label {{
-                    color: #cbd5e1;
-                    font-size: 0.9em;
-                    text-transform: uppercase;
-                    letter-spacing: 0.8px;
-                    font-weight: 600;
-                }}
-                
-                .insights-list, .recommendations-list {{
-                    list-style: none;
-                    padding: 0;
-                }}
-                
-                .insights-list li, .recommendations-list li {{
-                    background: rgba(255,255,255,0.08);
-                    border-radius: 12px;
-                    padding: 20px;
-                    margin-bottom: 15px;
-                    border-left: 4px solid #60a5fa;
-                    transition: all 0.3s ease;
-                }}
-                
-                .insights-list li:hover, .recommendations-list li:hover {{
-                    background: rgba(255,255,255,0.12);
-                    transform: translateX(5px);
-                }}
-                
-                .ai-status {{
-                    background: rgba(34,197,94,0.15);
-                    border: 1px solid rgba(34,197,94,0.3);
-                    border-radius: 16px;
-                    padding: 20px;
-                    margin-bottom: 30px;
-                    text-align: center;
-                    backdrop-filter: blur(10px);
-                }}
-                
-                .ai-status i {{
-                    color: #22c55e;
-                    margin-right: 10px;
-                    font-size: 1.2em;
-                }}
-                
-                .ai-status strong {{
-                    color: #ffffff;
-                    font-weight: 600;
-                }}
-                
-                .executive-summary {{
-                    background: rgba(59,130,246,0.1);
-                    border: 1px solid rgba(59,130,246,0.2);
-                    border-radius: 16px;
-                    padding: 25px;
-                    margin-top: 20px;
-                }}
-                
-                .executive-summary p {{
-                    font-size: 1.15em;
-                    line-height: 1.8;
-                    color: #e2e8f0;
-                    font-weight: 400;
-                }}
-                
-                                 @media (max-width: 768px) {{
-                     .container {{ padding: 20px 15px; }}
-                     .header {{ padding: 30px 20px; }}
-                     .header h1 {{ font-size: 2.2em; }}
-                     .metrics-grid {{ grid-template-columns: repeat(2, 1fr); }}
-                     .back-btn {{ position: relative; top: auto; left: auto; margin-bottom: 20px; }}
-                     
-                     .section {{
-                         padding: 25px 20px;
-                         margin-bottom: 20px;
-                     }}
-                     
-                     .section h3 {{
-                         font-size: 1.3em;
-                         margin-bottom: 20px;
-                     }}
-                     
-                     .metric-card {{
-                         padding: 20px 15px;
-                     }}
-                     
-                     .metric-value {{
-                         font-size: 1.8em;
-                     }}
-                     
-                     .metric-label {{
-                         font-size: 0.8em;
-                     }}
-                     
-                     .insights-list li, .recommendations-list li {{
-                         padding: 15px;
-                         margin-bottom: 12px;
-                     }}
-                     
-                     .executive-summary {{
-                         padding: 20px;
-                     }}
-                     
-                     .executive-summary p {{
-                         font-size: 1em;
-                     }}
+        // Check for saved theme preference
+        const savedTheme = localStorage.getItem('theme') || 'light';
+        const html = document.documentElement;
+        const themeIcon = document.getElementById('theme-icon');
+        
+        if (savedTheme === 'dark') {
+            html.classList.remove('light');
+            html.classList.add('dark');
+            themeIcon.className = 'fas fa-sun';
+        } else {
+            html.classList.remove('dark');
+            html.classList.add('light');
+            themeIcon.className = 'fas fa-moon';
+        }
+    """
+    
+    return f"""
+    <!DOCTYPE html>
+    <html class="light">
+    <head>
+        <title>Network Performance Analysis Report - NetOps AI Pipeline</title>
+        <meta charset="UTF-8">
+        <meta name="viewport" content="width=device-width, initial-scale=1.0">
+        <link href="https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700;800&display=swap" rel="stylesheet">
+        <link href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css" rel="stylesheet">
+        <script src="https://cdn.tailwindcss.com"></script>
+        <script>
+            {tailwind_config}
+        </script>
+        <style>
+            * {{ margin: 0; padding: 0; box-sizing: border-box; }}
+            
+            body {{ 
+                font-family: 'Inter', -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
+                background: linear-gradient(135deg, #f8fafc 0%, #e2e8f0 50%, #cbd5e1 100%);
+                color: #1e293b;
+                line-height: 1.7;
+                min-height: 100vh;
+                font-weight: 400;
+                transition: all 0.3s ease;
+            }}
+            
+            .dark body {{
+                background: linear-gradient(135deg, #0f172a 0%, #1e293b 50%, #334155 100%);
+                color: #f1f5f9;
+            }}
+            
+            .container {{ 
+                max-width: 1200px; 
+                margin: 0 auto; 
+                padding: 30px 20px;
+            }}
+            
+            .back-btn {{
+                position: fixed;
+                top: 30px;
+                left: 30px;
+                background: rgba(255,255,255,0.1);
+                color: #ffffff;
+                padding: 12px 24px;
+                border-radius: 12px;
+                text-decoration: none;
+                transition: all 0.3s ease;
+                backdrop-filter: blur(20px);
+                display: inline-flex;
+                align-items: center;
+                gap: 10px;
+                font-weight: 500;
+                border: 1px solid rgba(255,255,255,0.2);
+                z-index: 1000;
+            }}
+            
+            .back-btn:hover {{
+                background: rgba(255,255,255,0.2);
+                transform: translateY(-2px);
+                box-shadow: 0 10px 25px rgba(0,0,0,0.2);
+            }}
+            
+            .theme-toggle {{
+                position: fixed;
+                top: 30px;
+                right: 30px;
+                background: rgba(255,255,255,0.1);
+                color: #ffffff;
+                padding: 12px;
+                border-radius: 12px;
+                text-decoration: none;
+                transition: all 0.3s ease;
+                backdrop-filter: blur(20px);
+                border: none;
+                cursor: pointer;
+                font-size: 1.2em;
+                z-index: 1000;
+                border: 1px solid rgba(255,255,255,0.2);
+            }}
+            
+            .theme-toggle:hover {{
+                background: rgba(255,255,255,0.2);
+                transform: translateY(-2px);
+                box-shadow: 0 10px 25px rgba(0,0,0,0.2);
+            }}
+            
+            .dark .theme-toggle {{
+                background: rgba(0,0,0,0.2);
+                color: #e2e8f0;
+                border: 1px solid rgba(255,255,255,0.1);
+            }}
+            
+            .dark .theme-toggle:hover {{
+                background: rgba(0,0,0,0.3);
+            }}
+            
+            .header {{
+                background: linear-gradient(135deg, #1e3a8a 0%, #3b82f6 50%, #60a5fa 100%);
+                padding: 50px 40px;
+                border-radius: 24px;
+                text-align: center;
+                margin-bottom: 40px;
+                box-shadow: 0 25px 50px rgba(0,0,0,0.3);
+                position: relative;
+                overflow: hidden;
+            }}
+            
+            .header::before {{
+                content: '';
+                position: absolute;
+                top: 0;
+                left: 0;
+                right: 0;
+                bottom: 0;
+                background: url('data:image/svg+xml,<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 100"><defs><pattern id="grid" width="10" height="10" patternUnits="userSpaceOnUse"><path d="M 10 0 L 0 0 0 10" fill="none" stroke="rgba(255,255,255,0.1)" stroke-width="0.5"/></pattern></defs><rect width="100" height="100" fill="url(%23grid)"/></svg>');
+                opacity: 0.3;
+            }}
+            
+            .header h1 {{
+                font-size: 2.8em;
+                font-weight: 800;
+                margin-bottom: 15px;
+                color: #ffffff;
+                position: relative;
+                z-index: 1;
+            }}
+            
+            .header p {{
+                font-size: 1.3em;
+                opacity: 0.95;
+                font-weight: 400;
+                margin-bottom: 25px;
+                position: relative;
+                z-index: 1;
+            }}
+            
+            .severity-badge {{
+                display: inline-block;
+                background: rgba(255,255,255,0.1);
+                color: {severity_color};
+                padding: 12px 24px;
+                border-radius: 25px;
+                font-weight: 700;
+                font-size: 0.95em;
+                text-transform: uppercase;
+                letter-spacing: 1px;
+                border: 2px solid {severity_color};
+                position: relative;
+                z-index: 1;
+                backdrop-filter: blur(10px);
+            }}
+            
+            .section {{
+                background: rgba(255,255,255,0.08);
+                backdrop-filter: blur(20px);
+                border: 1px solid rgba(255,255,255,0.15);
+                border-radius: 20px;
+                padding: 35px;
+                margin-bottom: 30px;
+                box-shadow: 0 15px 35px rgba(0,0,0,0.1);
+            }}
+            
+            .section h3 {{
+                color: #ffffff;
+                font-size: 1.5em;
+                margin-bottom: 25px;
+                display: flex;
+                align-items: center;
+                gap: 15px;
+                font-weight: 700;
+            }}
+            
+            .section h3 i {{
+                font-size: 1.2em;
+                color: #60a5fa;
+            }}
+            
+            .metrics-grid {{
+                display: grid;
+                grid-template-columns: repeat(auto-fit, minmax(180px, 1fr));
+                gap: 25px;
+                margin: 25px 0;
+            }}
+            
+            .metric-card {{
+                background: rgba(255,255,255,0.1);
+                border-radius: 16px;
+                padding: 25px;
+                text-align: center;
+                border: 1px solid rgba(255,255,255,0.1);
+                transition: all 0.3s ease;
+            }}
+            
+            .metric-card:hover {{
+                background: rgba(255,255,255,0.15);
+                transform: translateY(-3px);
+                box-shadow: 0 10px 25px rgba(0,0,0,0.2);
+            }}
+            
+            .metric-value {{
+                font-size: 2.2em;
+                font-weight: 800;
+                color: #60a5fa;
+                margin-bottom: 8px;
+            }}
+            
+            .metric-label {{
+                color: #cbd5e1;
+                font-size: 0.9em;
+                text-transform: uppercase;
+                letter-spacing: 0.8px;
+                font-weight: 600;
+            }}
+            
+            .insights-list, .recommendations-list {{
+                list-style: none;
+                padding: 0;
+            }}
+            
+            .insights-list li, .recommendations-list li {{
+                background: rgba(255,255,255,0.08);
+                border-radius: 12px;
+                padding: 20px;
+                margin-bottom: 15px;
+                border-left: 4px solid #60a5fa;
+                transition: all 0.3s ease;
+            }}
+            
+            .insights-list li:hover, .recommendations-list li:hover {{
+                background: rgba(255,255,255,0.12);
+                transform: translateX(5px);
+            }}
+            
+            .ai-status {{
+                background: rgba(34,197,94,0.15);
+                border: 1px solid rgba(34,197,94,0.3);
+                border-radius: 16px;
+                padding: 20px;
+                margin-bottom: 30px;
+                text-align: center;
+                backdrop-filter: blur(10px);
+            }}
+            
+            .ai-status i {{
+                color: #22c55e;
+                margin-right: 10px;
+                font-size: 1.2em;
+            }}
+            
+            .ai-status strong {{
+                color: #ffffff;
+                font-weight: 600;
+            }}
+            
+            .executive-summary {{
+                background: rgba(59,130,246,0.1);
+                border: 1px solid rgba(59,130,246,0.2);
+                border-radius: 16px;
+                padding: 25px;
+                margin-top: 20px;
+            }}
+            
+            .executive-summary p {{
+                font-size: 1.15em;
+                line-height: 1.8;
+                color: #e2e8f0;
+                font-weight: 400;
+            }}
+            
+                             @media (max-width: 768px) {{
+                 .container {{ padding: 20px 15px; }}
+                 .header {{ padding: 30px 20px; }}
+                 .header h1 {{ font-size: 2.2em; }}
+                 .metrics-grid {{ grid-template-columns: repeat(2, 1fr); }}
+                 .back-btn {{ position: relative; top: auto; left: auto; margin-bottom: 20px; }}
+                 
+                 .section {{
+                     padding: 25px 20px;
+                     margin-bottom: 20px;
                  }}
                  
-                 @media (max-width: 480px) {{
-                     .container {{ padding: 15px 10px; }}
-                     .header {{ padding: 25px 15px; }}
-                     .header h1 {{ font-size: 1.8em; }}
-                     .header p {{ font-size: 1.1em; }}
-                     .metrics-grid {{ grid-template-columns: 1fr; }}
-                     
-                     .section {{
-                         padding: 20px 15px;
-                         border-radius: 15px;
-                     }}
-                     
-                     .section h3 {{
-                         font-size: 1.2em;
-                         margin-bottom: 15px;
-                     }}
-                     
-                     .metric-card {{
-                         padding: 15px 12px;
-                     }}
-                     
-                     .metric-value {{
-                         font-size: 1.5em;
-                     }}
-                     
-                     .metric-label {{
-                         font-size: 0.75em;
-                     }}
-                     
-                     .insights-list li, .recommendations-list li {{
-                         padding: 12px;
-                         margin-bottom: 10px;
-                         font-size: 0.9em;
-                     }}
-                     
-                     .executive-summary {{
-                         padding: 15px;
-                     }}
-                     
-                     .executive-summary p {{
-                         font-size: 0.9em;
-                     }}
-                     
-                     .ai-status {{
-                         padding: 15px;
-                         font-size: 0.9em;
-                     }}
-                     
-                     .severity-badge {{
-                         padding: 8px 16px;
-                         font-size: 0.85em;
-                     }}
+                 .section h3 {{
+                     font-size: 1.3em;
+                     margin-bottom: 20px;
                  }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <a href="/" class="back-btn">
-                    <i class="fas fa-arrow-left"></i> Back to Dashboard
-                </a>
-                
-                <button class="theme-toggle" onclick="toggleTheme()">
-                    <i class="fas fa-moon" id="theme-icon"></i>
-                </button>
-                
-                <div class="header">
-                    <h1><i class="fas fa-chart-line"></i> Network Performance Analysis</h1>
-                    <p>Comprehensive network intelligence and performance optimization insights</p>
-                    <div style="margin-top: 25px;">
-                        <span class="severity-badge">{severity} SEVERITY LEVEL</span>
-                    </div>
-                </div>
-                
-                <div class="ai-status">
-                    <i class="fas fa-check-circle"></i>
-                    <strong>Analysis Complete</strong> - Advanced machine learning algorithms have processed your network data
+                 
+                 .metric-card {{
+                     padding: 20px 15px;
+                 }}
+                 
+                 .metric-value {{
+                     font-size: 1.8em;
+                 }}
+                 
+                 .metric-label {{
+                     font-size: 0.8em;
+                 }}
+                 
+                 .insights-list li, .recommendations-list li {{
+                     padding: 15px;
+                     margin-bottom: 12px;
+                 }}
+                 
+                 .executive-summary {{
+                     padding: 20px;
+                 }}
+                 
+                 .executive-summary p {{
+                     font-size: 1em;
+                 }}
+             }}
+             
+             @media (max-width: 480px) {{
+                 .container {{ padding: 15px 10px; }}
+                 .header {{ padding: 25px 15px; }}
+                 .header h1 {{ font-size: 1.8em; }}
+                 .header p {{ font-size: 1.1em; }}
+                 .metrics-grid {{ grid-template-columns: 1fr; }}
+                 
+                 .section {{
+                     padding: 20px 15px;
+                     border-radius: 15px;
+                 }}
+                 
+                 .section h3 {{
+                     font-size: 1.2em;
+                     margin-bottom: 15px;
+                 }}
+                 
+                 .metric-card {{
+                     padding: 15px 12px;
+                 }}
+                 
+                 .metric-value {{
+                     font-size: 1.5em;
+                 }}
+                 
+                 .metric-label {{
+                     font-size: 0.75em;
+                 }}
+                 
+                 .insights-list li, .recommendations-list li {{
+                     padding: 12px;
+                     margin-bottom: 10px;
+                     font-size: 0.9em;
+                 }}
+                 
+                 .executive-summary {{
+                     padding: 15px;
+                 }}
+                 
+                 .executive-summary p {{
+                     font-size: 0.9em;
+                 }}
+                 
+                 .ai-status {{
+                     padding: 15px;
+                     font-size: 0.9em;
+                 }}
+                 
+                 .severity-badge {{
+                     padding: 8px 16px;
+                     font-size: 0.85em;
+                 }}
+             }}
+        </style>
+    </head>
+    <body>
+        <div class="container">
+            <a href="/" class="back-btn">
+                <i class="fas fa-arrow-left"></i> Back to Dashboard
+            </a>
+            
+            <button class="theme-toggle" onclick="toggleTheme()">
+                <i class="fas fa-moon" id="theme-icon"></i>
+            </button>
+            
+            <div class="header">
+                <h1><i class="fas fa-chart-line"></i> Network Performance Analysis</h1>
+                <p>Comprehensive network intelligence and performance optimization insights</p>
+                <div style="margin-top: 25px;">
+                    <span class="severity-badge">{severity} SEVERITY LEVEL</span>
                 </div>
-                
-                <div class="section">
-                    <h3><i class="fas fa-chart-bar"></i> Performance Metrics</h3>
-                    <div class="metrics-grid">
-                        <div class="metric-card">
-                            <div class="metric-value">{len(df)}</div>
-                            <div class="metric-label">Total Samples</div>
-                        </div>
-                        <div class="metric-card">
-                            <div class="metric-value">{len(anomalies)}</div>
-                            <div class="metric-label">Anomalies Detected</div>
-                        </div>
-                        <div class="metric-card">
-                            <div class="metric-value">{anomaly_rate:.1f}%</div>
-                            <div class="metric-label">Anomaly Rate</div>
-                        </div>
-                        <div class="metric-card">
-                            <div class="metric-value">{severity}</div>
-                            <div class="metric-label">Severity Level</div>
-                        </div>
+            </div>
+            
+            <div class="ai-status">
+                <i class="fas fa-check-circle"></i>
+                <strong>Analysis Complete</strong> - Advanced machine learning algorithms have processed your network data
+            </div>
+            
+            <div class="section">
+                <h3><i class="fas fa-chart-bar"></i> Performance Metrics</h3>
+                <div class="metrics-grid">
+                    <div class="metric-card">
+                        <div class="metric-value">{stats['total']}</div>
+                        <div class="metric-label">Total Samples</div>
                     </div>
-                </div>
-                
-                <div class="section">
-                    <h3><i class="fas fa-file-alt"></i> Executive Summary</h3>
-                    <div class="executive-summary">
-                        <p>{ai_result.get("summary", "Network performance analysis completed successfully with comprehensive insights and actionable recommendations.")}</p>
+                    <div class="metric-card">
+                        <div class="metric-value">{stats['anomalies']}</div>
+                        <div class="metric-label">Anomalies Detected</div>
+                    </div>
+                    <div class="metric-card">
+                        <div class="metric-value">{anomaly_rate:.1f}%</div>
+                        <div class="metric-label">Anomaly Rate</div>
+                    </div>
+                    <div class="metric-card">
+                        <div class="metric-value">{severity}</div>
+                        <div class="metric-label">Severity Level</div>
                     </div>
                 </div>
-                
-                <div class="section">
-                    <h3><i class="fas fa-search"></i> Key Insights</h3>
-                    <ul class="insights-list">
-                        {insights_html if insights_html else '<li>Network performance analysis identified critical patterns and trends in the data.</li><li>Performance metrics indicate overall system health and operational efficiency.</li><li>Anomaly detection algorithms successfully identified potential issues requiring attention.</li>'}
-                    </ul>
-                </div>
-                
-                <div class="section">
-                    <h3><i class="fas fa-cog"></i> Recommendations</h3>
-                    <ul class="recommendations-list">
-                        {recommendations_html if recommendations_html else '<li>Implement continuous monitoring of network performance metrics.</li><li>Review and optimize configuration settings for improved performance.</li><li>Establish proactive capacity planning based on current utilization patterns.</li><li>Schedule regular performance reviews and system health checks.</li>'}
-                    </ul>
+            </div>
+            
+            <div class="section">
+                <h3><i class="fas fa-file-alt"></i> Executive Summary</h3>
+                <div class="executive-summary">
+                    <p>{ai_result.get("summary", "Network performance analysis completed successfully with comprehensive insights and actionable recommendations.")}</p>
                 </div>
             </div>
-        </body>
+            
+            <div class="section">
+                <h3><i class="fas fa-search"></i> Key Insights</h3>
+                <ul class="insights-list">
+                    {insights_html if insights_html else '<li>Network performance analysis identified critical patterns and trends in the data.</li><li>Performance metrics indicate overall system health and operational efficiency.</li><li>Anomaly detection algorithms successfully identified potential issues requiring attention.</li>'}
+                </ul>
+            </div>
+            
+            <div class="section">
+                <h3><i class="fas fa-cog"></i> Recommendations</h3>
+                <ul class="recommendations-list">
+                    {recommendations_html if recommendations_html else '<li>Implement continuous monitoring of network performance metrics.</li><li>Review and optimize configuration settings for improved performance.</li><li>Establish proactive capacity planning based on current utilization patterns.</li><li>Schedule regular performance reviews and system health checks.</li>'}
+                </ul>
+            </div>
+        </div>
+    </body>
+    
+    <script>
+        {theme_toggle_js}
+    </script>
+    </html>
+    """
+
+
+@app.get("/ai-summary/{upload_id}", response_class=HTMLResponse)
+async def ai_summary(upload_id: int):
+    """Get AI-generated insights and recommendations for an upload"""
+    try:
+        df, anomalies, ai_result, stats = await load_kpi_summary(upload_id)
+        if df.empty:
+            raise HTTPException(status_code=404, detail="Upload not found")
         
-        <script>
-            {theme_toggle_js}
-        </script>
-        </html>
-        """
+        # Building the page is plain Python string work; keep it off the event loop
+        return await run_in_threadpool(render_ai_summary_page, ai_result, stats)
         
     except Exception as e:
         # AI summary error - handled gracefully
@@ -2894,53 +2983,268 @@ def ai_summary(upload_id: int):
         </html>
         """
 
+@app.get("/coalescing")
+def coalescing_stats():
+    """Executed vs coalesced counts of the single-flight request layer"""
+    return {"sync": request_flight.stats(), "async": async_request_flight.stats()}
+
+@app.get("/storage")
+def storage_stats():
+    """Database backend, effective SQLite pragmas and writer queue counters"""
+    return database_stats()
+
+@app.get("/ai/timings")
+def ai_timings():
+    """Timing and outcome of recent async LLM summary calls"""
+    return {
+        "max_concurrency": AI_MAX_CONCURRENCY,
+        "deadline_seconds": AI_DEADLINE_SECONDS,
+        "calls": list(ai_call_log),
+    }
+
+@app.post("/ai-summary/{upload_id}/invalidate")
+def invalidate_ai_summary(upload_id: int):
+    """Drop cached AI summaries for an upload so the next view regenerates them"""
+    return {"upload_id": upload_id, "invalidated": invalidate_summaries(upload_id=upload_id)}
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Whether an If-None-Match header lists `etag` or is `*` (weak comparison, RFC 9110 13.1.2)"""
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.removeprefix("W/") == etag for tag in ENTITY_TAG_RE.findall(if_none_match))
+
+def artifact_response(
+    request: Request,
+    digest: str,
+    content_type: str,
+    cache_control: str = ARTIFACT_CACHE_CONTROL,
+    filename: str | None = None,
+):
+    """Serve a stored artifact with its digest as a strong ETag; 304 when the client has it"""
+    etag = f'"{digest}"'
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+
+    path = artifact_store.open_path(digest)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    if filename:
+        headers["Content-Disposition"] = f"attachment; filename={filename}"
+    return FileResponse(path, media_type=content_type, headers=headers)
+
 @app.get("/chart/{upload_id}")
-def get_chart(upload_id: int):
-    """Get visualization chart for an upload"""
-    chart_path = f"temp_chart_{upload_id}.png"
-    if os.path.exists(chart_path):
-        return FileResponse(chart_path, media_type="image/png")
-    else:
-        raise HTTPException(status_code=404, detail="Chart not found for this upload")
+def get_chart(upload_id: int, request: Request):
+    """Get visualization chart for an upload.
+
+    Charts render in the background after upload: until ready this returns
+    202 with Retry-After. A missing chart for a stored upload (e.g. evicted)
+    is re-rendered on request.
+    """
+    info = artifact_store.get(chart_key(upload_id))
+    if info is not None:
+        chart_renderer.forget(upload_id)
+        return artifact_response(request, info["digest"], info["content_type"])
+
+    status = chart_renderer.status(upload_id)
+    if status is not None and status["status"] == "failed":
+        chart_renderer.forget(upload_id)
+        raise HTTPException(status_code=500, detail=f"Chart rendering failed: {status['error']}")
+    if status is None or status["status"] in ("done", "missing"):
+        summary = get_upload_summary(upload_id)
+        if summary is None or summary["total"] == 0:
+            raise HTTPException(status_code=404, detail="Chart not found for this upload")
+        chart_renderer.submit(upload_id, upload_id)
+        status = chart_renderer.status(upload_id) or {"status": "pending"}
+
+    return JSONResponse(
+        {"upload_id": upload_id, **status, "chart": f"/chart/{upload_id}"},
+        status_code=202,
+        headers={"Retry-After": str(CHART_RETRY_AFTER_SECONDS)},
+    )
+
+@app.get("/artifacts")
+def artifact_stats():
+    """Artifact store usage (objects, refs, bytes) and its eviction budget"""
+    return artifact_store.stats()
+
+@app.get("/artifacts/{digest}")
+def get_artifact(digest: str, request: Request):
+    """Any stored artifact by content digest; these URLs never change content"""
+    if len(digest) != 64 or any(c not in "0123456789abcdef" for c in digest):
+        raise HTTPException(status_code=400, detail="Invalid digest")
+    path = artifact_store.open_path(digest)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    return artifact_response(request, digest, sniff_content_type(path), cache_control=IMMUTABLE_CACHE_CONTROL)
 
 @app.post("/logs/summarize")
-async def summarize_logs(file: UploadFile = File(...)):
-    """Summarize syslog incidents using AI-powered analysis"""
-    if not file.filename.endswith((".log", ".txt")):
-        raise HTTPException(status_code=400, detail="Only log/txt files are supported")
+async def summarize_logs(
+    file: UploadFile = File(...),
+    encoding: str = "utf-8",
+    decode_errors: str = "replace",
+    persist: bool = True,
+):
+    """Summarize syslog incidents using AI-powered analysis.
+
+    The upload is scanned line by line straight from its spool file, with
+    gzip/zstd decompressed on the fly, so memory does not grow with log size.
+    Undecodable bytes are replaced unless decode_errors=strict. With
+    persist=true (the default) every line is stored as a LogEvent so
+    /logs/{log_upload_id}/events and /histogram can answer without re-parsing.
+    """
+    if not file.filename.endswith(LOG_EXTENSIONS):
+        raise HTTPException(status_code=400, detail="Only log/txt files (optionally .gz/.zst) are supported")
+    if decode_errors not in DECODE_ERRORS:
+        raise HTTPException(status_code=400, detail=f"decode_errors must be one of {list(DECODE_ERRORS)}")
+    try:
+        codecs.lookup(encoding)
+    except LookupError:
+        raise HTTPException(status_code=400, detail=f"Unknown encoding: {encoding}")
 
-    content = await file.read()
-    log_text = content.decode("utf-8")
+    log_upload_id = await run_in_threadpool(create_log_upload, file.filename) if persist else None
+    writer = LogEventWriter(log_upload_id) if persist else None
+    try:
+        scan = await run_in_threadpool(scan_log_stream, file.file, encoding, decode_errors, event_sink=writer)
+    except Exception as e:
+        if persist:
+            await run_in_threadpool(delete_log_upload, log_upload_id)
+        if isinstance(e, UnicodeDecodeError):
+            raise HTTPException(
+                status_code=400,
+                detail=f"Log is not valid {encoding} ({e.reason}); retry with decode_errors=replace",
+            )
+        if isinstance(e, (OSError, EOFError, zstandard.ZstdError)):
+            raise HTTPException(status_code=400, detail=f"Could not decompress log: {e}")
+        raise
 
-    incidents = extract_incidents(log_text)
+    incidents = await aextract_incidents(scan=scan)
+    if persist:
+        await run_in_threadpool(finish_log_upload, log_upload_id, scan, incidents["summary"])
 
     return {
+        "log_upload_id": log_upload_id,
         "filename": file.filename,
         "summary": incidents["summary"],
         "incident_counts": incidents["incident_counts"],
+        "severity_buckets": incidents["severity_buckets"],
+        "templates": incidents["templates"],
+        "total_lines": scan["total_lines"],
         "analysis": "AI-powered log analysis complete with incident categorization and severity assessment",
         "timestamp": datetime.now().isoformat(),
     }
 
+@app.get("/logs")
+def list_logs(limit: int = LOG_UPLOADS_PAGE_SIZE):
+    """Stored log uploads, newest first"""
+    return [
+        {**u, "created_at": u["created_at"].isoformat()}
+        for u in list_log_uploads(limit=limit)
+    ]
+
+@app.get("/logs/{log_upload_id}")
+def get_log(log_upload_id: int):
+    """Stored scan of a log upload: totals, incident counts, severity buckets, templates and summary"""
+    upload = get_log_upload(log_upload_id)
+    if upload is None:
+        raise HTTPException(status_code=404, detail="Log upload not found")
+    return {**upload, "created_at": upload["created_at"].isoformat()}
+
+def _parse_severities(severity: str | None) -> list[str] | None:
+    return [s.strip() for s in severity.split(",") if s.strip()] if severity else None
+
+@app.get("/logs/{log_upload_id}/events")
+def get_log_events(
+    log_upload_id: int,
+    start: str | None = None,
+    end: str | None = None,
+    severity: str | None = None,
+    cursor: int | None = None,
+    limit: int = LOG_EVENTS_PAGE_SIZE,
+):
+    """Stored log lines in [start, end), filtered by comma-separated severity buckets.
+
+    start/end are "YYYY-MM-DD HH:MM[:SS]" prefixes. Pages by cursor like
+    /uploads/api (X-Next-Cursor and Link headers).
+    """
+    if get_log_upload(log_upload_id) is None:
+        raise HTTPException(status_code=404, detail="Log upload not found")
+    try:
+        events, next_cursor = query_log_events(
+            log_upload_id, start=start, end=end, severities=_parse_severities(severity), limit=limit, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    headers = {}
+    if next_cursor is not None:
+        headers["X-Next-Cursor"] = str(next_cursor)
+        params = {"start": start, "end": end, "severity": severity, "cursor": next_cursor, "limit": limit}
+        query = urlencode({k: v for k, v in params.items() if v is not None})
+        headers["Link"] = f'</logs/{log_upload_id}/events?{query}>; rel="next"'
+    return JSONResponse({"log_upload_id": log_upload_id, "events": events, "next_cursor": next_cursor}, headers=headers)
+
+@app.get("/logs/{log_upload_id}/histogram")
+def get_log_histogram(log_upload_id: int, start: str | None = None, end: str | None = None, severity: str | None = None):
+    """Per-minute event counts by severity bucket for a stored log upload"""
+    if get_log_upload(log_upload_id) is None:
+        raise HTTPException(status_code=404, detail="Log upload not found")
+    try:
+        buckets = log_event_histogram(log_upload_id, start=start, end=end, severities=_parse_severities(severity))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"log_upload_id": log_upload_id, "interval": "minute", "buckets": buckets}
+
+@app.get("/correlate/{upload_id}")
+def correlate(
+    upload_id: int,
+    log_upload_id: int,
+    window_seconds: int = CORRELATION_WINDOW_SECONDS,
+    direction: str = "nearest",
+    severity: str | None = None,
+    limit: int = CORRELATION_MATCH_LIMIT,
+):
+    """Match a KPI upload's anomalies to a stored log upload's incidents within a time window.
+
+    direction picks the nearest event either side, the last one before
+    (backward) or the first one after (forward). severity is a
+    comma-separated list of buckets (default: critical, error, alarm, warning).
+    """
+    if get_log_upload(log_upload_id) is None:
+        raise HTTPException(status_code=404, detail="Log upload not found")
+    try:
+        result = correlate_upload(
+            upload_id,
+            log_upload_id,
+            window_seconds=window_seconds,
+            direction=direction,
+            severities=_parse_severities(severity),
+            limit=max(0, limit),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return result
+
 @app.get("/uploads", response_class=HTMLResponse)
-def list_uploads_html():
+def list_uploads_html(cursor: int | None = None, limit: int = UPLOADS_PAGE_SIZE):
     """User-friendly HTML page for viewing uploads"""
-    with get_session() as s:
-        uploads = s.query(Upload).order_by(Upload.created_at.desc()).all()
+    uploads, next_cursor = list_upload_stats(limit=limit, cursor=cursor)
+    total_uploads = count_uploads()
     
     uploads_html = ""
     for u in uploads:
         # Get upload statistics
-        scores = s.query(Score).filter(Score.upload_id == u.id).all()
-        total_samples = len(scores)
-        anomalies = sum(1 for score in scores if score.anomaly == -1)
+        total_samples = u["total_samples"]
+        anomalies = u["anomalies"]
         anomaly_rate = (anomalies / total_samples * 100) if total_samples > 0 else 0
         
         uploads_html += f"""
         <div class="upload-item">
             <div class="upload-header">
-                <h4><i class="fas fa-file-csv"></i> {u.filename}</h4>
-                <span class="upload-date">{u.created_at.strftime('%Y-%m-%d %H:%M:%S')}</span>
+                <h4><i class="fas fa-file-csv"></i> {u["filename"]}</h4>
+                <span class="upload-date">{u["created_at"].strftime('%Y-%m-%d %H:%M:%S')}</span>
             </div>
             <div class="upload-stats">
                 <div class="stat">
@@ -2957,22 +3261,31 @@ def list_uploads_html():
                 </div>
             </div>
                          <div class="upload-actions">
-                 <a href="/ai-summary/{u.id}" class="action-link" target="_blank">
+                 <a href="/ai-summary/{u["id"]}" class="action-link" target="_blank">
                      <i class="fas fa-chart-bar"></i> AI Report
                  </a>
-                 <a href="/chart/{u.id}" class="action-link" target="_blank">
+                 <a href="/chart/{u["id"]}" class="action-link" target="_blank">
                      <i class="fas fa-chart-line"></i> Chart
                  </a>
-                 <a href="/pdf/{u.id}" class="action-link">
+                 <a href="/pdf/{u["id"]}" class="action-link">
                      <i class="fas fa-file-pdf"></i> Download PDF
                  </a>
-                 <a href="/predictions/{u.id}/html" class="action-link" target="_blank">
+                 <a href="/predictions/{u["id"]}/html" class="action-link" target="_blank">
                      <i class="fas fa-tree"></i> Predictions
                  </a>
              </div>
         </div>
         """
     
+    if next_cursor is not None:
+        uploads_html += f"""
+        <div class="upload-actions">
+            <a href="/uploads?cursor={next_cursor}&limit={limit}" class="action-link">
+                <i class="fas fa-arrow-right"></i> Older uploads
+            </a>
+        </div>
+        """
+    
     # Extract JavaScript config to avoid nested f-string issues
     tailwind_config = """
             tailwind.config = {
@@ -3485,7 +3798,7 @@ def list_uploads_html():
                         <i class="fas fa-database"></i> Processed Files
                     </div>
                     <div class="upload-count">
-                        {len(uploads)} Upload{'' if len(uploads) == 1 else 's'}
+                        {total_uploads} Upload{'' if total_uploads == 1 else 's'}
                     </div>
                 </div>
                 
@@ -3507,54 +3820,69 @@ def list_uploads_html():
     """
 
 @app.get("/uploads/api")
-def list_uploads_api():
-    """API endpoint for programmatic access to uploads"""
-    with get_session() as s:
-        uploads = s.query(Upload).all()
-    return [
+def list_uploads_api(cursor: int | None = None, limit: int = UPLOADS_PAGE_SIZE):
+    """API endpoint for programmatic access to uploads.
+
+    Newest first, one page per call; the next page's cursor is returned in
+    the X-Next-Cursor header and a Link rel="next" header.
+    """
+    uploads, next_cursor = list_upload_stats(limit=limit, cursor=cursor)
+    headers = {}
+    if next_cursor is not None:
+        headers["X-Next-Cursor"] = str(next_cursor)
+        headers["Link"] = f'</uploads/api?cursor={next_cursor}&limit={limit}>; rel="next"'
+    content = [
         {
-            "id": u.id, 
-            "filename": u.filename, 
-            "created_at": u.created_at,
+            "id": u["id"], 
+            "filename": u["filename"], 
+            "created_at": u["created_at"].isoformat(),
+            "total_samples": u["total_samples"],
+            "anomalies": u["anomalies"],
             "status": "processed",
             "ai_analysis_available": True
         }
         for u in uploads
     ]
+    return JSONResponse(content, headers=headers)
 
 @app.get("/predictions/{upload_id}")
-def get_predictions(upload_id: int):
-    """Get Random Forest predictions for an upload"""
+def get_predictions(upload_id: int, view: str = "rows", offset: int = 0, limit: int | None = None):
+    """Get Random Forest predictions for an upload.
+
+    view=rows returns per-row dicts (the original format), view=columnar
+    returns parallel arrays and view=summary returns aggregates only.
+    offset/limit page the per-row predictions; the summary always covers
+    the whole upload.
+    """
+    if view not in PREDICTION_OUTPUTS:
+        raise HTTPException(status_code=400, detail=f"view must be one of {list(PREDICTION_OUTPUTS)}")
+    if offset < 0 or (limit is not None and limit < 0):
+        raise HTTPException(status_code=400, detail="offset and limit must be non-negative")
+
     try:
-        with get_session() as s:
-            rows = s.query(Score).filter(Score.upload_id == upload_id).all()
-        if not rows:
+        df = load_upload_frame(upload_id)
+        if df.empty:
             raise HTTPException(status_code=404, detail="Upload not found")
-
-        # Convert database rows back to DataFrame for Random Forest analysis
-        import pandas as pd
-        
-        data_list = []
-        for row in rows:
-            data_list.append({
-                'cell_id': row.cell_id,
-                'timestamp': row.ts,
-                'anomaly': row.anomaly,
-                'score': row.score,
-                'PRB_Util': row.prb_util or 0.0,
-                'RRC_Conn': row.rrc_conn or 0.0,
-                'Throughput_Mbps': row.throughput_mbps or 0.0,
-                'BLER': row.bler or 0.0
-            })
         
-        df = pd.DataFrame(data_list)
+        # Get Random Forest predictions (shared with concurrent requests, so copied before paging)
+        output = "summary" if view == "summary" else "columnar"
+        rf_results = dict(request_flight.do(("predictions", upload_id, output), analyze_with_random_forest, df, output=output))
         
-        # Get Random Forest predictions
-        rf_results = analyze_with_random_forest(df)
+        if view != "summary":
+            stop = None if limit is None else offset + limit
+            status_columns = slice_columns(rf_results["status_predictions"], offset, stop)
+            throughput_columns = slice_columns(rf_results["throughput_predictions"], offset, stop)
+            if view == "rows":
+                rf_results["status_predictions"] = status_rows(status_columns)
+                rf_results["throughput_predictions"] = throughput_rows(throughput_columns)
+            else:
+                rf_results["status_predictions"] = status_columns
+                rf_results["throughput_predictions"] = throughput_columns
         
         return {
             "upload_id": upload_id,
             "random_forest_analysis": rf_results,
+            "pagination": {"offset": offset, "limit": limit, "total": len(df)},
             "timestamp": datetime.now().isoformat()
         }
         
@@ -3565,31 +3893,12 @@ def get_predictions(upload_id: int):
 def get_predictions_html(upload_id: int):
     """Get Random Forest predictions in HTML format"""
     try:
-        with get_session() as s:
-            rows = s.query(Score).filter(Score.upload_id == upload_id).all()
-        if not rows:
+        df = load_upload_frame(upload_id)
+        if df.empty:
             raise HTTPException(status_code=404, detail="Upload not found")
-
-        # Convert database rows back to DataFrame
-        import pandas as pd
-        
-        data_list = []
-        for row in rows:
-            data_list.append({
-                'cell_id': row.cell_id,
-                'timestamp': row.ts,
-                'anomaly': row.anomaly,
-                'score': row.score,
-                'PRB_Util': row.prb_util or 0.0,
-                'RRC_Conn': row.rrc_conn or 0.0,
-                'Throughput_Mbps': row.throughput_mbps or 0.0,
-                'BLER': row.bler or 0.0
-            })
-        
-        df = pd.DataFrame(data_list)
         
-        # Get Random Forest predictions
-        rf_results = analyze_with_random_forest(df)
+        # Get Random Forest predictions (the page only shows aggregates)
+        rf_results = request_flight.do(("predictions", upload_id, "summary"), analyze_with_random_forest, df, output="summary")
         
         # Extract data for HTML display
         summary = rf_results['summary']
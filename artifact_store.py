@@ -0,0 +1,258 @@
+import abc
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime
+from urllib.parse import quote
+
+# Backend and location of stored charts/PDFs; point ARTIFACT_DIR at a shared
+# volume to let several app instances serve each other's artifacts
+ARTIFACT_BACKEND = os.getenv("ARTIFACT_BACKEND", "local")
+ARTIFACT_DIR = os.getenv("ARTIFACT_DIR", "artifacts")
+
+# Total size of stored objects before the least recently used are evicted
+ARTIFACT_STORE_BYTES = int(os.getenv("ARTIFACT_STORE_MB", "1024")) * 1024 * 1024
+# Other processes sharing ARTIFACT_DIR add objects too; the running size total
+# of the local backend is re-read from disk at most this often
+ARTIFACT_RESCAN_SECONDS = float(os.getenv("ARTIFACT_RESCAN_SECONDS", "60"))
+
+
+class ArtifactStore(abc.ABC):
+    """Content-addressed store for generated files (charts, PDFs).
+
+    Objects are addressed by the SHA-256 of their bytes, so identical
+    renders are stored once and a digest doubles as a strong ETag. Logical
+    keys such as "chart/12" point at the current digest plus metadata.
+    Backends implement the abstract methods below, which are all callers use.
+    """
+
+    @abc.abstractmethod
+    def put_file(self, key: str, path: str, content_type: str, **metadata) -> dict:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get(self, key: str) -> dict | None:
+        """Metadata of the artifact stored under `key`, or None"""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def open_path(self, digest: str) -> str | None:
+        """Local filesystem path of an object, or None if it was evicted"""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def stats(self) -> dict:
+        raise NotImplementedError
+
+
+def file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# Leading bytes -> content type, for objects requested by digest alone
+CONTENT_SIGNATURES = [
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"%PDF-", "application/pdf"),
+]
+
+
+def sniff_content_type(path: str) -> str:
+    with open(path, "rb") as f:
+        head = f.read(16)
+    for signature, content_type in CONTENT_SIGNATURES:
+        if head.startswith(signature):
+            return content_type
+    return "application/octet-stream"
+
+
+class LocalArtifactStore(ArtifactStore):
+    """Directory backend: objects/<ab>/<digest> plus refs/<key>.json metadata.
+
+    All writes go through a temp file and os.replace, so processes sharing
+    the directory never see partial files; directories are created on first
+    write. Objects are touched on read and evicted least-recently-used first
+    (unreferenced ones before anything else) once their total size exceeds
+    `max_bytes`. That total is kept running and only re-read from disk when
+    it crosses the budget or is older than `rescan_seconds`.
+    """
+
+    def __init__(self, root: str = ARTIFACT_DIR, max_bytes: int = ARTIFACT_STORE_BYTES, rescan_seconds: float = ARTIFACT_RESCAN_SECONDS):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.rescan_seconds = rescan_seconds
+        self._objects = os.path.join(root, "objects")
+        self._refs = os.path.join(root, "refs")
+        self._lock = threading.Lock()
+        # Running size of the stored objects; None until first scanned
+        self._size_bytes = None
+        self._scanned_at = 0.0
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self._objects, digest[:2], digest)
+
+    def _ref_path(self, key: str) -> str:
+        return os.path.join(self._refs, quote(key, safe="") + ".json")
+
+    def _atomic_write(self, path: str, write):
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def put_file(self, key: str, path: str, content_type: str, **metadata) -> dict:
+        """Store the file at `path` under `key` (the source file is left in place)"""
+        digest = file_digest(path)
+        object_path = self._object_path(digest)
+        if os.path.exists(object_path):
+            os.utime(object_path)
+        else:
+            with open(path, "rb") as src:
+                self._atomic_write(object_path, lambda dst: shutil.copyfileobj(src, dst))
+            with self._lock:
+                if self._size_bytes is not None:
+                    self._size_bytes += os.path.getsize(object_path)
+
+        info = {
+            "key": key,
+            "digest": digest,
+            "size_bytes": os.path.getsize(object_path),
+            "content_type": content_type,
+            "created_at": datetime.utcnow().isoformat(),
+            **metadata,
+        }
+        self._atomic_write(self._ref_path(key), lambda f: f.write(json.dumps(info).encode("utf-8")))
+        self.evict()
+        return info
+
+    def get(self, key: str) -> dict | None:
+        try:
+            with open(self._ref_path(key), encoding="utf-8") as f:
+                info = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if not os.path.exists(self._object_path(info["digest"])):
+            return None
+        return info
+
+    def open_path(self, digest: str) -> str | None:
+        path = self._object_path(digest)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def delete(self, key: str) -> None:
+        try:
+            os.unlink(self._ref_path(key))
+        except FileNotFoundError:
+            pass
+
+    def _scan_objects(self) -> list[tuple[float, int, str]]:
+        objects = []
+        for dirpath, _, filenames in os.walk(self._objects):
+            for name in filenames:
+                if name.endswith(".tmp"):
+                    continue
+                try:
+                    st = os.stat(os.path.join(dirpath, name))
+                except FileNotFoundError:
+                    continue
+                objects.append((st.st_mtime, st.st_size, name))
+        return objects
+
+    def _ref_names(self) -> list[str]:
+        try:
+            return [name for name in os.listdir(self._refs) if name.endswith(".json")]
+        except FileNotFoundError:
+            return []
+
+    def _referenced(self) -> dict:
+        refs = {}
+        for name in self._ref_names():
+            try:
+                with open(os.path.join(self._refs, name), encoding="utf-8") as f:
+                    refs[name] = json.load(f)["digest"]
+            except (FileNotFoundError, json.JSONDecodeError, KeyError):
+                continue
+        return refs
+
+    def evict(self) -> list[str]:
+        """Drop least recently used objects (and their refs) until under max_bytes"""
+        with self._lock:
+            stale = time.monotonic() - self._scanned_at > self.rescan_seconds
+            if self._size_bytes is not None and self._size_bytes <= self.max_bytes and not stale:
+                return []
+            objects = self._scan_objects()
+            total = sum(size for _, size, _ in objects)
+            self._size_bytes, self._scanned_at = total, time.monotonic()
+            if total <= self.max_bytes:
+                return []
+
+            refs = self._referenced()
+            referenced = set(refs.values())
+            # Unreferenced objects first, then oldest access first
+            objects.sort(key=lambda o: (o[2] in referenced, o[0]))
+            evicted = []
+            for _, size, digest in objects:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.unlink(self._object_path(digest))
+                except FileNotFoundError:
+                    pass
+                total -= size
+                evicted.append(digest)
+            self._size_bytes = total
+
+            gone = set(evicted)
+            for name, digest in refs.items():
+                if digest in gone:
+                    try:
+                        os.unlink(os.path.join(self._refs, name))
+                    except FileNotFoundError:
+                        pass
+            return evicted
+
+    def stats(self) -> dict:
+        objects = self._scan_objects()
+        return {
+            "backend": "local",
+            "root": os.path.abspath(self.root),
+            "objects": len(objects),
+            "refs": len(self._ref_names()),
+            "size_bytes": sum(size for _, size, _ in objects),
+            "max_bytes": self.max_bytes,
+        }
+
+
+# Backend name -> class; shared-volume deployments use "local" with a mounted ARTIFACT_DIR
+ARTIFACT_BACKENDS = {"local": LocalArtifactStore}
+
+
+def create_artifact_store(backend: str = ARTIFACT_BACKEND, **options) -> ArtifactStore:
+    if backend not in ARTIFACT_BACKENDS:
+        raise ValueError(f"Unknown artifact backend {backend!r}; expected one of {list(ARTIFACT_BACKENDS)}")
+    return ARTIFACT_BACKENDS[backend](**options)
+
+
+artifact_store = create_artifact_store()
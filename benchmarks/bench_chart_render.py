@@ -0,0 +1,50 @@
+"""KPI chart render time and PNG size per rendering mode.
+
+The per-sample scatter ("full", the original chart) is only rendered up to
+FULL_MAX_ROWS; beyond that it takes minutes.
+
+Usage: python -m benchmarks.bench_chart_render [rows ...]
+       python -m benchmarks.bench_chart_render 10000 1000000
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from charts import save_kpi_chart
+
+FULL_MAX_ROWS = 200_000
+
+
+def make_chart_frame(n: int) -> pd.DataFrame:
+    """Daily-cycle KPIs with noise and ~2% anomalies"""
+    rng = np.random.default_rng(0)
+    cycle = np.sin(np.linspace(0, 2 * np.pi * max(n // 1440, 1), n))
+    return pd.DataFrame(
+        {
+            "PRB_Util": np.clip(55 + 25 * cycle + rng.normal(0, 5, n), 0, 100),
+            "RRC_Conn": np.clip(250 + 120 * cycle + rng.normal(0, 20, n), 0, None),
+            "Throughput_Mbps": np.clip(70 - 30 * cycle + rng.normal(0, 6, n), 1, None),
+            "BLER": np.clip(0.02 + 0.01 * cycle + rng.normal(0, 0.004, n), 0, 1),
+            "anomaly": np.where(rng.random(n) < 0.02, -1, 1),
+        }
+    )
+
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            df = make_chart_frame(n)
+            for mode in ("full", "lttb", "density"):
+                if mode == "full" and n > FULL_MAX_ROWS:
+                    print(f"rows={n:>10,} mode={mode:<8} skipped")
+                    continue
+                path = os.path.join(tmp, f"chart_{mode}_{n}.png")
+                start = time.perf_counter()
+                save_kpi_chart(df, path, mode=mode)
+                elapsed = time.perf_counter() - start
+                print(f"rows={n:>10,} mode={mode:<8} render={elapsed:7.2f}s png={os.path.getsize(path) / 1024:8.0f}KB")
@@ -0,0 +1,148 @@
+"""Concurrent small writes plus readers: default SQLite engine versus WAL + storage.writer.
+
+Each writer thread inserts single SummaryCache rows (the shape of summary,
+stats and log-batch writes) while reader threads count them and one thread
+persists a large score chunk. "default" is the previous setup: a plain
+engine, one transaction per write on the calling thread and the chunk in a
+single transaction. "tuned" uses create_storage_engine (WAL,
+synchronous=NORMAL, mmap, cache), routes writes through a WriteQueue and
+persists the chunk with bulk_insert_scores.
+
+Usage: python -m benchmarks.bench_concurrent_writes [writers ...]
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import func, insert, select
+from sqlalchemy.exc import OperationalError
+from sqlmodel import SQLModel, create_engine
+
+import storage
+from storage import Score, SummaryCache, WriteQueue, bulk_insert_scores, create_storage_engine
+
+WRITES_PER_THREAD = 200
+READERS = 4
+# Pause between a reader's queries, standing in for the rest of a request
+READ_PAUSE_SECONDS = 0.002
+# Rows of the concurrent bulk score write; long enough to outlast SQLite's 5s busy timeout
+BULK_ROWS = 600_000
+# Upload of the bulk chunk; writer threads use their own index, so their rows survive its cache invalidation
+BULK_UPLOAD_ID = 1_000_000
+DURATION_LIMIT_SECONDS = 120
+
+
+def _row(thread: int, i: int) -> dict:
+    return {
+        "cache_key": f"bench:{thread}:{i}",
+        "kind": "bench",
+        "model": "bench",
+        "prompt_hash": "-",
+        "upload_id": thread,
+        "payload": "x" * 200,
+        "created_at": datetime.utcnow(),
+    }
+
+
+def run(config: str, writers: int) -> None:
+    table = SummaryCache.__table__
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        if config == "default":
+            engine = create_engine(url)
+            queue = None
+        else:
+            engine = create_storage_engine(url)
+            queue = WriteQueue()
+            storage.writer = queue
+        storage.engine = engine
+        SQLModel.metadata.create_all(engine)
+
+        errors = []
+        latencies = []
+        reads = [0]
+        done = threading.Event()
+
+        def write(thread: int):
+            for i in range(WRITES_PER_THREAD):
+                stmt = insert(table).values(**_row(thread, i))
+                started = time.perf_counter()
+                try:
+                    if queue is None:
+                        with engine.begin() as conn:
+                            conn.execute(stmt)
+                    else:
+                        queue.run(lambda conn: conn.execute(stmt))
+                except OperationalError as e:
+                    errors.append(str(e.orig))
+                latencies.append(time.perf_counter() - started)
+
+        def bulk_write():
+            try:
+                if queue is None:
+                    rows = [
+                        {"upload_id": BULK_UPLOAD_ID, "cell_id": f"C{i % 500}", "ts": "2024-01-01 00:00:00", "anomaly": 1, "score": 0.0}
+                        for i in range(BULK_ROWS)
+                    ]
+                    with engine.begin() as conn:
+                        conn.execute(insert(Score.__table__), rows)
+                else:
+                    df = pd.DataFrame(
+                        {
+                            "cell_id": [f"C{i % 500}" for i in range(BULK_ROWS)],
+                            "timestamp": "2024-01-01 00:00:00",
+                            "anomaly": 1,
+                            "score": 0.0,
+                        }
+                    )
+                    bulk_insert_scores(BULK_UPLOAD_ID, df)
+            except OperationalError as e:
+                errors.append(str(e.orig))
+
+        def read():
+            while not done.is_set():
+                with engine.connect() as conn:
+                    conn.execute(select(func.count()).select_from(table)).scalar_one()
+                reads[0] += 1
+                time.sleep(READ_PAUSE_SECONDS)
+
+        readers = [threading.Thread(target=read) for _ in range(READERS)]
+        bulk = threading.Thread(target=bulk_write)
+        threads = [threading.Thread(target=write, args=(t,)) for t in range(writers)]
+        start = time.perf_counter()
+        for t in readers + [bulk] + threads:
+            t.start()
+        for t in threads:
+            t.join(DURATION_LIMIT_SECONDS)
+        elapsed = time.perf_counter() - start
+        bulk.join(DURATION_LIMIT_SECONDS)
+        bulk_elapsed = time.perf_counter() - start
+        done.set()
+        for t in readers:
+            t.join()
+
+        with engine.connect() as conn:
+            written = conn.execute(select(func.count()).select_from(table)).scalar_one()
+        commits = queue.stats()["commits"] if queue else written
+        if queue:
+            queue.close()
+        engine.dispose()
+
+    print(
+        f"{config:>8} writers={writers:>3} written={written:>6,} time={elapsed:7.2f}s bulk={bulk_elapsed:6.2f}s "
+        f"writes/s={written / elapsed:9,.0f} reads/s={reads[0] / elapsed:9,.0f} "
+        f"commits={commits:>6,} locked_errors={len(errors):>5,} "
+        f"write_p99={np.percentile(latencies, 99):6.3f}s write_max={max(latencies):6.3f}s"
+    )
+
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or [4, 16]
+    for n in sizes:
+        for config in ("default", "tuned"):
+            run(config, n)
@@ -0,0 +1,62 @@
+"""Anomaly/log-event correlation: nested loop versus correlate_frames.
+
+Each size is used for both sides (anomalies and log events spread over one
+day). The nested loop is only timed up to LEGACY_MAX_ROWS per side.
+
+Usage: python -m benchmarks.bench_correlation [rows ...]
+       python -m benchmarks.bench_correlation 1000 10000 1000000
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from correlation import correlate_frames
+
+LEGACY_MAX_ROWS = 2_000
+WINDOW_SECONDS = 60
+
+
+def make_frames(n: int) -> tuple[pd.DataFrame, pd.DataFrame]:
+    rng = np.random.default_rng(0)
+    start = pd.Timestamp("2024-01-01")
+    anomaly_ts = start + pd.to_timedelta(np.sort(rng.integers(0, 86_400, n)), unit="s")
+    event_ts = start + pd.to_timedelta(np.sort(rng.integers(0, 86_400, n)), unit="s")
+    anomalies = pd.DataFrame({"ts": anomaly_ts, "score": rng.normal(size=n)})
+    events = pd.DataFrame({"event_id": np.arange(n), "event_ts": event_ts})
+    return anomalies, events
+
+
+def nested_loop(anomalies: pd.DataFrame, events: pd.DataFrame) -> int:
+    """Nearest event within the window by scanning every event per anomaly"""
+    window = pd.Timedelta(seconds=WINDOW_SECONDS)
+    matched = 0
+    event_times = list(events["event_ts"])
+    for ts in anomalies["ts"]:
+        best = None
+        for event_ts in event_times:
+            gap = abs(event_ts - ts)
+            if gap <= window and (best is None or gap < best):
+                best = gap
+        matched += best is not None
+    return matched
+
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or [1_000, 100_000, 1_000_000]
+    for n in sizes:
+        anomalies, events = make_frames(n)
+
+        start = time.perf_counter()
+        matched = correlate_frames(anomalies, events, WINDOW_SECONDS)
+        fast = time.perf_counter() - start
+        correlated = int(matched["event_id"].notna().sum())
+
+        legacy = "skipped"
+        if n <= LEGACY_MAX_ROWS:
+            start = time.perf_counter()
+            assert nested_loop(anomalies, events) == correlated
+            legacy = f"{time.perf_counter() - start:8.2f}s"
+
+        print(f"rows={n:>10,} correlated={correlated:>10,} merge_asof={fast:8.3f}s nested_loop={legacy}")
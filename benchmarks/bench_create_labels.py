@@ -0,0 +1,63 @@
+"""Throughput of the row-by-row iterrows labelling versus encode_labels.
+
+The iterrows path is only timed up to LEGACY_MAX_ROWS; beyond that it takes
+minutes and only the vectorized engine is reported.
+
+Usage: python -m benchmarks.bench_create_labels [rows ...]
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from random_forest_model import encode_labels
+
+LEGACY_MAX_ROWS = 100_000
+
+
+def legacy_create_labels(df):
+    """The original create_labels: one Python branch per row"""
+    labels = []
+    for _, row in df.iterrows():
+        prb_util = row.get('PRB_Util', 0)
+        throughput = row.get('Throughput_Mbps', 0)
+        bler = row.get('BLER', 0)
+        if prb_util > 90 or throughput < 20 or bler > 0.05:
+            status = 'CRITICAL'
+        elif prb_util > 80 or throughput < 40 or bler > 0.02:
+            status = 'WARNING'
+        else:
+            status = 'NORMAL'
+        labels.append(status)
+    return labels
+
+
+def make_kpi_frame(n: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(
+        {
+            "PRB_Util": rng.uniform(0, 100, n),
+            "RRC_Conn": rng.uniform(0, 300, n),
+            "Throughput_Mbps": rng.uniform(0, 100, n),
+            "BLER": rng.uniform(0, 0.1, n),
+        }
+    )
+
+
+def timed(fn, df) -> float:
+    start = time.perf_counter()
+    fn(df)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or [10_000, 100_000, 1_000_000, 10_000_000]
+    for n in sizes:
+        df = make_kpi_frame(n)
+        vectorized = timed(encode_labels, df)
+        line = f"rows={n:>11,} vectorized={vectorized:8.3f}s ({n / vectorized:14,.0f} rows/s)"
+        if n <= LEGACY_MAX_ROWS:
+            legacy = timed(legacy_create_labels, df)
+            line += f" iterrows={legacy:8.3f}s ({n / legacy:10,.0f} rows/s) speedup={legacy / vectorized:8.0f}x"
+        print(line)
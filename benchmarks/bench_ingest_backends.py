@@ -0,0 +1,64 @@
+"""Score ingest throughput of storage.bulk_insert_scores on SQLite versus PostgreSQL.
+
+SQLite uses executemany batches through the single writer thread;
+PostgreSQL streams batches with COPY FROM STDIN on pooled connections.
+Each backend loads one upload of `rows` rows, then UPLOADS uploads of the
+same size from concurrent threads, as parallel /upload requests would.
+PostgreSQL runs only when BENCH_POSTGRES_URL points at a scratch database
+(its tables are dropped and recreated).
+
+Usage: BENCH_POSTGRES_URL=postgresql+psycopg2://... python -m benchmarks.bench_ingest_backends [rows ...]
+"""
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlmodel import SQLModel
+
+import storage
+from benchmarks.bench_score_insert import make_scored_frame
+from storage import WriteQueue, bulk_insert_scores, create_storage_engine
+
+# Concurrent uploads in the second round
+UPLOADS = 4
+
+
+def run(backend: str, url: str, n: int) -> None:
+    df = make_scored_frame(n)
+    storage.engine = create_storage_engine(url)
+    storage.writer = WriteQueue()
+    SQLModel.metadata.drop_all(storage.engine)
+    SQLModel.metadata.create_all(storage.engine)
+    try:
+        start = time.perf_counter()
+        bulk_insert_scores(1, df)
+        single = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=UPLOADS) as pool:
+            list(pool.map(lambda upload_id: bulk_insert_scores(upload_id, df), range(2, UPLOADS + 2)))
+        concurrent = time.perf_counter() - start
+    finally:
+        storage.writer.close()
+        if backend != "sqlite":
+            SQLModel.metadata.drop_all(storage.engine)
+        storage.engine.dispose()
+
+    print(
+        f"{backend:>10} rows={n:>9,} single={single:7.2f}s rate={n / single:10,.0f} rows/s "
+        f"concurrent x{UPLOADS}={concurrent:7.2f}s rate={n * UPLOADS / concurrent:10,.0f} rows/s"
+    )
+
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or [100_000, 1_000_000]
+    postgres_url = os.getenv("BENCH_POSTGRES_URL")
+    if not postgres_url:
+        print("BENCH_POSTGRES_URL not set; running SQLite only")
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            run("sqlite", f"sqlite:///{os.path.join(tmp, 'bench.db')}", n)
+        if postgres_url:
+            run("postgresql", postgres_url, n)
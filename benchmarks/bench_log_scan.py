@@ -0,0 +1,107 @@
+"""Log incident extraction: the old multi-pass regex path versus LogScanner.
+
+Writes a synthetic syslog of the requested size (MB) to a temp file, then
+times the old path (read whole file, four findall passes in
+extract_incidents, four more in summarize_logs, finditer + sort in the
+heuristic) against streamed scan_log_file passes. "incidents" produces
+the old outputs only (parse_lines=False). "lines" also tokenizes every
+line into (timestamp, level, message) for severity buckets and the
+timestamp span. "full" adds template mining, as /logs/summarize does.
+
+Usage: python -m benchmarks.bench_log_scan [size_mb ...]
+       python -m benchmarks.bench_log_scan 1024
+"""
+import os
+import re
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from log_scanner import scan_log_file
+
+MESSAGES = [
+    "INFO System backup completed successfully",
+    "INFO User session started for operator",
+    "WARN High memory usage detected: 85%",
+    "ERROR Connection timeout to database server",
+    "CRIT System failure: Network interface down",
+    "ALARM CPU usage exceeded threshold: 95%",
+    "DEBUG Polling cell KPI counters",
+]
+WEIGHTS = [0.55, 0.2, 0.1, 0.08, 0.02, 0.02, 0.03]
+
+
+def write_syslog(path: str, size_mb: int) -> int:
+    rng = np.random.default_rng(0)
+    target = size_mb * 1024 * 1024
+    written = lines = 0
+    with open(path, "w") as f:
+        while written < target:
+            picks = rng.choice(len(MESSAGES), 100_000, p=WEIGHTS)
+            block = "".join(
+                f"2024-01-01 {(lines + i) // 3600 % 24:02d}:{(lines + i) // 60 % 60:02d}:{(lines + i) % 60:02d} "
+                f"{MESSAGES[p]} cell={(lines + i) % 997}\n"
+                for i, p in enumerate(picks)
+            )
+            f.write(block)
+            written += len(block)
+            lines += len(picks)
+    return lines
+
+
+def legacy_extract(path: str) -> dict:
+    with open(path) as f:
+        text = f.read()
+    patterns = {
+        "critical_errors": re.findall(r"CRIT.*", text),
+        "errors": re.findall(r"ERROR.*", text),
+        "alarms": re.findall(r"ALARM.*", text),
+        "warnings": re.findall(r"WARN.*", text),
+    }
+    counts = {
+        "critical_errors": len(re.findall(r"CRIT.*", text)),
+        "errors": len(re.findall(r"ERROR.*", text)),
+        "alarms": len(re.findall(r"ALARM.*", text)),
+        "warnings": len(re.findall(r"WARN.*", text)),
+    }
+    top = sorted(
+        ((m.group(0), len(m.group(0))) for m in re.finditer(r"(ERROR|CRIT|ALARM).+", text)),
+        key=lambda x: -x[1],
+    )
+    return {k: len(v) for k, v in patterns.items()}, counts, len(top)
+
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or [100]
+    for size_mb in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "syslog.log")
+            lines = write_syslog(path, size_mb)
+
+            start = time.perf_counter()
+            legacy_counts, _, _ = legacy_extract(path)
+            legacy = time.perf_counter() - start
+
+            start = time.perf_counter()
+            incidents = scan_log_file(path, mine_templates=False, parse_lines=False)
+            scan_incidents = time.perf_counter() - start
+
+            start = time.perf_counter()
+            parsed = scan_log_file(path, mine_templates=False)
+            scan_lines = time.perf_counter() - start
+
+            start = time.perf_counter()
+            result = scan_log_file(path)
+            scan_full = time.perf_counter() - start
+
+            assert result["incident_counts"] == parsed["incident_counts"] == incidents["incident_counts"] == legacy_counts
+            print(
+                f"size={size_mb:>6}MB lines={lines:>12,} "
+                f"multi-pass={legacy:7.2f}s ({size_mb / legacy:6.1f} MB/s) "
+                f"incidents={scan_incidents:7.2f}s ({size_mb / scan_incidents:6.1f} MB/s) "
+                f"lines={scan_lines:7.2f}s ({size_mb / scan_lines:6.1f} MB/s) "
+                f"full={scan_full:7.2f}s ({size_mb / scan_full:6.1f} MB/s) "
+                f"templates={result['template_count']}"
+            )
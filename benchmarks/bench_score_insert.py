@@ -0,0 +1,72 @@
+"""Rows/sec for the per-row ORM score path versus storage.bulk_insert_scores.
+
+Usage: python -m benchmarks.bench_score_insert [rows ...]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from sqlmodel import SQLModel, Session, create_engine
+
+import storage
+from storage import Score, bulk_insert_scores
+
+
+def make_scored_frame(n: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(
+        {
+            "cell_id": rng.integers(0, 500, n).astype(str),
+            "timestamp": pd.date_range("2024-01-01", periods=n, freq="s"),
+            "PRB_Util": rng.uniform(0, 100, n),
+            "RRC_Conn": rng.uniform(0, 300, n),
+            "Throughput_Mbps": rng.uniform(0, 100, n),
+            "BLER": rng.uniform(0, 0.1, n),
+            "anomaly": rng.choice([-1, 1], n, p=[0.02, 0.98]),
+            "score": rng.normal(0, 0.1, n),
+        }
+    )
+
+
+def orm_insert(upload_id: int, df: pd.DataFrame) -> None:
+    """The original /upload loop: one Score object per row."""
+    with Session(storage.engine) as s:
+        for row in df[["cell_id", "timestamp", "anomaly", "score", "PRB_Util", "RRC_Conn", "Throughput_Mbps", "BLER"]].itertuples(
+            index=False, name=None
+        ):
+            s.add(
+                Score(
+                    upload_id=upload_id,
+                    cell_id=str(row[0]),
+                    ts=str(row[1]),
+                    anomaly=int(row[2]),
+                    score=float(row[3]),
+                    prb_util=float(row[4]),
+                    rrc_conn=float(row[5]),
+                    throughput_mbps=float(row[6]),
+                    bler=float(row[7]),
+                )
+            )
+        s.commit()
+
+
+def run(n: int) -> None:
+    df = make_scored_frame(n)
+    for name, fn in (("orm", orm_insert), ("bulk", bulk_insert_scores)):
+        with tempfile.TemporaryDirectory() as tmp:
+            storage.engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+            SQLModel.metadata.create_all(storage.engine)
+            start = time.perf_counter()
+            fn(1, df)
+            elapsed = time.perf_counter() - start
+            storage.engine.dispose()
+        print(f"{name:>5} rows={n:>9,} time={elapsed:8.2f}s rate={n / elapsed:12,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or [10_000, 100_000]
+    for n in sizes:
+        run(n)
@@ -0,0 +1,70 @@
+"""Score lookup latency by upload_id and (cell_id, ts), with and without indexes.
+
+Both databases grow to each requested size in turn (10,000 rows per upload)
+and the same queries are timed against each. Tens of millions of rows take
+a while to build; pass the sizes explicitly for that run.
+
+Usage: python -m benchmarks.bench_score_lookup [rows ...]
+       python -m benchmarks.bench_score_lookup 1000000 10000000 30000000
+"""
+import os
+import sys
+import tempfile
+import time
+
+from sqlmodel import SQLModel, create_engine
+from sqlalchemy import select, func
+
+import storage
+from storage import Score, bulk_insert_scores
+from benchmarks.bench_score_insert import make_scored_frame
+
+ROWS_PER_UPLOAD = 10_000
+QUERY_REPEATS = 20
+
+
+def time_queries(engine, upload_count: int) -> tuple[float, float]:
+    by_upload = select(func.count()).select_from(Score).where(Score.upload_id == upload_count // 2)
+    by_cell = select(Score.ts, Score.score).where(Score.cell_id == "42", Score.ts >= "2024-01-01 00:10:00").limit(100)
+    timings = []
+    with engine.connect() as conn:
+        for stmt in (by_upload, by_cell):
+            start = time.perf_counter()
+            for _ in range(QUERY_REPEATS):
+                conn.execute(stmt).all()
+            timings.append((time.perf_counter() - start) / QUERY_REPEATS * 1000)
+    return timings[0], timings[1]
+
+
+def main(sizes: list[int]) -> None:
+    frame = make_scored_frame(ROWS_PER_UPLOAD)
+    with tempfile.TemporaryDirectory() as tmp:
+        engines = {}
+        for name in ("no-index", "indexed"):
+            engine = create_engine(f"sqlite:///{os.path.join(tmp, name + '.db')}")
+            SQLModel.metadata.create_all(engine)
+            if name == "no-index":
+                for index in Score.__table__.indexes:
+                    index.drop(engine)
+            engines[name] = engine
+
+        uploads = 0
+        for target in sorted(sizes):
+            while uploads * ROWS_PER_UPLOAD < target:
+                uploads += 1
+                for engine in engines.values():
+                    storage.engine = engine
+                    bulk_insert_scores(uploads, frame)
+            for name, engine in engines.items():
+                upload_ms, cell_ms = time_queries(engine, uploads)
+                print(
+                    f"{name:>8} rows={uploads * ROWS_PER_UPLOAD:>11,} "
+                    f"by_upload={upload_ms:9.3f}ms by_cell_ts={cell_ms:9.3f}ms"
+                )
+
+        for engine in engines.values():
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [100_000, 1_000_000])
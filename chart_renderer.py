@@ -0,0 +1,42 @@
+import os
+import tempfile
+
+from artifact_store import artifact_store
+from charts import save_kpi_chart
+from features import FEATURES
+from render_pool import RenderPool
+from storage import load_upload_frame
+
+# Worker processes rendering charts; matplotlib is CPU-bound and holds the GIL
+CHART_WORKERS = int(os.getenv("CHART_WORKERS", "2"))
+
+# Seconds clients are told to wait before polling a pending chart again
+CHART_RETRY_AFTER_SECONDS = 2
+
+
+def chart_key(upload_id: int) -> str:
+    return f"chart/{upload_id}"
+
+
+def render_upload_chart(upload_id: int) -> dict | None:
+    """Render an upload's chart from its stored scores into the artifact store.
+
+    Runs in a worker process, so it reads everything it needs from the
+    database instead of receiving the frame over IPC. Returns the artifact
+    info, or None when the upload has no scores.
+    """
+    df = load_upload_frame(upload_id, columns=FEATURES + ["anomaly"])
+    if df.empty:
+        return None
+
+    fd, chart_path = tempfile.mkstemp(suffix=".png")
+    os.close(fd)
+    try:
+        mode = save_kpi_chart(df, chart_path)
+        return artifact_store.put_file(chart_key(upload_id), chart_path, "image/png", upload_id=upload_id, chart_mode=mode)
+    finally:
+        os.unlink(chart_path)
+
+
+# Renders keyed by upload id: chart_renderer.submit(upload_id, upload_id)
+chart_renderer = RenderPool(render_upload_chart, CHART_WORKERS)
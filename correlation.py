@@ -0,0 +1,198 @@
+import os
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+
+from log_scanner import SEVERITY_BUCKETS
+from log_store import get_log_upload
+from storage import LogEvent, load_upload_frame
+import storage
+
+# Default half-width of the window around an anomaly in which log events count
+CORRELATION_WINDOW_SECONDS = int(os.getenv("CORRELATION_WINDOW_SECONDS", "300"))
+
+# Log severities considered incidents unless the caller asks for others
+INCIDENT_SEVERITIES = ["critical", "error", "alarm", "warning"]
+
+# merge_asof directions: nearest event either side, last event before, first event after
+CORRELATION_DIRECTIONS = ("nearest", "backward", "forward")
+
+# Matched anomalies returned with their nearest event's message
+CORRELATION_MATCH_LIMIT = 100
+
+
+def _to_datetime(values) -> pd.Series:
+    return pd.to_datetime(values, format="ISO8601", errors="coerce")
+
+
+def load_anomaly_frame(upload_id: int) -> pd.DataFrame:
+    """Anomalous scores of an upload sorted by time (from the upload frame cache)"""
+    df = load_upload_frame(upload_id, columns=["cell_id", "timestamp", "anomaly", "score"])
+    if df.empty:
+        return df
+    anomalies = df[df["anomaly"] == -1]
+    anomalies = anomalies.assign(ts=_to_datetime(anomalies["timestamp"])).dropna(subset=["ts"])
+    return anomalies.sort_values("ts", kind="stable").reset_index(drop=True)
+
+
+def load_event_frame(
+    log_upload_id: int,
+    start: pd.Timestamp | None = None,
+    end: pd.Timestamp | None = None,
+    severities: list[str] | None = None,
+) -> pd.DataFrame:
+    """Timestamped log events in [start, end], sorted by time.
+
+    Only the (log_upload_id, severity, ts) index columns plus id and
+    template_id are read; messages are fetched later for matched events only.
+    """
+    table = LogEvent.__table__
+    query = (
+        select(table.c.id, table.c.ts, table.c.severity, table.c.template_id)
+        .where(table.c.log_upload_id == log_upload_id, table.c.ts.is_not(None))
+        .order_by(table.c.ts, table.c.id)
+    )
+    if start is not None:
+        query = query.where(table.c.ts >= start.strftime("%Y-%m-%d %H:%M:%S"))
+    if end is not None:
+        query = query.where(table.c.ts <= end.strftime("%Y-%m-%d %H:%M:%S"))
+    if severities:
+        query = query.where(table.c.severity.in_(severities))
+
+    with storage.engine.connect() as conn:
+        events = pd.DataFrame(conn.execute(query).all(), columns=["event_id", "event_ts", "severity", "template_id"])
+    events["event_ts"] = _to_datetime(events["event_ts"])
+    return events.dropna(subset=["event_ts"])
+
+
+def correlate_frames(
+    anomalies: pd.DataFrame,
+    events: pd.DataFrame,
+    window_seconds: int = CORRELATION_WINDOW_SECONDS,
+    direction: str = "nearest",
+) -> pd.DataFrame:
+    """Match each anomaly to its nearest log event within the window.
+
+    Both inputs must be sorted by time (`ts` and `event_ts`). The nearest
+    event comes from one merge_asof pass and the number of events inside
+    [ts - window, ts + window] from two binary searches, so the cost is
+    O((n + m) log m) instead of the n * m of a nested loop. Unmatched
+    anomalies keep NaN event columns and events_in_window == 0.
+    """
+    if direction not in CORRELATION_DIRECTIONS:
+        raise ValueError(f"direction must be one of {list(CORRELATION_DIRECTIONS)}")
+    window = pd.Timedelta(seconds=window_seconds)
+
+    matched = pd.merge_asof(
+        anomalies,
+        events,
+        left_on="ts",
+        right_on="event_ts",
+        direction=direction,
+        tolerance=window,
+    )
+    matched["lag_seconds"] = (matched["event_ts"] - matched["ts"]).dt.total_seconds()
+
+    event_times = events["event_ts"].to_numpy()
+    anomaly_times = anomalies["ts"].to_numpy()
+    lo = np.searchsorted(event_times, anomaly_times - window.to_timedelta64(), side="left")
+    hi = np.searchsorted(event_times, anomaly_times + window.to_timedelta64(), side="right")
+    matched["events_in_window"] = hi - lo
+    return matched
+
+
+def _event_messages(event_ids: list[int]) -> dict:
+    if not event_ids:
+        return {}
+    table = LogEvent.__table__
+    query = select(table.c.id, table.c.level, table.c.message).where(table.c.id.in_(event_ids))
+    with storage.engine.connect() as conn:
+        return {row.id: (row.level, row.message) for row in conn.execute(query)}
+
+
+def correlate_upload(
+    upload_id: int,
+    log_upload_id: int,
+    window_seconds: int = CORRELATION_WINDOW_SECONDS,
+    direction: str = "nearest",
+    severities: list[str] | None = None,
+    limit: int = CORRELATION_MATCH_LIMIT,
+) -> dict | None:
+    """Correlate a KPI upload's anomalies with a stored log upload's events.
+
+    Returns None when the KPI upload has no scores. `matches` lists the
+    `limit` highest-scoring correlated anomalies (lowest IsolationForest
+    score first) with their nearest event.
+    """
+    severities = severities or INCIDENT_SEVERITIES
+    unknown = [s for s in severities if s not in SEVERITY_BUCKETS]
+    if unknown:
+        raise ValueError(f"Unknown severities {unknown}; expected any of {SEVERITY_BUCKETS}")
+    if window_seconds < 0:
+        raise ValueError("window_seconds must be non-negative")
+
+    scores = load_upload_frame(upload_id, columns=["anomaly"])
+    if scores.empty:
+        return None
+    anomalies = load_anomaly_frame(upload_id)
+
+    window = pd.Timedelta(seconds=window_seconds)
+    if anomalies.empty:
+        events = load_event_frame(log_upload_id, severities=severities).iloc[:0]
+    else:
+        # Only events that can fall inside some anomaly's window are read
+        events = load_event_frame(
+            log_upload_id,
+            start=anomalies["ts"].iloc[0] - window,
+            end=anomalies["ts"].iloc[-1] + window,
+            severities=severities,
+        )
+    matched = correlate_frames(anomalies, events, window_seconds, direction)
+
+    correlated = matched[matched["event_id"].notna()]
+    top = correlated.nsmallest(limit, "score") if limit else correlated.iloc[:0]
+    messages = _event_messages([int(i) for i in top["event_id"]])
+
+    matches = []
+    for row in top.itertuples(index=False):
+        level, message = messages.get(int(row.event_id), (None, None))
+        matches.append(
+            {
+                "cell_id": row.cell_id,
+                "timestamp": row.timestamp,
+                "score": round(float(row.score), 4),
+                "event_id": int(row.event_id),
+                "event_ts": row.event_ts.strftime("%Y-%m-%d %H:%M:%S"),
+                "lag_seconds": float(row.lag_seconds),
+                "severity": row.severity,
+                "level": level,
+                "template_id": None if pd.isna(row.template_id) else int(row.template_id),
+                "message": message,
+                "events_in_window": int(row.events_in_window),
+            }
+        )
+
+    log_upload = get_log_upload(log_upload_id)
+    templates = {t["id"]: t["template"] for t in ((log_upload or {}).get("scan") or {}).get("templates", [])}
+    template_counts = correlated["template_id"].dropna().astype(int).value_counts().head(10)
+
+    total = len(anomalies)
+    return {
+        "upload_id": upload_id,
+        "log_upload_id": log_upload_id,
+        "window_seconds": window_seconds,
+        "direction": direction,
+        "severities": severities,
+        "anomalies": total,
+        "events_considered": len(events),
+        "correlated_anomalies": len(correlated),
+        "correlation_rate": round(len(correlated) / total * 100, 2) if total else 0.0,
+        "by_severity": {k: int(v) for k, v in correlated["severity"].value_counts().items()},
+        "by_template": [
+            {"template_id": int(k), "template": templates.get(int(k)), "anomalies": int(v)}
+            for k, v in template_counts.items()
+        ],
+        "median_lag_seconds": float(correlated["lag_seconds"].median()) if len(correlated) else None,
+        "matches": matches,
+    }
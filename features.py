@@ -1,20 +1,84 @@
+from typing import Iterator
+
+import numpy as np
 import pandas as pd
 
 FEATURES = ["PRB_Util", "RRC_Conn", "Throughput_Mbps", "BLER"]
+REQUIRED_COLUMNS = ["cell_id", "timestamp"] + FEATURES
+
+# Rows per chunk when streaming large KPI exports
+DEFAULT_CHUNK_ROWS = 100_000
+
+# Column dtypes applied at parse time so chunks never need a second conversion pass
+KPI_DTYPES = {"cell_id": str, **{col: "float64" for col in FEATURES}}
+
+
+def _validate_columns(columns) -> None:
+    missing_columns = [col for col in REQUIRED_COLUMNS if col not in columns]
+    if missing_columns:
+        raise ValueError(f"Missing required columns: {missing_columns}")
+
+
+def _clean_chunk(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.dropna(subset=FEATURES)
+    # Timestamps with a UTC offset or "Z" become naive UTC, like stored log events
+    return df.assign(timestamp=pd.to_datetime(df["timestamp"], utc=True).dt.tz_localize(None))
 
 
 def load_kpi_csv(path: str) -> pd.DataFrame:
     df = pd.read_csv(path)
-    
+
     # Validate required columns
-    required_columns = ["cell_id", "timestamp"] + FEATURES
-    missing_columns = [col for col in required_columns if col not in df.columns]
-    if missing_columns:
-        raise ValueError(f"Missing required columns: {missing_columns}")
-    
-    df = df.dropna(subset=FEATURES).copy()
-    df["timestamp"] = pd.to_datetime(df["timestamp"])
-    return df
+    _validate_columns(df.columns)
+
+    return _clean_chunk(df)
+
+
+def iter_kpi_csv(path: str, chunksize: int = DEFAULT_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Stream a KPI CSV as validated, typed chunks of at most `chunksize` rows.
+
+    Only the required columns are parsed, so peak memory is bounded by the
+    chunk size instead of the file size. Row indexes keep counting across
+    chunks, matching what `load_kpi_csv` would return for the whole file.
+    """
+    header = pd.read_csv(path, nrows=0).columns
+    _validate_columns(header)
+
+    reader = pd.read_csv(
+        path,
+        usecols=REQUIRED_COLUMNS,
+        dtype=KPI_DTYPES,
+        chunksize=chunksize,
+    )
+    with reader:
+        for chunk in reader:
+            chunk = _clean_chunk(chunk)
+            if len(chunk):
+                yield chunk
+
+
+def sample_kpi_csv(
+    path: str,
+    max_rows: int = DEFAULT_CHUNK_ROWS,
+    chunksize: int = DEFAULT_CHUNK_ROWS,
+    random_state: int = 42,
+) -> pd.DataFrame:
+    """Uniform random sample of at most `max_rows` rows from a streamed KPI CSV.
+
+    Reservoir-style: every row gets a random key and only the `max_rows`
+    smallest keys are kept, so memory stays flat however large the file is.
+    """
+    rng = np.random.default_rng(random_state)
+    reservoir = None
+    for chunk in iter_kpi_csv(path, chunksize=chunksize):
+        chunk = chunk.assign(_key=rng.random(len(chunk)))
+        if reservoir is not None:
+            chunk = pd.concat([reservoir, chunk])
+        reservoir = chunk.nsmallest(max_rows, "_key")
+
+    if reservoir is None:
+        return pd.DataFrame(columns=REQUIRED_COLUMNS)
+    return reservoir.drop(columns="_key").sort_index()
 
 
 def to_matrix(df: pd.DataFrame) -> pd.DataFrame:
@@ -1,11 +1,6 @@
-from storage import Upload, get_session
+from storage import create_upload
 from pathlib import Path
 
 
 def register_upload(path: str) -> int:
-    with get_session() as s:
-        u = Upload(filename=Path(path).name)
-        s.add(u)
-        s.commit()
-        s.refresh(u)
-        return u.id
+    return create_upload(Path(path).name)
@@ -1,5 +1,7 @@
 from storage import init_db
 
 if __name__ == "__main__":
-    init_db()
+    applied = init_db()
+    for step in applied:
+        print("migrated:", step)
     print("Database initialized successfully")
@@ -0,0 +1,133 @@
+import os
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+
+# Worker threads running background jobs
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+
+# Finished jobs kept in memory for status lookups before the oldest are dropped
+MAX_FINISHED_JOBS = 1000
+
+
+class Job:
+    """State, stage timings and result of one background job"""
+
+    def __init__(self, kind: str, stages=()):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = "queued"
+        self.current_stage = None
+        self.stage_seconds = OrderedDict((name, 0.0) for name in stages)
+        self.entered_stages = set()
+        self.progress = {}
+        self.result = None
+        self.error = None
+        self.created_at = datetime.now()
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a pipeline stage; repeated entries (one per chunk) accumulate"""
+        with self._lock:
+            self.current_stage = name
+            self.entered_stages.add(name)
+            self.stage_seconds.setdefault(name, 0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.stage_seconds[name] += time.perf_counter() - start
+
+    def update(self, **progress):
+        with self._lock:
+            self.progress.update(progress)
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("completed", "failed")
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            stages = []
+            for name, seconds in self.stage_seconds.items():
+                if name == self.current_stage and not self.done:
+                    state = "running"
+                elif name in self.entered_stages:
+                    state = "done"
+                else:
+                    state = "pending"
+                stages.append({"name": name, "status": state, "seconds": round(seconds, 4)})
+
+            elapsed = None
+            if self.started_at:
+                elapsed = ((self.finished_at or datetime.now()) - self.started_at).total_seconds()
+
+            return {
+                "job_id": self.id,
+                "kind": self.kind,
+                "status": self.status,
+                "stage": None if self.done else self.current_stage,
+                "stages": stages,
+                "progress": dict(self.progress),
+                "error": self.error,
+                "created_at": self.created_at.isoformat(),
+                "started_at": self.started_at.isoformat() if self.started_at else None,
+                "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+                "elapsed_seconds": round(elapsed, 4) if elapsed is not None else None,
+            }
+
+
+class JobQueue:
+    """Thread pool that runs jobs off the request path and tracks their state"""
+
+    def __init__(self, workers: int = JOB_WORKERS, max_finished: int = MAX_FINISHED_JOBS):
+        self.max_finished = max_finished
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="netops-job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, fn, *args, stages=(), **kwargs) -> Job:
+        """Queue `fn(job, *args, **kwargs)`; its return value becomes the job result"""
+        job = Job(kind, stages)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def get(self, job_id: str):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job: Job, fn, args, kwargs):
+        job.status = "running"
+        job.started_at = datetime.now()
+        try:
+            job.result = fn(job, *args, **kwargs)
+            job.status = "completed"
+        except Exception as e:
+            traceback.print_exc()
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            job.finished_at = datetime.now()
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in finished[: max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+
+job_queue = JobQueue()
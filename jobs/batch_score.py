@@ -1,6 +1,6 @@
-from features import load_kpi_csv, to_matrix
+from features import iter_kpi_csv, to_matrix
 from model import load_model, score
-from storage import get_session, Score
+from storage import bulk_insert_scores
 import sys
 
 if __name__ == "__main__":
@@ -8,25 +8,15 @@ if __name__ == "__main__":
         print("Usage: python batch_score.py <kpi_csv_file>")
         sys.exit(1)
 
-    df = load_kpi_csv(sys.argv[1])
-    X = to_matrix(df)
     m = load_model()
     if m is None:
         print("model missing. run batch_train first.")
         exit(1)
-    pred, sc = score(m, X)
-    with get_session() as s:
-        for (cell, ts), a, r in zip(
-            df[["cell_id", "timestamp"]].itertuples(index=False, name=None), pred, sc
-        ):
-            s.add(
-                Score(
-                    upload_id=0,
-                    cell_id=str(cell),
-                    ts=str(ts),
-                    anomaly=int(a),
-                    score=float(r),
-                )
-            )
-        s.commit()
-    print("scored:", len(pred))
+
+    total = 0
+    for df in iter_kpi_csv(sys.argv[1]):
+        pred, sc = score(m, to_matrix(df))
+        df["anomaly"] = pred
+        df["score"] = sc
+        total += bulk_insert_scores(0, df)
+    print("scored:", total)
@@ -1,13 +1,17 @@
-from features import load_kpi_csv, to_matrix
+from features import sample_kpi_csv, to_matrix
 from model import train
 import sys
 
+# IsolationForest only looks at 256 rows per tree, so a bounded uniform
+# sample trains as well as the full export without loading it into memory
+MAX_TRAIN_ROWS = 500_000
+
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         print("Usage: python batch_train.py <kpi_csv_file>")
         sys.exit(1)
 
-    df = load_kpi_csv(sys.argv[1])
+    df = sample_kpi_csv(sys.argv[1], max_rows=MAX_TRAIN_ROWS)
     X = to_matrix(df)
     train(X)
     print("trained:", len(X))
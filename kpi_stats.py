@@ -0,0 +1,257 @@
+import json
+import os
+import warnings
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import delete, insert, select
+
+from features import FEATURES
+from storage import UploadStats, iter_upload_frames
+import storage
+
+# Quantiles reported for every KPI and the anomaly score
+STAT_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+# Rows sampled for those quantiles when statistics are folded chunk by chunk
+STAT_SAMPLE_ROWS = int(os.getenv("STAT_SAMPLE_ROWS", "100000"))
+
+# Anomaly rate (%) above which an upload is rated HIGH / MEDIUM severity
+HIGH_ANOMALY_RATE = 10
+MEDIUM_ANOMALY_RATE = 5
+
+
+def anomaly_severity(anomaly_rate: float) -> str:
+    if anomaly_rate > HIGH_ANOMALY_RATE:
+        return "HIGH"
+    if anomaly_rate > MEDIUM_ANOMALY_RATE:
+        return "MEDIUM"
+    return "LOW"
+
+
+def _quantile_name(q: float) -> str:
+    return f"p{round(q * 100):02d}"
+
+
+def _float(value) -> float | None:
+    return None if value is None or np.isnan(value) else float(value)
+
+
+class KpiStatsAccumulator:
+    """Upload-level, per-KPI and per-cell statistics folded one scored chunk at a time.
+
+    Counts, means and variances are merged per chunk (Chan et al.), per-cell
+    figures as grouped sums, so memory is bounded by the number of cells
+    rather than rows. Quantiles come from a uniform bottom-k sample of
+    STAT_SAMPLE_ROWS rows and are exact for uploads no larger than that.
+    Chunks need anomaly and score; KPI columns, cell_id and timestamp are
+    optional but must be the same in every chunk.
+    """
+
+    def __init__(self, sample_rows: int = STAT_SAMPLE_ROWS, seed: int = 0):
+        self.sample_rows = sample_rows
+        self.total = 0
+        self.anomalies = 0
+        self.columns = None
+        self.first_ts = None
+        self.last_ts = None
+        self._rng = np.random.default_rng(seed)
+        self._cells = None
+
+    def add(self, df: pd.DataFrame) -> None:
+        if df.empty:
+            return
+        values = df[self._start(df)].to_numpy(dtype="float64")
+        anomalous = df["anomaly"].to_numpy() == -1
+        self.total += len(df)
+        self.anomalies += int(anomalous.sum())
+
+        valid = ~np.isnan(values)
+        counts = valid.sum(axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"), warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            means = np.nanmean(values, axis=0)
+            m2 = np.nanvar(values, axis=0) * counts
+            mins = np.nanmin(values, axis=0)
+            maxs = np.nanmax(values, axis=0)
+        n = self._count + counts
+        delta = np.where(counts > 0, means - self._mean, 0.0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            weight = np.where(n > 0, counts / n, 0.0)
+            self._m2 = self._m2 + np.where(counts > 0, np.nan_to_num(m2), 0.0) + delta ** 2 * self._count * weight
+            self._mean = self._mean + delta * weight
+        self._count = n
+        self._min = np.fmin(self._min, mins)
+        self._max = np.fmax(self._max, maxs)
+        if self._first is None:
+            self._first = values[0]
+        self._last = values[-1]
+
+        # Bottom-k sampling: keep the rows with the smallest random keys
+        keys = np.concatenate([self._sample_keys, self._rng.random(len(df))])
+        sample = np.concatenate([self._sample, values])
+        if len(keys) > self.sample_rows:
+            keep = np.argpartition(keys, self.sample_rows)[:self.sample_rows]
+            keys, sample = keys[keep], sample[keep]
+        self._sample_keys, self._sample = keys, sample
+
+        if "cell_id" in df.columns:
+            self._add_cells(df, anomalous)
+        if "timestamp" in df.columns:
+            timestamps = df["timestamp"].astype(str)
+            self.first_ts = min(filter(None, [self.first_ts, timestamps.min()]))
+            self.last_ts = max(filter(None, [self.last_ts, timestamps.max()]))
+
+    def _start(self, df: pd.DataFrame) -> list[str]:
+        if self.columns is None:
+            self.columns = [col for col in FEATURES if col in df.columns] + ["score"]
+            width = len(self.columns)
+            self._count = np.zeros(width, dtype="int64")
+            self._mean = np.zeros(width)
+            self._m2 = np.zeros(width)
+            self._min = np.full(width, np.nan)
+            self._max = np.full(width, np.nan)
+            self._first = self._last = None
+            self._sample_keys = np.empty(0)
+            self._sample = np.empty((0, width))
+        return self.columns
+
+    def _add_cells(self, df: pd.DataFrame, anomalous: np.ndarray) -> None:
+        kpis = self.columns[:-1]
+        grouped = df.assign(_anomalous=anomalous).groupby("cell_id", sort=False)
+        cells = grouped.agg(total=("_anomalous", "size"), anomalies=("_anomalous", "sum"), min_score=("score", "min"))
+        cells = cells.join(grouped[kpis].sum().add_suffix("_sum")).join(grouped[kpis].count().add_suffix("_count"))
+        if self._cells is not None:
+            # First appearance order is kept, as in a single groupby over the whole upload
+            merged = pd.concat([self._cells, cells]).groupby(level=0, sort=False)
+            cells = merged.sum().assign(min_score=merged["min_score"].min())
+        self._cells = cells
+
+    def result(self) -> dict:
+        total = self.total
+        anomaly_rate = self.anomalies / total * 100 if total else 0.0
+        column_stats = {}
+        missing = 0
+        if total:
+            missing = int((total - self._count).sum())
+            with np.errstate(invalid="ignore", divide="ignore"), warnings.catch_warnings():
+                warnings.simplefilter("ignore", RuntimeWarning)
+                variances = np.where(self._count > 1, self._m2 / (self._count - 1), np.nan)
+                means = np.where(self._count > 0, self._mean, np.nan)
+                quantiles = np.nanquantile(self._sample, STAT_QUANTILES, axis=0)
+            for i, col in enumerate(self.columns):
+                column_stats[col] = {
+                    "count": int(self._count[i]),
+                    "mean": _float(means[i]),
+                    "std": _float(np.sqrt(variances[i])),
+                    "var": _float(variances[i]),
+                    "min": _float(self._min[i]),
+                    "max": _float(self._max[i]),
+                    "first": _float(self._first[i]),
+                    "last": _float(self._last[i]),
+                    "quantiles": {_quantile_name(q): _float(quantiles[j, i]) for j, q in enumerate(STAT_QUANTILES)},
+                }
+
+        per_cell = []
+        if self._cells is not None:
+            cells = self._cells.sort_values(["anomalies", "min_score"], ascending=[False, True], kind="stable")
+            for cell_id, row in cells.iterrows():
+                per_cell.append(
+                    {
+                        "cell_id": str(cell_id),
+                        "total": int(row["total"]),
+                        "anomalies": int(row["anomalies"]),
+                        "anomaly_rate": round(row["anomalies"] / row["total"] * 100, 4),
+                        "min_score": _float(row["min_score"]),
+                        "mean": {
+                            col: _float(row[f"{col}_sum"] / row[f"{col}_count"]) if row[f"{col}_count"] else None
+                            for col in self.columns[:-1]
+                        },
+                    }
+                )
+
+        return {
+            "total": total,
+            "anomalies": self.anomalies,
+            "normal": total - self.anomalies,
+            "anomaly_rate": round(anomaly_rate, 4),
+            "severity": anomaly_severity(anomaly_rate),
+            "missing_values": missing,
+            "first_ts": self.first_ts,
+            "last_ts": self.last_ts,
+            "cells": len(per_cell),
+            "columns": column_stats,
+            "per_cell": per_cell,
+        }
+
+
+def compute_kpi_stats(df: pd.DataFrame) -> dict:
+    """Upload-level, per-KPI and per-cell statistics of a scored KPI frame.
+
+    Works on any subset of the KPI columns; `df` needs anomaly and score,
+    cell_id and timestamp are optional. See KpiStatsAccumulator for
+    uploads processed in chunks.
+    """
+    stats = KpiStatsAccumulator(sample_rows=max(len(df), 1))
+    stats.add(df)
+    return stats.result()
+
+
+def store_upload_stats(upload_id: int, stats: dict) -> None:
+    table = UploadStats.__table__
+    payload = json.dumps(stats)
+
+    def write(conn):
+        conn.execute(delete(table).where(table.c.upload_id == upload_id))
+        conn.execute(insert(table).values(upload_id=upload_id, computed_at=datetime.utcnow(), stats=payload))
+
+    storage.writer.run(write)
+
+
+def finish_upload_stats(upload_id: int, stats: KpiStatsAccumulator) -> dict:
+    """Persist the folded statistics of an upload and return them.
+
+    Totals, time span and cell count are copied from the upload's
+    UploadSummary, which is written in the same transactions as the scores,
+    so /stats and /report always agree on them. The anomaly rate keeps
+    four decimals here; /report rounds it to two.
+    """
+    result = stats.result()
+    summary = storage.get_upload_summary(upload_id)
+    if summary is not None and summary["total"]:
+        anomaly_rate = summary["anomalies"] / summary["total"] * 100
+        result.update(
+            total=summary["total"],
+            anomalies=summary["anomalies"],
+            normal=summary["total"] - summary["anomalies"],
+            anomaly_rate=round(anomaly_rate, 4),
+            severity=anomaly_severity(anomaly_rate),
+            first_ts=summary["first_ts"],
+            last_ts=summary["last_ts"],
+            cells=summary["cells"],
+        )
+    store_upload_stats(upload_id, result)
+    return result
+
+
+def refresh_upload_stats(upload_id: int) -> dict | None:
+    """Compute and persist an upload's statistics from its stored scores; None if it has none.
+
+    Reads the scores in chunks, so memory does not grow with the upload.
+    """
+    stats = KpiStatsAccumulator()
+    for chunk in iter_upload_frames(upload_id):
+        stats.add(chunk)
+    if not stats.total:
+        return None
+    return finish_upload_stats(upload_id, stats)
+
+
+def get_upload_stats(upload_id: int) -> dict | None:
+    """Persisted statistics of an upload, computed on first use for uploads ingested before they existed"""
+    table = UploadStats.__table__
+    with storage.engine.connect() as conn:
+        payload = conn.execute(select(table.c.stats).where(table.c.upload_id == upload_id)).scalar_one_or_none()
+    if payload is not None:
+        return json.loads(payload)
+    return refresh_upload_stats(upload_id)
@@ -0,0 +1,372 @@
+import gzip
+import io
+import re
+from collections import Counter
+from operator import itemgetter
+from datetime import datetime, timedelta
+
+import zstandard
+
+from log_templates import TemplateMiner
+
+# Incident category -> keyword; a line counts once per keyword it contains,
+# matching the old re.findall(r"<KEYWORD>.*") passes
+INCIDENT_KEYWORDS = {
+    "critical_errors": "CRIT",
+    "errors": "ERROR",
+    "alarms": "ALARM",
+    "warnings": "WARN",
+}
+
+# Keywords the heuristic summary flags
+HEURISTIC_KEYWORDS = ("ERROR", "CRIT", "ALARM")
+
+# Example lines kept per incident category
+TOP_INCIDENTS_PER_CATEGORY = 100
+
+# Leading characters of the log kept for LLM prompts
+HEAD_CHARS = 1000
+
+# Most frequent templates included in a scan result
+TEMPLATES_IN_RESULT = 50
+
+# Parsed lines handed to an event sink per call
+EVENT_BATCH_SIZE = 10_000
+
+# Magic bytes of the compressed formats accepted for log uploads
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# Codec error handlers accepted for decoding uploaded logs; anything other
+# than "strict" tolerates undecodable bytes instead of failing the upload
+DECODE_ERRORS = ("strict", "replace", "ignore", "backslashreplace")
+
+# Level token -> severity bucket
+SEVERITY_LEVELS = {
+    "EMERG": "critical",
+    "ALERT": "critical",
+    "FATAL": "critical",
+    "CRIT": "critical",
+    "CRITICAL": "critical",
+    "ERR": "error",
+    "ERROR": "error",
+    "ALARM": "alarm",
+    "WARN": "warning",
+    "WARNING": "warning",
+    "NOTICE": "info",
+    "INFO": "info",
+    "DEBUG": "debug",
+    "TRACE": "debug",
+}
+SEVERITY_BUCKETS = ["critical", "error", "alarm", "warning", "info", "debug", "unknown"]
+
+# Characters of a log stream read and scanned per block
+SCAN_BLOCK_CHARS = 1 << 20
+
+# Line grammar: optional ISO ("2024-01-01 10:00:00", "2024-01-01T10:00:00.123Z")
+# or BSD syslog ("Jan  1 10:00:00") timestamp, an optional known level
+# token, then the message; unknown level tokens stay in the message
+_TIMESTAMP = (
+    r"\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?"
+    r"|[A-Z][a-z]{2} [ \d]\d \d{2}:\d{2}:\d{2}"
+)
+_LEVEL = (
+    r"[ \t]*(?:<\d+>)?(?:\[?(?P<level>"
+    + "|".join(sorted(SEVERITY_LEVELS, key=len, reverse=True))
+    + r")\]?:?(?=[ \t\n]|$))?[ \t]*"
+)
+_LINE_RE = re.compile(f"(?P<ts>{_TIMESTAMP})?{_LEVEL}(?P<message>[^\n]*)")
+
+# The same grammar over a block prefixed with "\n"; the literal "\n" lets
+# the regex engine jump from line to line. findall yields one
+# (ts, level, message) tuple per line in a single pass, or just the level
+# when no line is mined or stored (no tuples or messages to allocate);
+# search then finds the first line that starts with a timestamp.
+_BLOCK_LINES_RE = re.compile("\n" + _LINE_RE.pattern)
+_BLOCK_LEVELS_RE = re.compile(f"\n(?:{_TIMESTAMP})?{_LEVEL}")
+_BLOCK_TIMESTAMP_RE = re.compile(f"\n(?P<ts>{_TIMESTAMP})")
+
+# Per-category incident lines, as the old re.findall(r"<KEYWORD>.*") passes;
+# each pattern starts with a literal, so the search runs at C speed
+_INCIDENT_RES = {category: re.compile(keyword + ".*") for category, keyword in INCIDENT_KEYWORDS.items()}
+
+
+def parse_line(line: str):
+    """Split one log line into (timestamp, level, message).
+
+    timestamp is the raw string or None; level is the upper-case token when
+    it is a known severity, otherwise None and the token stays in message.
+    """
+    return _LINE_RE.match(line).group("ts", "level", "message")
+
+
+class LogScanner:
+    """Block-wise log tokenizer producing incident counts, top incidents and severity buckets.
+
+    Feed it text (or lines) incrementally. Incident counts, example lines
+    and the flagged-line count come from the old per-keyword
+    re.findall(r"<KEYWORD>.*") patterns, run once per block; each starts
+    with a literal, so the regex engine skips non-matching text at C speed.
+    Lines are tokenized into (timestamp, level, message) by one findall pass
+    per block, which also yields the severity buckets and the timestamp
+    span; only template mining and the event sink visit lines one by one.
+    Nothing but the aggregates and a bounded set of example lines is kept,
+    so it works on files of any size.
+
+    With `parse_lines=False` (and neither template mining nor an event
+    sink) the tokenizer pass is skipped: only the incident aggregates and
+    the line count are produced, and severity_buckets is None.
+
+    With an `event_sink`, every parsed line is also passed on as a
+    (line_no, timestamp, level, message, template_id) tuple, in batches of
+    EVENT_BATCH_SIZE; call `flush` after the last feed.
+    """
+
+    def __init__(
+        self,
+        top_per_category: int = TOP_INCIDENTS_PER_CATEGORY,
+        mine_templates: bool = True,
+        event_sink=None,
+        parse_lines: bool = True,
+    ):
+        self.top_per_category = top_per_category
+        self.miner = TemplateMiner() if mine_templates else None
+        self.event_sink = event_sink
+        self.parse_lines = parse_lines or self.miner is not None or event_sink is not None
+        self._events = []
+        self.total_lines = 0
+        self.incident_counts = dict.fromkeys(INCIDENT_KEYWORDS, 0)
+        self.top_incidents = {category: [] for category in INCIDENT_KEYWORDS}
+        self.severity = Counter()
+        self.flagged_lines = 0
+        self.first_timestamp = None
+        self.last_timestamp = None
+        self._head = []
+        self._head_chars = 0
+
+    def feed_line(self, line: str):
+        self.feed_lines((line,))
+
+    def feed_lines(self, lines):
+        """Scan an iterable of lines (trailing newlines are ignored)"""
+        lines = [line.rstrip("\r\n") for line in lines]
+        if lines:
+            self._scan_block("\n".join(lines))
+
+    def feed(self, text: str):
+        """Scan text holding whole lines; "\r\n" and bare "\r" end lines like "\n" """
+        if not text:
+            return
+        if "\r" in text:
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+        self._scan_block(text[:-1] if text.endswith("\n") else text)
+
+    def _scan_block(self, block: str):
+        """Scan newline-separated lines without a trailing newline"""
+        if self._head_chars < HEAD_CHARS:
+            head = block[:HEAD_CHARS - self._head_chars]
+            self._head.append(head)
+            self._head_chars += len(head) + 1
+        self._scan_incidents(block)
+
+        first_line = self.total_lines
+        if not self.parse_lines:
+            self.total_lines += block.count("\n") + 1
+            return
+        per_line = self.miner is not None or self.event_sink is not None
+        if per_line:
+            rows = _BLOCK_LINES_RE.findall("\n" + block)
+            levels = map(itemgetter(1), rows)
+            first = next(filter(None, map(itemgetter(0), rows)), None)
+            last = next(filter(None, map(itemgetter(0), reversed(rows))), None)
+        else:
+            rows = levels = _BLOCK_LEVELS_RE.findall("\n" + block)
+            first, last = self._block_timestamps(block)
+        self.total_lines += len(rows)
+        for level, count in Counter(levels).items():
+            self.severity[SEVERITY_LEVELS.get(level, "unknown")] += count
+        if self.first_timestamp is None:
+            self.first_timestamp = first
+        self.last_timestamp = last or self.last_timestamp
+
+        if not per_line:
+            return
+        # Hot loop: bind everything used per line to locals
+        mine = self.miner.add if self.miner is not None else None
+        sink = self.event_sink
+        events = self._events
+        line_no = first_line
+        for ts, level, message in rows:
+            line_no += 1
+            level = level or None
+            template = mine(message, level) if mine is not None else None
+            if sink is not None:
+                events.append((line_no, ts or None, level, message, template.id if template is not None else None))
+                if len(events) >= EVENT_BATCH_SIZE:
+                    sink(events)
+                    events = self._events = []
+
+    @staticmethod
+    def _block_timestamps(block: str) -> tuple:
+        """First and last timestamp in a block, without parsing the lines in between"""
+        first = _BLOCK_TIMESTAMP_RE.search("\n" + block)
+        if first is None:
+            return None, None
+        # Walk back from the last line; stops at the first match at the latest
+        end = len(block)
+        while True:
+            start = block.rfind("\n", 0, end) + 1
+            ts = parse_line(block[start:end])[0]
+            if ts is not None:
+                return first.group("ts"), ts
+            end = start - 1
+
+    def _scan_incidents(self, block: str):
+        # A line is flagged when a heuristic keyword has at least one character
+        # after it, like the old (ERROR|CRIT|ALARM).+ pass; matches of one line
+        # share their end offset
+        flagged_ends = set()
+        for category, pattern in _INCIDENT_RES.items():
+            keyword = INCIDENT_KEYWORDS[category]
+            examples = self.top_incidents[category]
+            if keyword not in HEURISTIC_KEYWORDS:
+                found = pattern.findall(block)
+                self.incident_counts[category] += len(found)
+                examples.extend(found[:max(self.top_per_category - len(examples), 0)])
+                continue
+            for m in pattern.finditer(block):
+                self.incident_counts[category] += 1
+                start_pos, end_pos = m.span()
+                if len(examples) < self.top_per_category:
+                    examples.append(m.group())
+                if end_pos - start_pos > len(keyword):
+                    flagged_ends.add(end_pos)
+        self.flagged_lines += len(flagged_ends)
+
+    def flush(self):
+        """Hand any buffered events to the sink"""
+        if self.event_sink is not None and self._events:
+            self.event_sink(self._events)
+            self._events = []
+
+    def result(self) -> dict:
+        return {
+            "total_lines": self.total_lines,
+            "incident_counts": dict(self.incident_counts),
+            "top_incidents": {k: list(v) for k, v in self.top_incidents.items()},
+            "severity_buckets": (
+                {bucket: self.severity.get(bucket, 0) for bucket in SEVERITY_BUCKETS} if self.parse_lines else None
+            ),
+            "flagged_lines": self.flagged_lines,
+            "first_timestamp": self.first_timestamp,
+            "last_timestamp": self.last_timestamp,
+            "head": "\n".join(self._head)[:HEAD_CHARS],
+            "templates": self.miner.top(TEMPLATES_IN_RESULT) if self.miner is not None else [],
+            "template_count": len(self.miner.templates) if self.miner is not None else 0,
+            "unclustered_lines": self.miner.unclustered if self.miner is not None else 0,
+        }
+
+
+def normalize_timestamp(ts: str | None, year: int | None = None) -> str | None:
+    """Sortable "YYYY-MM-DD HH:MM:SS" form of a parsed timestamp.
+
+    ISO timestamps with a UTC offset are converted to UTC, so lines from
+    hosts in different zones sort together; those without one are kept as
+    written. BSD syslog timestamps carry no year; `year` (default: current
+    year) fills it in.
+    """
+    if ts is None:
+        return None
+    if ts[4:5] == "-":
+        wall = f"{ts[:10]} {ts[11:19]}"
+        offset = ts[19:].lstrip(".,0123456789")
+        if not offset or offset == "Z":
+            return wall
+        delta = timedelta(hours=int(offset[1:3]), minutes=int(offset[-2:]))
+        utc = datetime.strptime(wall, "%Y-%m-%d %H:%M:%S") + (-delta if offset[0] == "+" else delta)
+        return utc.strftime("%Y-%m-%d %H:%M:%S")
+    try:
+        parsed = datetime.strptime(f"{year or datetime.now().year} {' '.join(ts.split())}", "%Y %b %d %H:%M:%S")
+    except ValueError:
+        return None
+    return parsed.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def scan_log_text(text: str, top_per_category: int = TOP_INCIDENTS_PER_CATEGORY) -> dict:
+    scanner = LogScanner(top_per_category)
+    scanner.feed(text)
+    return scanner.result()
+
+
+def open_log_stream(raw, encoding: str = "utf-8", errors: str = "replace") -> io.TextIOWrapper:
+    """Wrap a binary file object as a text line stream.
+
+    gzip and zstd input is detected from its magic bytes and decompressed on
+    the fly, so callers never hold the whole (decompressed) log in memory.
+    `raw` must be seekable; upload spools and regular files are.
+    """
+    if errors not in DECODE_ERRORS:
+        raise ValueError(f"errors must be one of {list(DECODE_ERRORS)}")
+
+    start = raw.tell()
+    magic = raw.read(len(ZSTD_MAGIC))
+    raw.seek(start)
+    if magic.startswith(GZIP_MAGIC):
+        raw = gzip.GzipFile(fileobj=raw, mode="rb")
+    elif magic == ZSTD_MAGIC:
+        reader = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True, closefd=False)
+        raw = io.BufferedReader(reader)
+    # Universal newlines: "\r\n" and bare "\r" end lines, as in a text-mode open()
+    return io.TextIOWrapper(raw, encoding=encoding, errors=errors)
+
+
+def scan_log_stream(
+    raw,
+    encoding: str = "utf-8",
+    errors: str = "replace",
+    top_per_category: int = TOP_INCIDENTS_PER_CATEGORY,
+    event_sink=None,
+    mine_templates: bool = True,
+    parse_lines: bool = True,
+) -> dict:
+    """Scan a (possibly compressed) binary log stream in blocks of SCAN_BLOCK_CHARS"""
+    scanner = LogScanner(
+        top_per_category, mine_templates=mine_templates, event_sink=event_sink, parse_lines=parse_lines
+    )
+    stream = open_log_stream(raw, encoding=encoding, errors=errors)
+    try:
+        partial = ""
+        while block := stream.read(SCAN_BLOCK_CHARS):
+            # Carry the unfinished last line over to the next block
+            cut = block.rfind("\n") + 1
+            if cut == 0:
+                partial += block
+                continue
+            scanner.feed(partial + block[:cut])
+            partial = block[cut:]
+        scanner.feed(partial)
+        scanner.flush()
+    finally:
+        # Leave the caller's file object open
+        stream.detach()
+    return scanner.result()
+
+
+def scan_log_file(
+    path: str,
+    encoding: str = "utf-8",
+    errors: str = "replace",
+    top_per_category: int = TOP_INCIDENTS_PER_CATEGORY,
+    mine_templates: bool = True,
+    parse_lines: bool = True,
+) -> dict:
+    """Scan a log file block by block without loading it into memory"""
+    with open(path, "rb") as f:
+        return scan_log_stream(
+            f,
+            encoding=encoding,
+            errors=errors,
+            top_per_category=top_per_category,
+            mine_templates=mine_templates,
+            parse_lines=parse_lines,
+        )
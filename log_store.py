@@ -0,0 +1,205 @@
+import json
+from datetime import datetime
+
+from sqlalchemy import and_, delete, func, insert, or_, select, tuple_, update
+
+from log_scanner import SEVERITY_BUCKETS, SEVERITY_LEVELS, normalize_timestamp
+from storage import LogEvent, LogUpload
+import storage
+
+# Events per page on the log event query endpoint
+LOG_EVENTS_PAGE_SIZE = 500
+MAX_LOG_EVENTS_PAGE_SIZE = 5000
+
+# Log uploads per page on the log listing endpoint
+LOG_UPLOADS_PAGE_SIZE = 50
+
+
+def create_log_upload(filename: str) -> int:
+    def write(conn):
+        result = conn.execute(insert(LogUpload.__table__).values(filename=filename, created_at=datetime.utcnow()))
+        return result.inserted_primary_key[0]
+
+    return storage.writer.run(write)
+
+
+class LogEventWriter:
+    """LogScanner event sink that appends each batch of parsed lines to LogEvent.
+
+    Timestamps are normalized so they sort; lines without one (stack traces,
+    continuations) inherit the previous line's, keeping them inside time
+    range queries next to the line they belong to. Batches go through the
+    writer's bulk slot, SCORE_COMMIT_ROWS rows per commit, so small writes
+    are not queued behind a whole batch.
+    """
+
+    def __init__(self, log_upload_id: int, year: int | None = None):
+        self.log_upload_id = log_upload_id
+        self.year = year
+        self.rows_written = 0
+        self._last_ts = None
+
+    def __call__(self, events):
+        levels = SEVERITY_LEVELS
+        rows = []
+        for line_no, ts, level, message, template_id in events:
+            ts = normalize_timestamp(ts, self.year) if ts is not None else None
+            if ts is None:
+                ts = self._last_ts
+            else:
+                self._last_ts = ts
+            rows.append(
+                {
+                    "log_upload_id": self.log_upload_id,
+                    "line_no": line_no,
+                    "ts": ts,
+                    "level": level,
+                    "severity": levels.get(level, "unknown"),
+                    "template_id": template_id,
+                    "message": message,
+                }
+            )
+        size = storage.SCORE_COMMIT_ROWS
+        for start in range(0, len(rows), size):
+            chunk = rows[start:start + size]
+            storage.writer.run(lambda conn: conn.execute(insert(LogEvent.__table__), chunk), bulk=True)
+        self.rows_written += len(rows)
+
+
+def finish_log_upload(log_upload_id: int, scan: dict, summary: str | None = None, year: int | None = None) -> None:
+    """Record scan totals, templates and the summary on the LogUpload row"""
+    stored_scan = {
+        "incident_counts": scan["incident_counts"],
+        "severity_buckets": scan["severity_buckets"],
+        "templates": scan["templates"],
+        "template_count": scan["template_count"],
+    }
+    stmt = (
+        update(LogUpload.__table__)
+        .where(LogUpload.__table__.c.id == log_upload_id)
+        .values(
+            total_lines=scan["total_lines"],
+            first_ts=normalize_timestamp(scan["first_timestamp"], year),
+            last_ts=normalize_timestamp(scan["last_timestamp"], year),
+            summary=summary,
+            scan=json.dumps(stored_scan),
+        )
+    )
+    storage.writer.run(lambda conn: conn.execute(stmt))
+
+
+def delete_log_upload(log_upload_id: int) -> None:
+    """Remove a log upload and its events (used when ingestion fails midway)"""
+    def write(conn):
+        conn.execute(delete(LogEvent.__table__).where(LogEvent.__table__.c.log_upload_id == log_upload_id))
+        conn.execute(delete(LogUpload.__table__).where(LogUpload.__table__.c.id == log_upload_id))
+
+    storage.writer.run(write)
+
+
+def _log_upload_dict(row) -> dict:
+    upload = dict(row._mapping)
+    upload["scan"] = json.loads(upload["scan"]) if upload["scan"] else None
+    return upload
+
+
+def get_log_upload(log_upload_id: int) -> dict | None:
+    table = LogUpload.__table__
+    with storage.engine.connect() as conn:
+        row = conn.execute(select(table).where(table.c.id == log_upload_id)).first()
+    return _log_upload_dict(row) if row is not None else None
+
+
+def list_log_uploads(limit: int = LOG_UPLOADS_PAGE_SIZE) -> list[dict]:
+    """Newest log uploads, without their stored scan"""
+    table = LogUpload.__table__
+    query = (
+        select(table.c.id, table.c.filename, table.c.created_at, table.c.total_lines, table.c.first_ts, table.c.last_ts)
+        .order_by(table.c.id.desc())
+        .limit(max(1, limit))
+    )
+    with storage.engine.connect() as conn:
+        return [dict(row._mapping) for row in conn.execute(query)]
+
+
+def _event_filters(log_upload_id: int, start: str | None, end: str | None, severities: list[str] | None) -> list:
+    table = LogEvent.__table__
+    filters = [table.c.log_upload_id == log_upload_id]
+    if start is not None:
+        filters.append(table.c.ts >= start)
+    if end is not None:
+        filters.append(table.c.ts < end)
+    if severities:
+        unknown = [s for s in severities if s not in SEVERITY_BUCKETS]
+        if unknown:
+            raise ValueError(f"Unknown severities {unknown}; expected any of {SEVERITY_BUCKETS}")
+        filters.append(table.c.severity.in_(severities))
+    return filters
+
+
+def query_log_events(
+    log_upload_id: int,
+    start: str | None = None,
+    end: str | None = None,
+    severities: list[str] | None = None,
+    limit: int = LOG_EVENTS_PAGE_SIZE,
+    cursor: int | None = None,
+) -> tuple[list[dict], int | None]:
+    """Events in [start, end) ordered by time, optionally limited to severity buckets.
+
+    Ordering by (ts, id) follows the (log_upload_id, ts) index, so pages are
+    read straight off it. `cursor` is the id of the last event on the
+    previous page. Returns (events, next_cursor).
+    """
+    table = LogEvent.__table__
+    limit = max(1, min(limit, MAX_LOG_EVENTS_PAGE_SIZE))
+    filters = _event_filters(log_upload_id, start, end, severities)
+
+    with storage.engine.connect() as conn:
+        if cursor is not None:
+            cursor_ts = conn.execute(select(table.c.ts).where(table.c.id == cursor)).scalar_one_or_none()
+            if cursor_ts is None:
+                # Lines before the first timestamp sort first (NULL) and page by id
+                filters.append(or_(table.c.ts.is_not(None), and_(table.c.ts.is_(None), table.c.id > cursor)))
+            else:
+                filters.append(tuple_(table.c.ts, table.c.id) > tuple_(cursor_ts, cursor))
+
+        query = (
+            select(table.c.id, table.c.line_no, table.c.ts, table.c.level, table.c.severity, table.c.template_id, table.c.message)
+            .where(*filters)
+            # Explicit: PostgreSQL sorts NULLs last by default, SQLite first
+            .order_by(table.c.ts.asc().nulls_first(), table.c.id)
+            .limit(limit + 1)
+        )
+        events = [dict(row._mapping) for row in conn.execute(query)]
+
+    has_more = len(events) > limit
+    events = events[:limit]
+    return events, events[-1]["id"] if has_more else None
+
+
+def log_event_histogram(
+    log_upload_id: int,
+    start: str | None = None,
+    end: str | None = None,
+    severities: list[str] | None = None,
+) -> list[dict]:
+    """Per-minute event counts by severity, computed with one GROUP BY over the index"""
+    table = LogEvent.__table__
+    minute = func.substr(table.c.ts, 1, 16)
+    query = (
+        select(minute.label("minute"), table.c.severity, func.count())
+        .where(*_event_filters(log_upload_id, start, end, severities), table.c.ts.is_not(None))
+        .group_by(minute, table.c.severity)
+        .order_by(minute)
+    )
+
+    buckets = {}
+    with storage.engine.connect() as conn:
+        for bucket_minute, severity, count in conn.execute(query):
+            bucket = buckets.get(bucket_minute)
+            if bucket is None:
+                bucket = buckets[bucket_minute] = {"minute": bucket_minute, "total": 0, "by_severity": {}}
+            bucket["by_severity"][severity] = count
+            bucket["total"] += count
+    return list(buckets.values())
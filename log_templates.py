@@ -0,0 +1,158 @@
+import re
+
+# Digit runs, dotted numbers (IPs, versions) and hex literals inside a token
+# are variables; they are masked before clustering so "cell=12" and
+# "cell=907" land in the same template
+_VARIABLE_RE = re.compile(r"0[xX][0-9a-fA-F]+|\d+(?:[.:]\d+)*")
+
+WILDCARD = "<*>"
+
+# Drain parameters: tree depth (length level + DRAIN_DEPTH - 2 token levels),
+# minimum fraction of matching tokens to join a cluster, and fan-out per node
+DRAIN_DEPTH = 4
+DRAIN_SIM_THRESHOLD = 0.4
+DRAIN_MAX_CHILDREN = 100
+
+# Hard cap on clusters; lines that would open a new one beyond it are only counted
+MAX_TEMPLATES = 5000
+
+# Example parameter lists kept per template
+EXAMPLES_PER_TEMPLATE = 3
+
+# Raw and masked messages remembered for the exact-match fast paths
+MATCH_CACHE_SIZE = 100_000
+
+
+def mask_variables(message: str) -> str:
+    return _VARIABLE_RE.sub(WILDCARD, message)
+
+
+class LogTemplate:
+    __slots__ = ("id", "level", "tokens", "count", "examples")
+
+    def __init__(self, template_id: int, level, tokens: list):
+        self.id = template_id
+        self.level = level
+        self.tokens = tokens
+        self.count = 0
+        self.examples = []
+
+    @property
+    def template(self) -> str:
+        return " ".join(self.tokens)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "template": self.template,
+            "level": self.level,
+            "count": self.count,
+            "examples": [list(e) for e in self.examples],
+        }
+
+
+class TemplateMiner:
+    """Online Drain-style log template miner.
+
+    Messages are masked, split into tokens and routed through a fixed-depth
+    tree (level and token count, then the first few tokens) to a small list
+    of candidate templates. The most similar candidate absorbs the message,
+    turning differing tokens into wildcards; otherwise a new template
+    starts. Messages already seen verbatim skip masking, and messages
+    already seen in masked form skip the tree.
+
+    Memory is bounded by MAX_TEMPLATES and MATCH_CACHE_SIZE, not the log size.
+    """
+
+    def __init__(
+        self,
+        depth: int = DRAIN_DEPTH,
+        sim_threshold: float = DRAIN_SIM_THRESHOLD,
+        max_children: int = DRAIN_MAX_CHILDREN,
+        max_templates: int = MAX_TEMPLATES,
+        examples_per_template: int = EXAMPLES_PER_TEMPLATE,
+    ):
+        self.depth = depth
+        self.sim_threshold = sim_threshold
+        self.max_children = max_children
+        self.max_templates = max_templates
+        self.examples_per_template = examples_per_template
+        self.templates = []
+        self.unclustered = 0
+        self._root = {}
+        self._raw_cache = {}
+        self._cache = {}
+
+    def add(self, message: str, level=None) -> LogTemplate | None:
+        """Assign one message to a template and return it (None once the cap is hit)"""
+        raw_key = (level, message)
+        template = self._raw_cache.get(raw_key)
+        if template is None:
+            masked = mask_variables(message)
+            key = (level, masked)
+            template = self._cache.get(key)
+            if template is None:
+                template = self._match_or_create(level, masked.split())
+                if template is None:
+                    self.unclustered += 1
+                    return None
+                if len(self._cache) >= MATCH_CACHE_SIZE:
+                    self._cache.clear()
+                self._cache[key] = template
+            if len(self._raw_cache) >= MATCH_CACHE_SIZE:
+                self._raw_cache.clear()
+            self._raw_cache[raw_key] = template
+
+        template.count += 1
+        if len(template.examples) < self.examples_per_template:
+            params = self._params(template.tokens, message.split())
+            if params and params not in template.examples:
+                template.examples.append(params)
+        return template
+
+    @staticmethod
+    def _params(template_tokens: list, tokens: list) -> tuple:
+        if len(tokens) != len(template_tokens):
+            return ()
+        return tuple(tok for tok, tmpl in zip(tokens, template_tokens) if WILDCARD in tmpl)
+
+    def _leaf(self, level, tokens: list) -> list:
+        node = self._root.setdefault((level, len(tokens)), {})
+        for token in tokens[: self.depth - 2]:
+            if WILDCARD in token:
+                token = WILDCARD
+            child = node.get(token)
+            if child is None:
+                if len(node) >= self.max_children:
+                    token = WILDCARD
+                    child = node.get(token)
+                if child is None:
+                    child = node[token] = {}
+            node = child
+        return node.setdefault(None, [])
+
+    def _match_or_create(self, level, tokens: list) -> LogTemplate | None:
+        candidates = self._leaf(level, tokens)
+
+        best, best_sim = None, -1.0
+        for candidate in candidates:
+            same = sum(1 for a, b in zip(candidate.tokens, tokens) if a == b)
+            sim = same / len(tokens) if tokens else 1.0
+            if sim > best_sim:
+                best, best_sim = candidate, sim
+
+        if best is not None and best_sim >= self.sim_threshold:
+            best.tokens = [a if a == b else WILDCARD for a, b in zip(best.tokens, tokens)]
+            return best
+
+        if len(self.templates) >= self.max_templates:
+            return None
+        template = LogTemplate(len(self.templates) + 1, level, tokens)
+        self.templates.append(template)
+        candidates.append(template)
+        return template
+
+    def top(self, n: int | None = None) -> list:
+        """Templates as dicts, most frequent first"""
+        ranked = sorted(self.templates, key=lambda t: -t.count)
+        return [t.to_dict() for t in ranked[:n]]
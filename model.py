@@ -1,6 +1,6 @@
-import joblib
 from sklearn.ensemble import IsolationForest
 from pandas import DataFrame
+from model_registry import model_registry
 
 MODEL_PATH = "model_isoforest.joblib"
 
@@ -9,17 +9,12 @@ def train(df: DataFrame, contamination: float = 0.02):
     X = df
     m = IsolationForest(n_estimators=200, contamination=contamination, random_state=42)
     m.fit(X)
-    joblib.dump(m, MODEL_PATH)
+    model_registry.save(m, MODEL_PATH)
     return m
 
 
 def load_model():
-    import os
-    import joblib
-
-    if not os.path.exists(MODEL_PATH):
-        return None
-    return joblib.load(MODEL_PATH)
+    return model_registry.get(MODEL_PATH)
 
 
 def score(m, X: DataFrame):
@@ -0,0 +1,191 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from datetime import datetime
+
+import joblib
+
+# mkstemp/mkdtemp create owner-only files; saved artifacts get the usual
+# permissions instead, so other users (a separate worker account) can read them
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+FILE_MODE = 0o666 & ~_UMASK
+DIR_MODE = 0o777 & ~_UMASK
+
+# Name of the pointer file of a model set, and how many versions are kept
+# (older ones may still be loading in another process)
+MODEL_SET_POINTER = "CURRENT.json"
+MODEL_SET_VERSIONS_KEPT = 3
+
+
+def _atomic_write(path: str, write) -> None:
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.chmod(tmp_path, FILE_MODE)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def _write_json(path: str, value) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(value, f)
+
+
+class ModelRegistry:
+    """Process-wide cache of joblib model artifacts.
+
+    Each artifact is deserialized once and reused until the file on disk
+    changes. `get` checks the file's inode, size and mtime on every call
+    (one stat) and reloads only when they differ and the SHA-256 checksum
+    changed too. Artifacts written through `save` are replaced atomically,
+    so readers never see a half-written file and swap to the new model on
+    their next call.
+
+    Models that only work together are saved as a set with `save_set`: each
+    version goes to its own directory and a single pointer file is swapped,
+    so `get_set` never mixes members of two versions.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._pointers = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _signature(st: os.stat_result) -> tuple:
+        return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    @staticmethod
+    def _checksum(path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def get(self, path: str):
+        """Return the model stored at `path`, or None if the file does not exist"""
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            with self._lock:
+                self._entries.pop(path, None)
+            return None
+
+        signature = self._signature(st)
+        entry = self._entries.get(path)
+        if entry is not None and entry["signature"] == signature:
+            return entry["model"]
+
+        with self._lock:
+            # Another thread may have reloaded while we waited for the lock
+            entry = self._entries.get(path)
+            if entry is not None and entry["signature"] == signature:
+                return entry["model"]
+
+            checksum = self._checksum(path)
+            if entry is not None and entry["checksum"] == checksum:
+                entry = dict(entry, signature=signature)
+            else:
+                entry = self._entry(path, joblib.load(path), checksum, signature, st)
+            self._entries[path] = entry
+            return entry["model"]
+
+    def save(self, model, path: str):
+        """Atomically write `model` to `path` and make it the current version"""
+        _atomic_write(path, lambda tmp_path: joblib.dump(model, tmp_path))
+        st = os.stat(path)
+        with self._lock:
+            self._entries[path] = self._entry(path, model, self._checksum(path), self._signature(st), st)
+        return model
+
+    def save_set(self, models: dict, root: str) -> dict:
+        """Write `models` (name -> model) as a new version under `root` and switch to it in one step"""
+        os.makedirs(root, exist_ok=True)
+        version_dir = tempfile.mkdtemp(dir=root, prefix=datetime.utcnow().strftime("v%Y%m%dT%H%M%S%f-"))
+        os.chmod(version_dir, DIR_MODE)
+        version = os.path.basename(version_dir)
+        files = {}
+        for name, model in models.items():
+            files[name] = f"{name}.joblib"
+            self.save(model, os.path.join(version_dir, files[name]))
+        pointer = {"version": version, "files": files, "saved_at": datetime.utcnow().isoformat()}
+        _atomic_write(os.path.join(root, MODEL_SET_POINTER), lambda tmp_path: _write_json(tmp_path, pointer))
+        self._prune_set(root, version)
+        return models
+
+    def _prune_set(self, root: str, current: str) -> None:
+        versions = sorted(
+            (name for name in os.listdir(root) if name.startswith("v") and os.path.isdir(os.path.join(root, name))),
+            reverse=True,
+        )
+        for name in [v for v in versions if v != current][MODEL_SET_VERSIONS_KEPT - 1:]:
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+    def set_paths(self, root: str) -> dict | None:
+        """Member name -> artifact path of the current version of a set, or None if none was saved"""
+        pointer_path = os.path.join(root, MODEL_SET_POINTER)
+        try:
+            signature = self._signature(os.stat(pointer_path))
+        except FileNotFoundError:
+            return None
+        cached = self._pointers.get(root)
+        if cached is None or cached[0] != signature:
+            with open(pointer_path, encoding="utf-8") as f:
+                pointer = json.load(f)
+            paths = {name: os.path.join(root, pointer["version"], file) for name, file in pointer["files"].items()}
+            with self._lock:
+                # Models of the replaced version are not needed any more
+                for path in (cached[1].values() if cached else ()):
+                    self._entries.pop(path, None)
+                cached = self._pointers[root] = (signature, paths)
+        return dict(cached[1])
+
+    def get_set(self, root: str) -> dict | None:
+        """Models of the current version of a set written by save_set, or None if any is missing"""
+        paths = self.set_paths(root)
+        if paths is None:
+            return None
+        models = {name: self.get(path) for name, path in paths.items()}
+        if any(model is None for model in models.values()):
+            return None
+        return models
+
+    def _entry(self, path, model, checksum, signature, st) -> dict:
+        return {
+            "path": path,
+            "model": model,
+            "checksum": checksum,
+            "signature": signature,
+            "version": checksum[:12],
+            "model_type": type(model).__name__,
+            "size_bytes": st.st_size,
+            "modified_at": datetime.fromtimestamp(st.st_mtime).isoformat(),
+            "loaded_at": datetime.now().isoformat(),
+        }
+
+    def info(self, path: str) -> dict | None:
+        """Version and metadata for a loaded artifact (loads it if needed)"""
+        if self.get(path) is None:
+            return None
+        entry = self._entries.get(path)
+        if entry is None:
+            return None
+        return {k: v for k, v in entry.items() if k not in ("model", "signature")}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._pointers.clear()
+
+
+model_registry = ModelRegistry()
@@ -0,0 +1,125 @@
+import asyncio
+import os
+from datetime import datetime
+
+from sqlalchemy import select
+
+from artifact_store import artifact_store
+from correlation import correlate_upload
+from kpi_stats import get_upload_stats
+from pdf_report import cleanup_pdf_file, generate_kpi_pdf_report
+from render_pool import RenderPool
+from storage import SummaryCache, load_upload_frame
+from summarize import agenerate_ai_kpi_summary
+import storage
+import summarize
+
+# Worker processes laying out PDF reports (fpdf is pure Python and CPU-bound)
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", "2"))
+
+# How long a download waits for a report being generated before answering 202
+PDF_WAIT_SECONDS = float(os.getenv("PDF_WAIT_SECONDS", "30"))
+
+# Seconds clients are told to wait before polling a pending report again
+PDF_RETRY_AFTER_SECONDS = 2
+
+# Bump when the report layout changes so cached PDFs are regenerated
+PDF_LAYOUT_VERSION = 2
+
+# While an LLM is configured, a report built with the heuristic fallback
+# summary (LLM timeout or error) is served only this long before the next
+# download retries the LLM
+PDF_FALLBACK_TTL_SECONDS = float(os.getenv("PDF_FALLBACK_TTL_SECONDS", "300"))
+
+
+def pdf_key(upload_id: int, log_upload_id: int | None = None, window_seconds: int | None = None) -> str:
+    if log_upload_id is None:
+        return f"pdf/{upload_id}"
+    return f"pdf/{upload_id}/log/{log_upload_id}/{window_seconds}"
+
+
+def summary_version(upload_id: int) -> str:
+    """Version of the AI summary a report for this upload would contain.
+
+    The newest cached kpi_summary response identifies it; uploads without
+    one get the deterministic heuristic summary. A new or invalidated LLM
+    summary therefore changes the version and retires cached PDFs.
+    """
+    table = SummaryCache.__table__
+    query = (
+        select(table.c.prompt_hash, table.c.created_at)
+        .where(table.c.upload_id == upload_id, table.c.kind == "kpi_summary")
+        .order_by(table.c.created_at.desc())
+        .limit(1)
+    )
+    with storage.engine.connect() as conn:
+        row = conn.execute(query).first()
+    if row is None:
+        return f"{PDF_LAYOUT_VERSION}:fallback"
+    return f"{PDF_LAYOUT_VERSION}:{row.prompt_hash[:16]}:{row.created_at.isoformat()}"
+
+
+def render_pdf_report(
+    upload_id: int,
+    log_upload_id: int | None = None,
+    window_seconds: int | None = None,
+    ai_summary: dict | None = None,
+) -> dict | None:
+    """Build an upload's PDF report into the artifact store.
+
+    Runs in a worker process and reads scores, statistics and the
+    correlation from the database. The server passes in the AI summary,
+    produced on its event loop under its LLM concurrency limit; direct
+    callers may omit it to have it generated here. The artifact records the summary version it was built with and whether that
+    was the heuristic fallback. Returns the artifact info, or None when the
+    upload has no scores.
+    """
+    df = load_upload_frame(upload_id)
+    if df.empty:
+        return None
+    anomalies = df[df["anomaly"] == -1]
+    stats = get_upload_stats(upload_id)
+    if ai_summary is None:
+        ai_summary = asyncio.run(agenerate_ai_kpi_summary(df, anomalies, df["score"], upload_id=upload_id, stats=stats))
+    # Read after the summary call, which may just have cached a new LLM answer
+    version = summary_version(upload_id)
+
+    correlation = None
+    if log_upload_id is not None:
+        correlation = correlate_upload(upload_id, log_upload_id, window_seconds)
+
+    pdf_path = generate_kpi_pdf_report(upload_id, df, anomalies, ai_summary, correlation, stats)
+    try:
+        return artifact_store.put_file(
+            pdf_key(upload_id, log_upload_id, window_seconds),
+            pdf_path,
+            "application/pdf",
+            upload_id=upload_id,
+            log_upload_id=log_upload_id,
+            window_seconds=window_seconds,
+            summary_version=version,
+            fallback_summary=not ai_summary.get("ai_generated", False),
+        )
+    finally:
+        cleanup_pdf_file(pdf_path)
+
+
+def cached_pdf(upload_id: int, log_upload_id: int | None = None, window_seconds: int | None = None) -> dict | None:
+    """Stored report for these parameters if it matches the current summary version.
+
+    A report built with the fallback summary expires after
+    PDF_FALLBACK_TTL_SECONDS when an LLM is configured, since the fallback
+    usually means a transient LLM failure rather than a missing key.
+    """
+    info = artifact_store.get(pdf_key(upload_id, log_upload_id, window_seconds))
+    if info is None or info.get("summary_version") != summary_version(upload_id):
+        return None
+    if info.get("fallback_summary") and summarize.async_openai_client is not None:
+        age = (datetime.utcnow() - datetime.fromisoformat(info["created_at"])).total_seconds()
+        if age > PDF_FALLBACK_TTL_SECONDS:
+            return None
+    return info
+
+
+# Renders keyed by pdf_key: pdf_renderer.submit(key, upload_id, log_upload_id, window_seconds, ai_summary)
+pdf_renderer = RenderPool(render_pdf_report, PDF_WORKERS)
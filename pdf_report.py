@@ -4,6 +4,8 @@ from datetime import datetime
 import os
 import tempfile
 
+from kpi_stats import compute_kpi_stats
+
 class KPIPDFReport(FPDF):
     def __init__(self):
         super().__init__()
@@ -98,30 +100,73 @@ class KPIPDFReport(FPDF):
         self.multi_cell(0, 5, message)
         self.ln(5)
 
-def generate_kpi_pdf_report(upload_id, df, anomalies, ai_summary=None):
-    """Generate a professional PDF report for KPI analysis"""
+def _latin1(text):
+    # Core PDF fonts only cover latin-1; log lines can contain anything
+    return str(text).encode('latin-1', 'replace').decode('latin-1')
+
+def add_correlation_section(pdf, correlation):
+    """Log correlation chapter: how many anomalies coincide with log incidents, and which"""
+    pdf.add_page()
+    pdf.chapter_title('Log Incident Correlation')
+    pdf.add_text_section(
+        f'Anomalies matched to log upload #{correlation["log_upload_id"]} events '
+        f'({", ".join(correlation["severities"])}) within +/-{correlation["window_seconds"]}s '
+        f'({correlation["direction"]} event).'
+    )
+
+    pdf.add_metric_box('Anomalies', f'{correlation["anomalies"]:,}', (239, 68, 68), "KPI anomalies in upload")
+    pdf.add_metric_box('Correlated', f'{correlation["correlated_anomalies"]:,}', (245, 158, 11), "With a log incident nearby")
+    pdf.add_metric_box('Correlation', f'{correlation["correlation_rate"]:.1f}%', (6, 182, 212), "Share of anomalies explained")
+    pdf.ln(5)
+
+    if correlation["by_severity"]:
+        pdf.section_title('Correlated Incidents by Severity')
+        for severity, count in correlation["by_severity"].items():
+            pdf.add_text_section(f'{severity}: {count:,} anomalies', bullet=True)
+
+    if correlation["by_template"]:
+        pdf.section_title('Most Frequent Log Events Near Anomalies')
+        for t in correlation["by_template"]:
+            pdf.add_text_section(_latin1(f'{t["anomalies"]:,} x {t["template"] or "template #" + str(t["template_id"])}'), bullet=True)
+
+    if correlation["matches"]:
+        pdf.section_title('Strongest Anomalies with Nearest Log Event')
+        for m in correlation["matches"][:10]:
+            pdf.set_font('Arial', 'B', 10)
+            pdf.set_text_color(239, 68, 68)
+            pdf.cell(0, 6, _latin1(f'{m["cell_id"]} at {m["timestamp"]} - Score: {m["score"]:.3f}'), ln=True)
+            pdf.add_text_section(
+                _latin1(f'  [{m["level"] or m["severity"]}] {m["event_ts"]} ({m["lag_seconds"]:+.0f}s): {m["message"]}'),
+                bullet=True,
+            )
+
+def generate_kpi_pdf_report(upload_id, df, anomalies, ai_summary=None, correlation=None, stats=None):
+    """Generate a professional PDF report for KPI analysis.
+
+    `stats` is the upload's kpi_stats result; it is computed from `df` when omitted.
+    """
+    stats = stats or compute_kpi_stats(df)
     
     # Create PDF object
     pdf = KPIPDFReport()
     pdf.alias_nb_pages()
     
-    # Calculate metrics
-    total_samples = len(df)
-    anomaly_count = len(anomalies)
-    normal_count = total_samples - anomaly_count
-    anomaly_rate = (anomaly_count / total_samples * 100) if total_samples > 0 else 0
+    # Metrics
+    total_samples = stats["total"]
+    anomaly_count = stats["anomalies"]
+    normal_count = stats["normal"]
+    anomaly_rate = stats["anomaly_rate"]
+    severity = stats["severity"]
+    columns = stats["columns"]
+    missing_values = stats["missing_values"]
     
-    # Determine severity
-    if anomaly_rate > 10:
-        severity = "HIGH"
+    if severity == "HIGH":
         severity_color = (239, 68, 68)  # Red
         alert_message = "Critical network performance issues detected. Immediate attention required."
-    elif anomaly_rate > 5:
-        severity = "MEDIUM"
+    elif severity == "MEDIUM":
         severity_color = (245, 158, 11)  # Amber
         alert_message = "Moderate network performance anomalies detected. Monitor closely."
     else:
-        severity = "LOW"
         severity_color = (16, 185, 129)  # Green
         alert_message = "Network performance appears normal. Continue monitoring."
     
@@ -175,36 +220,43 @@ def generate_kpi_pdf_report(upload_id, df, anomalies, ai_summary=None):
     pdf.chapter_title('Technical Analysis')
     
     # Statistical summary with professional formatting
-    if 'PRB_Util' in df.columns:
+    if 'PRB_Util' in columns:
+        prb = columns['PRB_Util']
         pdf.section_title('PRB Utilization Analysis')
-        pdf.add_text_section(f'Average Utilization: {df["PRB_Util"].mean():.2f}%')
-        pdf.add_text_section(f'Peak Utilization: {df["PRB_Util"].max():.2f}%')
-        pdf.add_text_section(f'Minimum Utilization: {df["PRB_Util"].min():.2f}%')
-        pdf.add_text_section(f'Standard Deviation: {df["PRB_Util"].std():.2f}%')
+        pdf.add_text_section(f'Average Utilization: {prb["mean"]:.2f}%')
+        pdf.add_text_section(f'Peak Utilization: {prb["max"]:.2f}%')
+        pdf.add_text_section(f'Minimum Utilization: {prb["min"]:.2f}%')
+        pdf.add_text_section(f'Standard Deviation: {prb["std"] or 0:.2f}%')
+        pdf.add_text_section(f'Median / 95th Percentile: {prb["quantiles"]["p50"]:.2f}% / {prb["quantiles"]["p95"]:.2f}%')
         pdf.ln(5)
     
-    if 'Throughput_Mbps' in df.columns:
+    if 'Throughput_Mbps' in columns:
+        throughput = columns['Throughput_Mbps']
         pdf.section_title('Throughput Performance Analysis')
-        pdf.add_text_section(f'Average Throughput: {df["Throughput_Mbps"].mean():.2f} Mbps')
-        pdf.add_text_section(f'Maximum Throughput: {df["Throughput_Mbps"].max():.2f} Mbps')
-        pdf.add_text_section(f'Minimum Throughput: {df["Throughput_Mbps"].min():.2f} Mbps')
-        pdf.add_text_section(f'Throughput Variance: {df["Throughput_Mbps"].var():.2f}')
+        pdf.add_text_section(f'Average Throughput: {throughput["mean"]:.2f} Mbps')
+        pdf.add_text_section(f'Maximum Throughput: {throughput["max"]:.2f} Mbps')
+        pdf.add_text_section(f'Minimum Throughput: {throughput["min"]:.2f} Mbps')
+        pdf.add_text_section(f'Throughput Variance: {throughput["var"] or 0:.2f}')
+        pdf.add_text_section(f'5th Percentile / Median: {throughput["quantiles"]["p05"]:.2f} / {throughput["quantiles"]["p50"]:.2f} Mbps')
         pdf.ln(5)
     
-    if 'BLER' in df.columns:
+    if 'BLER' in columns:
+        bler = columns['BLER']
+        bler_change = bler["last"] - bler["first"]
         pdf.section_title('Block Error Rate Analysis')
-        pdf.add_text_section(f'Average BLER: {df["BLER"].mean():.4f}')
-        pdf.add_text_section(f'Maximum BLER: {df["BLER"].max():.4f}')
-        pdf.add_text_section(f'Minimum BLER: {df["BLER"].min():.4f}')
-        pdf.add_text_section(f'Error Rate Trend: {"Increasing" if df["BLER"].iloc[-1] > df["BLER"].iloc[0] else "Stable" if abs(df["BLER"].iloc[-1] - df["BLER"].iloc[0]) < 0.001 else "Decreasing"}')
+        pdf.add_text_section(f'Average BLER: {bler["mean"]:.4f}')
+        pdf.add_text_section(f'Maximum BLER: {bler["max"]:.4f}')
+        pdf.add_text_section(f'Minimum BLER: {bler["min"]:.4f}')
+        pdf.add_text_section(f'95th Percentile BLER: {bler["quantiles"]["p95"]:.4f}')
+        pdf.add_text_section(f'Error Rate Trend: {"Increasing" if bler_change > 0 else "Stable" if abs(bler_change) < 0.001 else "Decreasing"}')
         pdf.ln(5)
     
     # Anomaly Details
     if len(anomalies) > 0:
         pdf.add_page()
         pdf.chapter_title('Anomaly Detection Results')
-        pdf.add_text_section(f'Total anomalies detected: {len(anomalies)}')
-        pdf.add_text_section(f'Detection confidence: {len(anomalies) / total_samples * 100:.1f}%')
+        pdf.add_text_section(f'Total anomalies detected: {anomaly_count}')
+        pdf.add_text_section(f'Detection confidence: {anomaly_rate:.1f}%')
         
         # Show top anomalies with technical details
         if len(anomalies) > 10:
@@ -228,6 +280,10 @@ def generate_kpi_pdf_report(upload_id, df, anomalies, ai_summary=None):
                 pdf.add_text_section(f'  BLER: {row["BLER"]:.4f}', bullet=True)
             pdf.ln(2)
     
+    # Log correlation (only when a log upload was chosen)
+    if correlation:
+        add_correlation_section(pdf, correlation)
+    
     # Technical Details
     pdf.add_page()
     pdf.chapter_title('Technical Specifications')
@@ -241,9 +297,9 @@ def generate_kpi_pdf_report(upload_id, df, anomalies, ai_summary=None):
     
     pdf.section_title('Data Quality Assessment')
     pdf.add_text_section(f'- Total data points: {total_samples:,}', bullet=True)
-    pdf.add_text_section(f'- Missing values: {df.isnull().sum().sum()}', bullet=True)
-    pdf.add_text_section(f'- Data completeness: {((total_samples - df.isnull().sum().sum()) / total_samples * 100):.1f}%', bullet=True)
-    pdf.add_text_section(f'- Data integrity: {"Excellent" if df.isnull().sum().sum() == 0 else "Good" if df.isnull().sum().sum() < total_samples * 0.01 else "Needs attention"}', bullet=True)
+    pdf.add_text_section(f'- Missing values: {missing_values}', bullet=True)
+    pdf.add_text_section(f'- Data completeness: {((total_samples - missing_values) / total_samples * 100):.1f}%', bullet=True)
+    pdf.add_text_section(f'- Data integrity: {"Excellent" if missing_values == 0 else "Good" if missing_values < total_samples * 0.01 else "Needs attention"}', bullet=True)
     pdf.ln(5)
     
     pdf.section_title('System Performance')
@@ -256,13 +312,13 @@ def generate_kpi_pdf_report(upload_id, df, anomalies, ai_summary=None):
     pdf.add_page()
     pdf.chapter_title('Technical Recommendations')
     
-    if anomaly_rate > 10:
+    if severity == "HIGH":
         pdf.section_title('Immediate Actions Required')
         pdf.add_text_section('- Investigate network capacity and resource allocation', bullet=True)
         pdf.add_text_section('- Review system configurations and thresholds', bullet=True)
         pdf.add_text_section('- Implement immediate monitoring alerts', bullet=True)
         pdf.add_text_section('- Schedule emergency maintenance window', bullet=True)
-    elif anomaly_rate > 5:
+    elif severity == "MEDIUM":
         pdf.section_title('Proactive Measures')
         pdf.add_text_section('- Increase monitoring frequency for affected cells', bullet=True)
         pdf.add_text_section('- Review historical performance trends', bullet=True)
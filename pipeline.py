@@ -0,0 +1,81 @@
+import os
+
+from chart_renderer import chart_renderer
+from features import iter_kpi_csv, sample_kpi_csv, to_matrix
+from kpi_stats import KpiStatsAccumulator, finish_upload_stats
+from model import load_model, train, score
+from storage import bulk_insert_scores, delete_upload, score_frame
+
+# Stages reported by the KPI upload job, in pipeline order; the chart is
+# rendered afterwards by chart_renderer and polled through /chart/{id}
+KPI_STAGES = ["parse", "score", "persist", "stats"]
+
+
+def process_kpi_upload(job, path: str, upload_id: int, filename: str, train_if_missing: bool = True) -> dict:
+    """Parse, score and persist a spooled KPI CSV, compute its statistics and queue its chart.
+
+    Removes `path` when done. If any stage fails the upload and whatever it
+    had stored so far are deleted, so it is not listed as processed.
+    """
+    try:
+        m = load_model()
+        if m is None and train_if_missing:
+            with job.stage("train"):
+                m = train(to_matrix(sample_kpi_csv(path)))
+        elif m is None:
+            raise ValueError("model missing; set train_if_missing=true")
+
+        # Score, persist and fold statistics chunk by chunk
+        summary = {}
+        stats = KpiStatsAccumulator()
+        rows = 0
+        chunks = iter_kpi_csv(path)
+        while True:
+            with job.stage("parse"):
+                df_out = next(chunks, None)
+            if df_out is None:
+                break
+
+            with job.stage("score"):
+                pred, sc = score(m, to_matrix(df_out))
+                df_out["anomaly"] = pred
+                df_out["score"] = sc
+                for label, count in df_out["anomaly"].value_counts().items():
+                    summary[int(label)] = summary.get(int(label), 0) + int(count)
+
+            with job.stage("persist"):
+                bulk_insert_scores(upload_id, df_out)
+
+            with job.stage("stats"):
+                stats.add(score_frame(df_out))
+
+            rows += len(df_out)
+            job.update(rows_processed=rows)
+
+        if rows == 0:
+            raise ValueError("No valid KPI rows found")
+
+        # Stored after the last chunk, whose write dropped any earlier statistics;
+        # summaries, PDF and pages read these back
+        with job.stage("stats"):
+            stats = finish_upload_stats(upload_id, stats)
+
+        # Rendering reads the persisted scores, so nothing is held in memory for it
+        chart_renderer.submit(upload_id, upload_id)
+
+        return {
+            "upload_id": upload_id,
+            "filename": filename,
+            "total_samples": rows,
+            "summary": summary,
+            "stats": f"/stats/{upload_id}",
+            "anomaly_rate": stats["anomaly_rate"],
+            "severity": stats["severity"],
+            "chart": f"/chart/{upload_id}",
+            "chart_status": "pending",
+        }
+    except Exception:
+        delete_upload(upload_id)
+        raise
+    finally:
+        os.unlink(path)
@@ -1,39 +1,73 @@
-import joblib
 import pandas as pd
 import numpy as np
 from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder
 from sklearn.metrics import classification_report, mean_squared_error, r2_score
+from model_registry import model_registry
 import warnings
 warnings.filterwarnings('ignore')
 
-# Model file paths
-CLASSIFIER_PATH = "model_rf_classifier.joblib"
-REGRESSOR_PATH = "model_rf_regressor.joblib"
-LABEL_ENCODER_PATH = "label_encoder.joblib"
+# Directory of the model set (classifier, regressor and label encoder are
+# saved and swapped together, see ModelRegistry.save_set)
+RF_MODEL_DIR = "model_rf"
+RF_MODELS = ("rf_classifier", "rf_regressor", "label_encoder")
 
-def create_labels(df):
+# Status rules checked in order: a row takes the label of the first rule with
+# any condition true, DEFAULT_LABEL otherwise. Conditions are (operator, threshold).
+LABEL_RULES = [
+    ("CRITICAL", {"PRB_Util": (">", 90), "Throughput_Mbps": ("<", 20), "BLER": (">", 0.05)}),
+    ("WARNING", {"PRB_Util": (">", 80), "Throughput_Mbps": ("<", 40), "BLER": (">", 0.02)}),
+]
+DEFAULT_LABEL = "NORMAL"
+
+RULE_OPERATORS = {
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "<": np.less,
+    "<=": np.less_equal,
+}
+
+def label_classes(rules=LABEL_RULES, default=DEFAULT_LABEL):
+    """All labels the rules can produce, sorted like LabelEncoder.classes_"""
+    return sorted({label for label, _ in rules} | {default})
+
+def encode_labels(df, rules=LABEL_RULES, default=DEFAULT_LABEL):
+    """Vectorized threshold labelling; returns integer codes into label_classes()"""
+    classes = label_classes(rules, default)
+    conditions = []
+    for _, thresholds in rules:
+        matched = np.zeros(len(df), dtype=bool)
+        for column, (op, threshold) in thresholds.items():
+            # Missing columns count as 0, like row.get(column, 0) did
+            values = df[column].to_numpy(dtype=float) if column in df.columns else np.zeros(len(df))
+            matched |= RULE_OPERATORS[op](values, threshold)
+        conditions.append(matched)
+
+    codes = [classes.index(label) for label, _ in rules]
+    return np.select(conditions, codes, default=classes.index(default)).astype(np.int64)
+
+def create_labels(df, rules=LABEL_RULES, default=DEFAULT_LABEL):
     """Create labels for classification based on KPI thresholds"""
-    labels = []
-    
-    for _, row in df.iterrows():
-        # Define thresholds for different severity levels
-        prb_util = row.get('PRB_Util', 0)
-        throughput = row.get('Throughput_Mbps', 0)
-        bler = row.get('BLER', 0)
-        
-        # Determine status based on thresholds
-        if prb_util > 90 or throughput < 20 or bler > 0.05:
-            status = 'CRITICAL'
-        elif prb_util > 80 or throughput < 40 or bler > 0.02:
-            status = 'WARNING'
-        else:
-            status = 'NORMAL'
-        
-        labels.append(status)
-    
-    return labels
+    classes = np.asarray(label_classes(rules, default))
+    return classes[encode_labels(df, rules, default)].tolist()
+
+def fit_label_encoder(df, rules=LABEL_RULES, default=DEFAULT_LABEL):
+    """Encoded training targets plus a LabelEncoder fitted on the labels present.
+
+    Equivalent to LabelEncoder().fit_transform(create_labels(df)) without
+    building or sorting a per-row list of strings.
+    """
+    classes = np.asarray(label_classes(rules, default))
+    codes = encode_labels(df, rules, default)
+    present = np.flatnonzero(np.bincount(codes, minlength=len(classes)))
+
+    remap = np.full(len(classes), -1, dtype=np.int64)
+    remap[present] = np.arange(len(present))
+
+    le = LabelEncoder()
+    le.fit(classes[present])
+    return remap[codes], le
 
 def train_random_forest_models(df):
     """Train both Random Forest Classifier and Regressor"""
@@ -45,9 +79,7 @@ def train_random_forest_models(df):
     
     # Train Classifier
     # Training Classifier...
-    labels = create_labels(df)
-    le = LabelEncoder()
-    y_class = le.fit_transform(labels)
+    y_class, le = fit_label_encoder(df)
     
     X_train, X_test, y_train, y_test = train_test_split(X, y_class, test_size=0.2, random_state=42)
     
@@ -83,81 +115,97 @@ def train_random_forest_models(df):
     rmse = np.sqrt(mean_squared_error(y_test_reg, y_pred_reg))
     # Regressor trained successfully
     
-    # Save models
-    joblib.dump(classifier, CLASSIFIER_PATH)
-    joblib.dump(regressor, REGRESSOR_PATH)
-    joblib.dump(le, LABEL_ENCODER_PATH)
+    # Save models as one version, so readers never pair a new classifier with an old encoder
+    model_registry.save_set(dict(zip(RF_MODELS, (classifier, regressor, le))), RF_MODEL_DIR)
     
     # Random Forest models trained and saved successfully!
     
     return classifier, regressor, le
 
 def load_random_forest_models():
-    """Load trained Random Forest models"""
-    try:
-        classifier = joblib.load(CLASSIFIER_PATH)
-        regressor = joblib.load(REGRESSOR_PATH)
-        le = joblib.load(LABEL_ENCODER_PATH)
-        return classifier, regressor, le
-    except FileNotFoundError:
+    """Load trained Random Forest models (cached by the model registry)"""
+    models = model_registry.get_set(RF_MODEL_DIR)
+    if models is None:
         return None, None, None
+    return tuple(models[name] for name in RF_MODELS)
 
-def predict_network_status(df, classifier, le):
-    """Predict network status using Random Forest Classifier"""
+def predict_status_columns(df, classifier, le):
+    """Columnar classifier output: label, confidence and per-class probability arrays"""
     if classifier is None or le is None:
         return None
     
     feature_columns = ['PRB_Util', 'RRC_Conn', 'Throughput_Mbps', 'BLER']
     X = df[feature_columns].fillna(0)
     
-    # Get predictions and probabilities
-    predictions = classifier.predict(X)
+    # predict() is the argmax of predict_proba, so one pass gives both
     probabilities = classifier.predict_proba(X)
+    class_labels = le.inverse_transform(classifier.classes_)
+    best = probabilities.argmax(axis=1)
     
-    # Convert back to original labels
-    status_predictions = le.inverse_transform(predictions)
-    
-    results = []
-    for i, (pred, prob) in enumerate(zip(status_predictions, probabilities)):
-        # Get confidence (max probability)
-        confidence = max(prob)
-        
-        # Create probability dict
-        prob_dict = {}
-        for j, label in enumerate(le.classes_):
-            prob_dict[label] = prob[j]
-        
-        results.append({
-            'predicted_status': pred,
-            'confidence': confidence,
-            'probabilities': prob_dict
-        })
-    
-    return results
+    return {
+        'predicted_status': class_labels[best],
+        'confidence': probabilities[np.arange(len(best)), best],
+        'probabilities': {label: probabilities[:, j] for j, label in enumerate(class_labels)}
+    }
 
-def predict_throughput(df, regressor):
-    """Predict throughput using Random Forest Regressor"""
+def predict_throughput_columns(df, regressor):
+    """Columnar regressor output: prediction and 95% interval bound arrays"""
     if regressor is None:
         return None
     
     feature_columns = ['PRB_Util', 'RRC_Conn', 'Throughput_Mbps', 'BLER']
     X = df[feature_columns].fillna(0)
     
-    # Get predictions
     predictions = regressor.predict(X)
     
     # Calculate prediction intervals (simplified)
     # In a real implementation, you might use quantile regression or bootstrapping
     std_dev = np.std(predictions)
-    confidence_intervals = []
     
-    for pred in predictions:
-        lower = max(0, pred - 1.96 * std_dev)  # 95% confidence interval
-        upper = pred + 1.96 * std_dev
-        confidence_intervals.append([lower, upper])
+    return {
+        'predicted_throughput': predictions,
+        'lower': np.maximum(0, predictions - 1.96 * std_dev),
+        'upper': predictions + 1.96 * std_dev
+    }
+
+def status_rows(columns):
+    """Per-row dicts from predict_status_columns output"""
+    if columns is None:
+        return None
+    
+    probabilities = columns['probabilities']
+    return [
+        {
+            'predicted_status': pred,
+            'confidence': confidence,
+            'probabilities': {label: probs[i] for label, probs in probabilities.items()}
+        }
+        for i, (pred, confidence) in enumerate(zip(columns['predicted_status'], columns['confidence']))
+    ]
+
+def throughput_rows(columns):
+    """Per-row dicts from predict_throughput_columns output"""
+    if columns is None:
+        return None
     
-    return [{'predicted_throughput': pred, 'confidence_interval': interval} 
-            for pred, interval in zip(predictions, confidence_intervals)]
+    return [{'predicted_throughput': pred, 'confidence_interval': [lower, upper]}
+            for pred, lower, upper in zip(columns['predicted_throughput'], columns['lower'], columns['upper'])]
+
+def predict_network_status(df, classifier, le):
+    """Predict network status using Random Forest Classifier"""
+    return status_rows(predict_status_columns(df, classifier, le))
+
+def predict_throughput(df, regressor):
+    """Predict throughput using Random Forest Regressor"""
+    return throughput_rows(predict_throughput_columns(df, regressor))
+
+def slice_columns(columns, start=0, stop=None):
+    """JSON-ready slice of a columnar prediction result (arrays become lists)"""
+    if columns is None:
+        return None
+    if isinstance(columns, dict):
+        return {key: slice_columns(value, start, stop) for key, value in columns.items()}
+    return np.asarray(columns)[start:stop].tolist()
 
 def get_feature_importance(classifier, regressor):
     """Get feature importance from both models"""
@@ -178,8 +226,19 @@ def get_feature_importance(classifier, regressor):
     
     return importance_data
 
-def analyze_with_random_forest(df):
-    """Complete Random Forest analysis"""
+# Output modes of analyze_with_random_forest
+PREDICTION_OUTPUTS = ('rows', 'columnar', 'summary')
+
+def analyze_with_random_forest(df, output='rows'):
+    """Complete Random Forest analysis.
+
+    output='rows' returns per-row prediction dicts, 'columnar' returns the
+    same predictions as arrays (see predict_status_columns and
+    predict_throughput_columns), and 'summary' omits per-row predictions.
+    """
+    if output not in PREDICTION_OUTPUTS:
+        raise ValueError(f"Unknown output mode: {output}")
+    
     # Load or train models
     classifier, regressor, le = load_random_forest_models()
     
@@ -188,34 +247,37 @@ def analyze_with_random_forest(df):
         classifier, regressor, le = train_random_forest_models(df)
     
     # Get predictions
-    status_predictions = predict_network_status(df, classifier, le)
-    throughput_predictions = predict_throughput(df, regressor)
+    status_columns = predict_status_columns(df, classifier, le)
+    throughput_columns = predict_throughput_columns(df, regressor)
     feature_importance = get_feature_importance(classifier, regressor)
     
     # Aggregate results
-    if status_predictions:
-        status_counts = {}
-        avg_confidence = 0
-        for pred in status_predictions:
-            status = pred['predicted_status']
-            status_counts[status] = status_counts.get(status, 0) + 1
-            avg_confidence += pred['confidence']
-        
-        avg_confidence /= len(status_predictions)
-        
-        # Find most common status
-        most_common_status = max(status_counts, key=status_counts.get)
+    if status_columns is not None and len(status_columns['predicted_status']):
+        labels, counts = np.unique(status_columns['predicted_status'], return_counts=True)
+        status_counts = dict(zip(labels.tolist(), counts.tolist()))
+        avg_confidence = float(status_columns['confidence'].mean())
+        most_common_status = str(labels[counts.argmax()])
     else:
         status_counts = {}
         avg_confidence = 0
         most_common_status = "UNKNOWN"
     
     # Calculate average predicted throughput
-    if throughput_predictions:
-        avg_predicted_throughput = np.mean([p['predicted_throughput'] for p in throughput_predictions])
+    if throughput_columns is not None and len(throughput_columns['predicted_throughput']):
+        avg_predicted_throughput = float(throughput_columns['predicted_throughput'].mean())
     else:
         avg_predicted_throughput = 0
     
+    if output == 'rows':
+        status_predictions = status_rows(status_columns)
+        throughput_predictions = throughput_rows(throughput_columns)
+    elif output == 'columnar':
+        status_predictions = status_columns
+        throughput_predictions = throughput_columns
+    else:
+        status_predictions = None
+        throughput_predictions = None
+    
     return {
         'status_predictions': status_predictions,
         'throughput_predictions': throughput_predictions,
@@ -0,0 +1,98 @@
+import multiprocessing
+import threading
+import traceback
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# Finished renders whose status is kept per pool; results live in the
+# artifact store, so older entries are dropped rather than kept forever
+FINISHED_RENDERS_KEPT = 256
+
+
+class RenderPool:
+    """Runs one render function in a process pool, off the request path.
+
+    Renders are tracked by a caller-chosen key (an upload id, an artifact
+    key): `submit` is idempotent per key while a render is in flight and
+    `status` reports pending/running/done/missing/failed for keys submitted
+    by this process. The pool is created on first use with the spawn start
+    method, so workers do not inherit the server's threads or open database
+    connections; render functions therefore read their inputs from the
+    database themselves and return small, picklable results. Only the
+    last `finished_kept` finished renders keep their status.
+    """
+
+    def __init__(self, render, workers: int, finished_kept: int = FINISHED_RENDERS_KEPT):
+        self.render = render
+        self.workers = workers
+        self.finished_kept = finished_kept
+        self._executor = None
+        self._futures = {}
+        # Keys of finished renders, oldest first
+        self._finished = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    def submit(self, key, *args) -> Future:
+        """Queue `render(*args)` under `key` unless a render for it is already in flight"""
+        with self._lock:
+            future = self._futures.get(key)
+            if future is not None and not future.done():
+                return future
+            try:
+                future = self._pool().submit(self.render, *args)
+            except BrokenProcessPool:
+                # A worker died (OOM, signal); start a fresh pool rather than failing forever
+                self._executor = None
+                future = self._pool().submit(self.render, *args)
+            self._futures[key] = future
+            self._finished.pop(key, None)
+        future.add_done_callback(lambda done: self._on_done(key, done))
+        return future
+
+    def _on_done(self, key, future: Future):
+        with self._lock:
+            if self._futures.get(key) is not future:
+                return
+            self._finished[key] = None
+            while len(self._finished) > self.finished_kept:
+                oldest, _ = self._finished.popitem(last=False)
+                del self._futures[oldest]
+
+    def future(self, key) -> Future | None:
+        with self._lock:
+            return self._futures.get(key)
+
+    def status(self, key) -> dict | None:
+        """None when nothing was submitted under `key` here; otherwise status and, on failure, the error"""
+        future = self.future(key)
+        if future is None:
+            return None
+        if not future.done():
+            return {"status": "running" if future.running() else "pending"}
+        error = future.exception()
+        if error is not None:
+            return {
+                "status": "failed",
+                "error": "".join(traceback.format_exception_only(type(error), error)).strip(),
+            }
+        return {"status": "done" if future.result() is not None else "missing"}
+
+    def forget(self, key):
+        with self._lock:
+            self._futures.pop(key, None)
+            self._finished.pop(key, None)
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
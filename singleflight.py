@@ -0,0 +1,92 @@
+import asyncio
+import threading
+from collections import Counter
+
+
+def _counter_name(key):
+    """Counters are grouped by the operation name, the first element of tuple keys"""
+    return key[0] if isinstance(key, tuple) else key
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Collapses concurrent identical calls (same key) into one execution.
+
+    The first caller runs the function; callers arriving while it is in
+    flight block until it finishes and share its result or exception.
+    Thread-based, for sync code running in the threadpool.
+    """
+
+    def __init__(self):
+        self.executed = Counter()
+        self.coalesced = Counter()
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executed[_counter_name(key)] += 1
+            else:
+                self.coalesced[_counter_name(key)] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"executed": dict(self.executed), "coalesced": dict(self.coalesced)}
+
+
+class AsyncSingleFlight:
+    """asyncio counterpart of SingleFlight: concurrent awaiters share one task.
+
+    The shared task is shielded, so a client disconnecting does not cancel
+    the computation for everyone else waiting on it.
+    """
+
+    def __init__(self):
+        self.executed = Counter()
+        self.coalesced = Counter()
+        self._tasks = {}
+
+    async def do(self, key, fn, *args, **kwargs):
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn(*args, **kwargs))
+            self._tasks[key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+            self.executed[_counter_name(key)] += 1
+        else:
+            self.coalesced[_counter_name(key)] += 1
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        return {"executed": dict(self.executed), "coalesced": dict(self.coalesced)}
+
+
+request_flight = SingleFlight()
+async_request_flight = AsyncSingleFlight()
@@ -1,41 +1,130 @@
 import os
-import re
 import json
+import time
+import asyncio
+import threading
+from collections import deque
+from contextlib import asynccontextmanager
+from datetime import datetime
 from dotenv import load_dotenv
 import openai
+from summary_cache import get_cached_summary, store_summary
+from log_scanner import scan_log_text, SEVERITY_LEVELS
+from kpi_stats import compute_kpi_stats
 
 load_dotenv()
 
+# Chat model used for summaries; part of the summary cache key
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+
+KPI_SYSTEM_PROMPT = "You are a network operations expert providing professional analysis of network performance data."
+LOG_SYSTEM_PROMPT = "You are a system administrator analyzing log files for incidents and system health."
+
+# Concurrent LLM calls allowed per process, across all event loops
+AI_MAX_CONCURRENCY = int(os.getenv("AI_MAX_CONCURRENCY", "4"))
+
+# Seconds a summary may take (waiting for a slot included) before falling back
+AI_DEADLINE_SECONDS = float(os.getenv("AI_DEADLINE_SECONDS", "8"))
+
+# Seconds between checks for a free LLM call slot
+AI_SLOT_POLL_SECONDS = 0.01
+
+# Recent async LLM calls kept for the timing report
+AI_CALL_LOG_SIZE = 200
+
 # Initialize OpenAI client if API key is available
-openai_client = None
+async_openai_client = None
 api_key = os.getenv("OPENAI_API_KEY")
-# Initialize OpenAI client if API key is available
 if api_key:
-    openai.api_key = api_key
-    openai_client = openai
-
-def generate_ai_kpi_summary(df, anomalies, scores):
-    """Generate AI-powered insights using OpenAI"""
-    # Check if OpenAI client is available
-    if not openai_client:
-        return generate_fallback_kpi_summary(df, anomalies, scores)
-    
+    async_openai_client = openai.AsyncOpenAI(api_key=api_key, max_retries=0)
+
+ai_call_log = deque(maxlen=AI_CALL_LOG_SIZE)
+_ai_slots = threading.BoundedSemaphore(AI_MAX_CONCURRENCY)
+
+@asynccontextmanager
+async def _ai_slot():
+    """Hold one of the process's AI_MAX_CONCURRENCY LLM call slots.
+
+    A threading semaphore rather than an asyncio one, so calls made on
+    other event loops (asyncio.run from blocking callers) share the limit.
+    The wait polls instead of blocking the loop, so a deadline cancels it
+    without leaking a slot.
+    """
+    while not _ai_slots.acquire(blocking=False):
+        await asyncio.sleep(AI_SLOT_POLL_SECONDS)
     try:
-        # Prepare data for AI analysis
-        total_samples = len(df)
-        anomaly_count = len(anomalies)
-        anomaly_rate = (anomaly_count / total_samples) * 100 if total_samples > 0 else 0
-        
-        # Calculate key metrics
-        avg_prb_util = df['PRB_Util'].mean()
-        avg_throughput = df['Throughput_Mbps'].mean()
-        avg_bler = df['BLER'].mean()
-        
-        # Get worst performing cells
-        worst_cells = df[df['anomaly'] == -1].sort_values('score', ascending=True).head(3)
-        
-        # Create prompt for OpenAI
-        prompt = f"""
+        yield
+    finally:
+        _ai_slots.release()
+
+def record_ai_call(kind, upload_id, outcome, seconds):
+    """Log one async LLM call and return its timing entry"""
+    entry = {
+        "kind": kind,
+        "upload_id": upload_id,
+        "outcome": outcome,
+        "seconds": round(seconds, 4),
+        "at": datetime.now().isoformat(),
+    }
+    ai_call_log.append(entry)
+    return entry
+
+async def acached_chat_completion(kind, system_prompt, prompt, max_tokens, upload_id=None, deadline=AI_DEADLINE_SECONDS):
+    """Async cached chat completion; returns (text, "cache_hit" | "ok").
+
+    Raises asyncio.TimeoutError when the deadline passes first; the cache
+    lookup counts against the deadline too.
+    """
+    cache_prompt = system_prompt + "\n" + prompt
+    
+    async def call():
+        cached = await asyncio.to_thread(get_cached_summary, kind, OPENAI_MODEL, cache_prompt, upload_id)
+        if cached is not None:
+            return cached, "cache_hit"
+        async with _ai_slot():
+            response = await async_openai_client.chat.completions.create(
+                model=OPENAI_MODEL,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=max_tokens,
+                temperature=0.3,
+                timeout=deadline
+            )
+        return response.choices[0].message.content.strip(), "ok"
+    
+    content, outcome = await asyncio.wait_for(call(), timeout=deadline)
+    if outcome == "ok":
+        await asyncio.to_thread(store_summary, kind, OPENAI_MODEL, cache_prompt, content, upload_id)
+    return content, outcome
+
+def _kpi_mean(stats, column):
+    column_stats = stats["columns"].get(column)
+    return column_stats["mean"] if column_stats and column_stats["mean"] is not None else 0
+
+def build_kpi_prompt(df, anomalies, stats=None):
+    """Prompt asking the LLM for a JSON analysis of an upload's KPIs.
+
+    `stats` is the upload's kpi_stats result; it is computed from `df` when omitted.
+    """
+    stats = stats or compute_kpi_stats(df)
+    
+    # Prepare data for AI analysis
+    total_samples = stats["total"]
+    anomaly_count = stats["anomalies"]
+    anomaly_rate = stats["anomaly_rate"]
+    
+    # Key metrics
+    avg_prb_util = _kpi_mean(stats, 'PRB_Util')
+    avg_throughput = _kpi_mean(stats, 'Throughput_Mbps')
+    avg_bler = _kpi_mean(stats, 'BLER')
+    
+    # Get worst performing cells
+    worst_cells = df[df['anomaly'] == -1].sort_values('score', ascending=True).head(3)
+    
+    # Create prompt for OpenAI
+    return f"""
         As a network operations expert, analyze this network performance data and provide professional insights:
 
         DATA SUMMARY:
@@ -56,56 +145,75 @@ def generate_ai_kpi_summary(df, anomalies, scores):
 
         Format as JSON with keys: executive_summary, key_insights (array), recommendations (array), severity_level
         """
-        
-        response = openai_client.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a network operations expert providing professional analysis of network performance data."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=500,
-            temperature=0.3
-        )
-        
-        # Parse AI response
-        ai_response = response.choices[0].message.content.strip()
-        
-        # Try to parse as JSON, fallback to text if needed
+
+def parse_kpi_response(ai_response):
+    """Turn the LLM's KPI analysis text into the summary dict used by the pages"""
+    # Try to parse as JSON, fallback to text if needed
+    try:
+        result = json.loads(ai_response)
+        return {
+            "summary": result.get("executive_summary", "AI analysis completed"),
+            "insights": result.get("key_insights", []),
+            "recommendations": result.get("recommendations", []),
+            "severity": result.get("severity_level", "MEDIUM"),
+            "ai_generated": True
+        }
+    except json.JSONDecodeError:
+        return {
+            "summary": ai_response,
+            "insights": ["AI analysis provided", "Review the detailed summary above"],
+            "recommendations": ["Contact network operations team", "Monitor performance trends"],
+            "severity": "MEDIUM",
+            "ai_generated": True
+        }
+
+def generate_ai_kpi_summary(df, anomalies, scores, upload_id=None, stats=None):
+    """Blocking agenerate_ai_kpi_summary for callers without a running event loop"""
+    return asyncio.run(agenerate_ai_kpi_summary(df, anomalies, scores, upload_id=upload_id, stats=stats))
+
+async def agenerate_ai_kpi_summary(df, anomalies, scores, upload_id=None, deadline=AI_DEADLINE_SECONDS, stats=None):
+    """Async variant of generate_ai_kpi_summary for async request handlers.
+
+    Runs on the AsyncOpenAI client under the shared concurrency limit. If no
+    answer arrives within `deadline` seconds (queueing included), or the call
+    fails, it returns generate_fallback_kpi_summary instead. The result
+    carries a "timing" entry describing the call.
+    """
+    start = time.perf_counter()
+    # Statistics, prompt and fallback are pandas/string work: run them in
+    # threads so only the LLM call itself waits on the event loop
+    if stats is None:
+        stats = await asyncio.to_thread(compute_kpi_stats, df)
+    outcome = "fallback"
+    result = None
+    if async_openai_client is not None:
         try:
-            result = json.loads(ai_response)
-            return {
-                "summary": result.get("executive_summary", "AI analysis completed"),
-                "insights": result.get("key_insights", []),
-                "recommendations": result.get("recommendations", []),
-                "severity": result.get("severity_level", "MEDIUM"),
-                "ai_generated": True
-            }
-        except json.JSONDecodeError:
-            return {
-                "summary": ai_response,
-                "insights": ["AI analysis provided", "Review the detailed summary above"],
-                "recommendations": ["Contact network operations team", "Monitor performance trends"],
-                "severity": "MEDIUM",
-                "ai_generated": True
-            }
-            
-    except Exception as e:
-        # OpenAI API error - fallback to heuristic summary
-        return generate_fallback_kpi_summary(df, anomalies, scores)
+            prompt = await asyncio.to_thread(build_kpi_prompt, df, anomalies, stats)
+            ai_response, outcome = await acached_chat_completion(
+                "kpi_summary", KPI_SYSTEM_PROMPT, prompt, 500, upload_id, deadline
+            )
+            result = parse_kpi_response(ai_response)
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+        except Exception:
+            outcome = "error"
+    if result is None:
+        result = await asyncio.to_thread(generate_fallback_kpi_summary, df, anomalies, scores, stats)
+    result["timing"] = record_ai_call("kpi_summary", upload_id, outcome, time.perf_counter() - start)
+    return result
 
-def generate_fallback_kpi_summary(df, anomalies, scores):
+def generate_fallback_kpi_summary(df, anomalies, scores, stats=None):
     """Fallback summary when OpenAI is not available"""
-    total_samples = len(df)
-    anomaly_count = len(anomalies)
-    anomaly_rate = (anomaly_count / total_samples) * 100 if total_samples > 0 else 0
-    
-    # Calculate additional metrics for better insights
-    avg_prb_util = df['PRB_Util'].mean() if 'PRB_Util' in df.columns else 0
-    avg_throughput = df['Throughput_Mbps'].mean() if 'Throughput_Mbps' in df.columns else 0
-    avg_bler = df['BLER'].mean() if 'BLER' in df.columns else 0
+    stats = stats or compute_kpi_stats(df)
+    total_samples = stats["total"]
+    anomaly_count = stats["anomalies"]
+    anomaly_rate = stats["anomaly_rate"]
     
-    # Determine severity based on multiple factors
-    severity = "HIGH" if anomaly_rate > 10 else "MEDIUM" if anomaly_rate > 5 else "LOW"
+    # Additional metrics for better insights
+    avg_prb_util = _kpi_mean(stats, 'PRB_Util')
+    avg_throughput = _kpi_mean(stats, 'Throughput_Mbps')
+    avg_bler = _kpi_mean(stats, 'BLER')
+    severity = stats["severity"]
     
     # Generate more detailed insights
     insights = [
@@ -149,27 +257,31 @@ def generate_fallback_kpi_summary(df, anomalies, scores):
         "ai_generated": False
     }
 
-def summarize_logs(text: str) -> str:
-    """Summarize logs using OpenAI if available, otherwise use heuristic"""
-    if not openai_client:
-        return summarize_logs_heuristic(text)
-    
-    try:
-        # Count incidents
-        patterns = {
-            "critical_errors": len(re.findall(r"CRIT.*", text)),
-            "errors": len(re.findall(r"ERROR.*", text)),
-            "alarms": len(re.findall(r"ALARM.*", text)),
-            "warnings": len(re.findall(r"WARN.*", text)),
-        }
-        
-        total_incidents = sum(patterns.values())
-        
-        if total_incidents == 0:
-            return "No incidents detected in the log file. System appears to be operating normally."
-        
-        # Create prompt for OpenAI
-        prompt = f"""
+# Event templates listed in the log prompt and in the heuristic summary
+PROMPT_TEMPLATES = 25
+HEURISTIC_TEMPLATES = 3
+
+# Severity buckets treated as incidents when ranking templates
+INCIDENT_SEVERITIES = ("critical", "error", "alarm", "warning")
+
+def incident_templates(templates: list) -> list:
+    """Templates whose level maps to an incident severity, most frequent first"""
+    return [t for t in templates if SEVERITY_LEVELS.get(t["level"]) in INCIDENT_SEVERITIES]
+
+def format_template_table(templates: list, limit: int = PROMPT_TEMPLATES) -> str:
+    """One line per template: count, level, template and a sample of its parameters"""
+    lines = []
+    for t in templates[:limit]:
+        line = f"{t['count']:>9,}  {t['level'] or '-':<8} {t['template']}"
+        if t["examples"]:
+            line += f"  (e.g. {', '.join(t['examples'][0])})"
+        lines.append(line)
+    return "\n".join(lines)
+
+def build_log_prompt(scan: dict) -> str:
+    """Prompt asking the LLM for a JSON summary of a log scan"""
+    patterns = scan["incident_counts"]
+    return f"""
         Analyze this system log file and provide a professional summary:
 
         INCIDENT COUNTS:
@@ -177,10 +289,11 @@ def summarize_logs(text: str) -> str:
         - Errors: {patterns['errors']}
         - Alarms: {patterns['alarms']}
         - Warnings: {patterns['warnings']}
-        - Total Incidents: {total_incidents}
+        - Total Incidents: {sum(patterns.values())}
 
-        LOG CONTENT (first 1000 characters):
-        {text[:1000]}
+        LOG EVENT TEMPLATES ({scan["template_count"]} distinct across {scan["total_lines"]} lines; variable fields shown as <*>):
+        count     level    template
+{format_template_table(scan["templates"])}
 
         Please provide:
         1. Executive Summary (2-3 sentences)
@@ -190,51 +303,72 @@ def summarize_logs(text: str) -> str:
 
         Format as JSON with keys: summary, findings (array), actions (array), health_status
         """
-        
-        response = openai_client.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a system administrator analyzing log files for incidents and system health."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=400,
-            temperature=0.3
+
+def summarize_logs(text: str = None, scan: dict = None) -> str:
+    """Blocking asummarize_logs for callers without a running event loop"""
+    return asyncio.run(asummarize_logs(text, scan))
+
+async def asummarize_logs(text: str = None, scan: dict = None, deadline=AI_DEADLINE_SECONDS) -> str:
+    """Summarize logs using OpenAI if available, otherwise use heuristic.
+
+    Pass a log_scanner result as `scan` to reuse an existing pass over the
+    log. The LLM call goes through acached_chat_completion, so it is cached,
+    shares the concurrency limit and falls back to the heuristic summary
+    after `deadline` seconds.
+    """
+    if scan is None:
+        scan = await asyncio.to_thread(scan_log_text, text)
+    
+    if async_openai_client is None:
+        return summarize_logs_heuristic(scan=scan)
+    
+    if sum(scan["incident_counts"].values()) == 0:
+        return "No incidents detected in the log file. System appears to be operating normally."
+
+    start = time.perf_counter()
+    outcome = "fallback"
+    summary = None
+    try:
+        ai_response, outcome = await acached_chat_completion(
+            "log_summary", LOG_SYSTEM_PROMPT, build_log_prompt(scan), 400, deadline=deadline
         )
-        
-        ai_response = response.choices[0].message.content.strip()
-        
         try:
-            result = json.loads(ai_response)
-            return result.get("summary", "AI analysis completed")
+            summary = json.loads(ai_response).get("summary", "AI analysis completed")
         except json.JSONDecodeError:
-            return ai_response
-            
-    except Exception as e:
+            summary = ai_response
+    except asyncio.TimeoutError:
+        outcome = "timeout"
+    except Exception:
         # OpenAI API error - fallback to heuristic summary
-        return summarize_logs_heuristic(text)
+        outcome = "error"
+    record_ai_call("log_summary", None, outcome, time.perf_counter() - start)
+    return summary if summary is not None else summarize_logs_heuristic(scan=scan)
 
-def summarize_logs_heuristic(text: str) -> str:
+def summarize_logs_heuristic(text: str = None, scan: dict = None) -> str:
     """Fallback heuristic log summarization"""
-    top = sorted(
-        (
-            (m.group(0), len(m.group(0)))
-            for m in re.finditer(r"(ERROR|CRIT|ALARM).+", text)
-        ),
-        key=lambda x: -x[1],
-    )
-    return f"Top incidents (heuristic analysis): {min(len(top),5)} lines flagged."
-
-def extract_incidents(log_text: str) -> dict:
-    """Extract incident patterns from syslog text"""
-    patterns = {
-        "critical_errors": re.findall(r"CRIT.*", log_text),
-        "errors": re.findall(r"ERROR.*", log_text),
-        "alarms": re.findall(r"ALARM.*", log_text),
-        "warnings": re.findall(r"WARN.*", log_text),
-    }
+    if scan is None:
+        scan = scan_log_text(text)
+    summary = f"Top incidents (heuristic analysis): {min(scan['flagged_lines'], 5)} lines flagged."
+    top = incident_templates(scan["templates"])[:HEURISTIC_TEMPLATES]
+    if top:
+        summary += " Most frequent incident events: " + "; ".join(
+            f"[{t['level']}] {t['template']} (x{t['count']:,})" for t in top
+        ) + "."
+    return summary
+
+def extract_incidents(log_text: str = None, scan: dict = None) -> dict:
+    """Blocking aextract_incidents for callers without a running event loop"""
+    return asyncio.run(aextract_incidents(log_text, scan))
+
+async def aextract_incidents(log_text: str = None, scan: dict = None) -> dict:
+    """Extract incident patterns from syslog text in a single scan"""
+    if scan is None:
+        scan = await asyncio.to_thread(scan_log_text, log_text)
 
     return {
-        "summary": summarize_logs(log_text),
-        "incident_counts": {k: len(v) for k, v in patterns.items()},
-        "top_incidents": patterns,
+        "summary": await asummarize_logs(scan=scan),
+        "incident_counts": scan["incident_counts"],
+        "top_incidents": scan["top_incidents"],
+        "severity_buckets": scan["severity_buckets"],
+        "templates": scan["templates"],
     }
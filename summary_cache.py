@@ -0,0 +1,82 @@
+import hashlib
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, select
+
+from storage import SummaryCache
+import storage
+
+# How long cached LLM summaries stay valid; 0 disables expiry
+SUMMARY_CACHE_TTL_HOURS = float(os.getenv("SUMMARY_CACHE_TTL_HOURS", "168"))
+
+
+def prompt_hash(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+def cache_key(kind: str, model: str, prompt: str, upload_id: int | None = None) -> str:
+    return f"{kind}:{upload_id if upload_id is not None else '-'}:{model}:{prompt_hash(prompt)}"
+
+
+def get_cached_summary(kind: str, model: str, prompt: str, upload_id: int | None = None) -> str | None:
+    """Cached response for this prompt, or None when missing or expired"""
+    table = SummaryCache.__table__
+    query = select(table.c.payload, table.c.expires_at).where(
+        table.c.cache_key == cache_key(kind, model, prompt, upload_id)
+    )
+    with storage.engine.connect() as conn:
+        row = conn.execute(query).first()
+    if row is None:
+        return None
+    if row.expires_at is not None and row.expires_at <= datetime.utcnow():
+        return None
+    return row.payload
+
+
+def store_summary(
+    kind: str,
+    model: str,
+    prompt: str,
+    payload: str,
+    upload_id: int | None = None,
+    ttl_hours: float = SUMMARY_CACHE_TTL_HOURS,
+) -> None:
+    """Insert or replace the cached response for this prompt"""
+    table = SummaryCache.__table__
+    key = cache_key(kind, model, prompt, upload_id)
+    now = datetime.utcnow()
+
+    def write(conn):
+        conn.execute(delete(table).where(table.c.cache_key == key))
+        conn.execute(
+            table.insert().values(
+                cache_key=key,
+                kind=kind,
+                model=model,
+                prompt_hash=prompt_hash(prompt),
+                upload_id=upload_id,
+                payload=payload,
+                created_at=now,
+                expires_at=now + timedelta(hours=ttl_hours) if ttl_hours else None,
+            )
+        )
+
+    storage.writer.run(write)
+
+
+def invalidate_summaries(upload_id: int | None = None, kind: str | None = None) -> int:
+    """Delete cached summaries of one upload and/or kind (everything if both are None)"""
+    table = SummaryCache.__table__
+    stmt = delete(table)
+    if upload_id is not None:
+        stmt = stmt.where(table.c.upload_id == upload_id)
+    if kind is not None:
+        stmt = stmt.where(table.c.kind == kind)
+    return storage.writer.run(lambda conn: conn.execute(stmt).rowcount)
+
+
+def purge_expired_summaries() -> int:
+    table = SummaryCache.__table__
+    stmt = delete(table).where(table.c.expires_at <= datetime.utcnow())
+    return storage.writer.run(lambda conn: conn.execute(stmt).rowcount)
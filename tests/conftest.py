@@ -0,0 +1,13 @@
+import pytest
+from sqlmodel import SQLModel
+
+import storage
+
+
+@pytest.fixture
+def temp_engine(tmp_path, monkeypatch):
+    engine = storage.create_storage_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setattr(storage, "engine", engine)
+    SQLModel.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
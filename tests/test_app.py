@@ -0,0 +1,165 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def client(temp_engine):
+    import app
+
+    return TestClient(app.app)
+
+
+def test_upload_rejects_non_csv(client):
+    response = client.post("/upload", files={"file": ("kpis.txt", b"a,b\n1,2\n")})
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Only CSV files are supported"}
+
+
+def test_upload_reports_missing_model(client, tmp_path, monkeypatch):
+    import app
+
+    monkeypatch.setattr(app, "MODEL_PATH", str(tmp_path / "missing.joblib"))
+    response = client.post("/upload", files={"file": ("kpis.csv", b"a,b\n1,2\n")}, data={"train_if_missing": "false"})
+    assert response.status_code == 400
+    assert "model missing" in response.json()["error"]
+
+
+def _wait_for_result(client, job_id):
+    # Polled like the upload form does, until the job finishes either way
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        response = client.get(f"/jobs/{job_id}/result")
+        if response.status_code != 202:
+            return response
+        time.sleep(0.05)
+    raise AssertionError("job did not finish")
+
+
+def test_bad_upload_fails_its_job_and_is_not_listed(client):
+    response = client.post("/upload", files={"file": ("kpis.csv", b"cell_id,timestamp\nCELL001,2024-01-01\n")})
+    assert response.status_code == 202
+    accepted = response.json()
+
+    result = _wait_for_result(client, accepted["job_id"])
+    assert result.status_code == 500
+    assert "Missing required columns" in result.json()["detail"]
+    job = client.get(accepted["status_url"]).json()
+    assert job["status"] == "failed"
+    assert "Missing required columns" in job["error"]
+    assert accepted["upload_id"] not in [u["id"] for u in client.get("/uploads/api").json()]
+
+
+def test_upload_failing_after_persist_leaves_no_scores(client, monkeypatch):
+    import pipeline
+    from storage import get_upload_summary, load_upload_frame
+
+    def fail(upload_id, stats):
+        raise RuntimeError("stats backend down")
+
+    monkeypatch.setattr(pipeline, "finish_upload_stats", fail)
+    rows = "".join(f"CELL{i % 2:03d},2024-01-01 00:{i:02d}:00,{40 + i},120,50.5,0.02\n" for i in range(20))
+    csv = ("cell_id,timestamp,PRB_Util,RRC_Conn,Throughput_Mbps,BLER\n" + rows).encode()
+    accepted = client.post("/upload", files={"file": ("kpis.csv", csv)}).json()
+
+    result = _wait_for_result(client, accepted["job_id"])
+    assert "stats backend down" in result.json()["detail"]
+    upload_id = accepted["upload_id"]
+    assert get_upload_summary(upload_id) is None
+    assert load_upload_frame(upload_id).empty
+    assert upload_id not in [u["id"] for u in client.get("/uploads/api").json()]
+
+
+def test_ai_summary_page_renders_fallback(client):
+    import pandas as pd
+
+    from storage import bulk_insert_scores
+
+    # One anomaly in five samples, with every KPI the page summarises
+    bulk_insert_scores(
+        1,
+        pd.DataFrame(
+            {
+                "cell_id": ["CELL001", "CELL001", "CELL002", "CELL002", "CELL002"],
+                "timestamp": pd.date_range("2024-01-01", periods=5, freq="min"),
+                "anomaly": [-1, 1, 1, 1, 1],
+                "score": [-0.1, 0.1, 0.1, 0.1, 0.1],
+                "PRB_Util": [95.0, 50.0, 40.0, 45.0, 55.0],
+                "RRC_Conn": 100.0,
+                "Throughput_Mbps": 50.0,
+                "BLER": 0.01,
+            }
+        ),
+    )
+    page = client.get("/ai-summary/1").text
+    assert "Analysis Error" not in page
+    assert "20.0%" in page
+
+
+def test_pdf_download_survives_render_forgotten_concurrently(client, tmp_path, monkeypatch):
+    import app
+    from artifact_store import LocalArtifactStore
+
+    store = LocalArtifactStore(str(tmp_path / "artifacts"))
+    pdf = tmp_path / "report.pdf"
+    pdf.write_bytes(b"%PDF-1.4 test")
+    info = store.put_file(app.pdf_key(7), str(pdf), "application/pdf")
+    monkeypatch.setattr(app, "artifact_store", store)
+
+    # Another download finishes and forgets the render between our status and future lookups
+    cached = iter([None, info])
+    monkeypatch.setattr(app, "cached_pdf", lambda *args: next(cached))
+    monkeypatch.setattr(app.pdf_renderer, "status", lambda key: {"status": "running"})
+    monkeypatch.setattr(app.pdf_renderer, "future", lambda key: None)
+
+    response = client.get("/pdf/7")
+    assert response.status_code == 200
+    assert response.headers["etag"] == f'"{info["digest"]}"'
+
+
+def test_pdf_render_gets_the_summary_made_on_the_app_loop(client, monkeypatch):
+    from concurrent.futures import Future
+
+    import pandas as pd
+
+    import app
+    from storage import bulk_insert_scores
+
+    bulk_insert_scores(
+        8,
+        pd.DataFrame(
+            {
+                "cell_id": ["CELL001"] * 4,
+                "timestamp": pd.date_range("2024-01-01", periods=4, freq="min"),
+                "anomaly": [-1, 1, 1, 1],
+                "score": [-0.1, 0.1, 0.1, 0.1],
+            }
+        ),
+    )
+    submitted = []
+
+    def submit(key, *args):
+        submitted.append(args)
+        future = Future()
+        future.set_result(None)
+        return future
+
+    monkeypatch.setattr(app.pdf_renderer, "submit", submit)
+    assert client.get("/pdf/8").status_code == 404
+    upload_id, log_upload_id, window_seconds, ai_summary = submitted[0]
+    assert (upload_id, log_upload_id) == (8, None)
+    assert ai_summary["ai_generated"] is False
+    assert "25.0%" in ai_summary["summary"]
+
+
+def test_etag_matches_parses_if_none_match_lists():
+    from app import etag_matches
+
+    etag = '"abc123"'
+    assert etag_matches('"abc123"', etag)
+    assert etag_matches('"old", W/"abc123"', etag)
+    assert etag_matches(" * ", etag)
+    assert not etag_matches('"abc1234"', etag)
+    assert not etag_matches('"xabc123", "abc"', etag)
+    assert not etag_matches("", etag)
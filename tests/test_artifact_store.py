@@ -0,0 +1,87 @@
+import os
+
+import pytest
+
+from artifact_store import ArtifactStore, LocalArtifactStore, create_artifact_store, sniff_content_type
+
+
+def _write(path, data: bytes) -> str:
+    with open(path, "wb") as f:
+        f.write(data)
+    return str(path)
+
+
+def test_put_get_dedupes_by_content(tmp_path):
+    store = LocalArtifactStore(str(tmp_path / "store"))
+    src = _write(tmp_path / "a.png", b"\x89PNG\r\n\x1a\n" + b"x" * 100)
+
+    info = store.put_file("chart/1", src, "image/png", upload_id=1)
+    again = store.put_file("chart/2", src, "image/png", upload_id=2)
+    assert info["digest"] == again["digest"]
+    assert store.stats()["objects"] == 1
+    assert store.stats()["refs"] == 2
+
+    assert store.get("chart/1")["upload_id"] == 1
+    path = store.open_path(info["digest"])
+    assert open(path, "rb").read() == open(src, "rb").read()
+    assert sniff_content_type(path) == "image/png"
+    assert os.path.exists(src)
+
+    store.delete("chart/1")
+    assert store.get("chart/1") is None
+    assert store.get("missing") is None
+
+
+def test_eviction_prefers_unreferenced_then_oldest(tmp_path):
+    store = LocalArtifactStore(str(tmp_path / "store"), max_bytes=250)
+    old = store.put_file("pdf/1", _write(tmp_path / "1", b"1" * 100), "application/pdf")
+    # Replacing pdf/1 leaves the first object unreferenced
+    store.put_file("pdf/1", _write(tmp_path / "2", b"2" * 100), "application/pdf")
+    os.utime(store.open_path(store.get("pdf/1")["digest"]), (1, 1))
+    store.put_file("pdf/2", _write(tmp_path / "3", b"3" * 100), "application/pdf")
+
+    assert store.open_path(old["digest"]) is None
+    assert store.get("pdf/1") is not None
+    assert store.stats()["size_bytes"] == 200
+
+    # Over budget again: the least recently used referenced object goes, with its ref
+    os.utime(store.open_path(store.get("pdf/1")["digest"]), (1, 1))
+    store.put_file("pdf/3", _write(tmp_path / "4", b"4" * 100), "application/pdf")
+    assert store.get("pdf/1") is None
+    assert store.get("pdf/2") is not None
+    assert store.get("pdf/3") is not None
+
+
+def test_directories_are_created_on_first_write(tmp_path):
+    store = LocalArtifactStore(str(tmp_path / "store"))
+    assert not os.path.exists(tmp_path / "store")
+    assert store.get("chart/1") is None
+    assert store.stats()["objects"] == 0 and store.stats()["refs"] == 0
+
+    store.put_file("chart/1", _write(tmp_path / "a", b"a"), "image/png")
+    assert os.path.isdir(tmp_path / "store" / "refs")
+
+
+def test_eviction_keeps_a_running_size_total(tmp_path, monkeypatch):
+    store = LocalArtifactStore(str(tmp_path / "store"), max_bytes=250)
+    scans = []
+    scan = store._scan_objects
+    monkeypatch.setattr(store, "_scan_objects", lambda: scans.append(1) or scan())
+
+    store.put_file("pdf/1", _write(tmp_path / "1", b"1" * 100), "application/pdf")
+    store.put_file("pdf/2", _write(tmp_path / "2", b"2" * 100), "application/pdf")
+    assert len(scans) == 1
+    # Crossing the budget re-reads the directory before evicting
+    store.put_file("pdf/3", _write(tmp_path / "3", b"3" * 100), "application/pdf")
+    assert len(scans) == 2
+    assert store.stats()["size_bytes"] == 200
+
+
+def test_artifact_store_is_abstract():
+    with pytest.raises(TypeError):
+        ArtifactStore()
+
+
+def test_unknown_backend(tmp_path):
+    with pytest.raises(ValueError):
+        create_artifact_store("s3", root=str(tmp_path))
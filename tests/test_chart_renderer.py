@@ -0,0 +1,89 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+import chart_renderer
+from artifact_store import LocalArtifactStore, sniff_content_type
+from chart_renderer import chart_key, render_upload_chart
+from render_pool import RenderPool
+from storage import bulk_insert_scores, upload_frames
+
+
+def _store_scores(upload_id: int, n: int = 20):
+    df = pd.DataFrame(
+        {
+            "cell_id": ["CELL001"] * n,
+            "timestamp": pd.date_range("2024-01-01", periods=n, freq="min"),
+            "anomaly": [-1 if i % 5 == 0 else 1 for i in range(n)],
+            "score": [0.0] * n,
+            "PRB_Util": [float(i) for i in range(n)],
+            "RRC_Conn": [100.0] * n,
+            "Throughput_Mbps": [50.0] * n,
+            "BLER": [0.01] * n,
+        }
+    )
+    bulk_insert_scores(upload_id, df)
+
+
+def _use_store(tmp_path, monkeypatch) -> LocalArtifactStore:
+    store = LocalArtifactStore(str(tmp_path / "artifacts"))
+    monkeypatch.setattr(chart_renderer, "artifact_store", store)
+    upload_frames.clear()
+    return store
+
+
+def test_render_upload_chart_stores_png(temp_engine, tmp_path, monkeypatch):
+    store = _use_store(tmp_path, monkeypatch)
+    _store_scores(3)
+
+    info = render_upload_chart(3)
+    assert info["key"] == chart_key(3)
+    assert info["chart_mode"] == "full"
+    assert store.get(chart_key(3))["digest"] == info["digest"]
+    assert sniff_content_type(store.open_path(info["digest"])) == "image/png"
+
+    assert render_upload_chart(99) is None
+    assert store.get(chart_key(99)) is None
+
+
+def test_render_pool_status(temp_engine, tmp_path, monkeypatch):
+    _use_store(tmp_path, monkeypatch)
+    _store_scores(4)
+    renderer = RenderPool(render_upload_chart, workers=1)
+    # Threads stand in for the spawn pool, which would not see the test database
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(renderer, "_pool", lambda: executor)
+
+    assert renderer.status(4) is None
+    renderer.submit(4, 4).result()
+    assert renderer.submit(4, 4).result()["key"] == chart_key(4)
+    assert renderer.status(4)["status"] == "done"
+    renderer.submit(98, 98).result()
+    assert renderer.status(98)["status"] == "missing"
+
+    renderer.forget(4)
+    assert renderer.status(4) is None
+    executor.shutdown()
+
+
+def test_render_pool_drops_oldest_finished_renders():
+    renderer = RenderPool(str, workers=1, finished_kept=2)
+    executor = ThreadPoolExecutor(max_workers=1)
+    renderer._pool = lambda: executor
+
+    def render(key):
+        renderer.submit(key, key).result()
+        # Done callbacks run on the worker after result() wakes us; let them finish
+        executor.submit(int).result()
+
+    for key in range(3):
+        render(key)
+
+    assert renderer.status(0) is None
+    assert renderer.status(1)["status"] == renderer.status(2)["status"] == "done"
+    # Resubmitting a kept key refreshes it rather than adding a second entry
+    render(1)
+    render(3)
+    assert renderer.status(2) is None
+    assert renderer.status(1) is not None
+    executor.shutdown()
@@ -0,0 +1,53 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import charts
+from charts import lttb_indices, save_kpi_chart
+
+
+def test_lttb_keeps_endpoints_and_spikes():
+    x = np.arange(10_000, dtype=float)
+    y = np.zeros_like(x)
+    y[4321] = 100.0
+    keep = lttb_indices(x, y, 100)
+    assert len(keep) == 100
+    assert keep[0] == 0 and keep[-1] == len(x) - 1
+    assert np.all(np.diff(keep) > 0)
+    assert 4321 in keep
+
+
+def test_lttb_returns_everything_for_short_series():
+    x = np.arange(50, dtype=float)
+    assert list(lttb_indices(x, x, 100)) == list(range(50))
+
+
+def test_chart_mode_selection(monkeypatch):
+    monkeypatch.setattr(charts, "LTTB_THRESHOLD", 10)
+    monkeypatch.setattr(charts, "DENSITY_THRESHOLD", 100)
+    assert charts._chart_mode(10, "auto") == "full"
+    assert charts._chart_mode(11, "auto") == "lttb"
+    assert charts._chart_mode(101, "auto") == "density"
+    assert charts._chart_mode(101, "full") == "full"
+    with pytest.raises(ValueError):
+        charts._chart_mode(1, "bogus")
+
+
+@pytest.mark.parametrize("mode", ["full", "lttb", "density"])
+def test_save_kpi_chart_modes(tmp_path, mode):
+    rng = np.random.default_rng(0)
+    n = 3_000
+    df = pd.DataFrame(
+        {
+            "PRB_Util": rng.uniform(0, 100, n),
+            "RRC_Conn": rng.uniform(50, 500, n),
+            "Throughput_Mbps": rng.uniform(1, 120, n),
+            "BLER": rng.uniform(0, 0.1, n),
+            "anomaly": np.where(rng.random(n) < 0.05, -1, 1),
+        }
+    )
+    path = tmp_path / f"chart_{mode}.png"
+    assert save_kpi_chart(df, str(path), mode=mode) == mode
+    assert os.path.getsize(path) > 0
@@ -0,0 +1,93 @@
+import io
+
+import pandas as pd
+import pytest
+
+from correlation import correlate_frames, correlate_upload
+from features import iter_kpi_csv
+from log_scanner import scan_log_stream
+from log_store import LogEventWriter, create_log_upload, finish_log_upload
+from storage import bulk_insert_scores
+
+LOG = b"""2024-01-01 10:00:50 ERROR Connection timeout to db 10.0.0.1
+2024-01-01 10:03:00 INFO Backup completed
+2024-01-01 10:09:30 ALARM CPU usage exceeded threshold
+"""
+
+
+def _frames():
+    anomalies = pd.DataFrame(
+        {"ts": pd.to_datetime(["2024-01-01 10:01:00", "2024-01-01 10:05:00", "2024-01-01 10:10:00"])}
+    )
+    events = pd.DataFrame(
+        {
+            "event_id": [1, 2, 3],
+            "event_ts": pd.to_datetime(["2024-01-01 10:00:50", "2024-01-01 10:00:55", "2024-01-01 10:09:30"]),
+        }
+    )
+    return anomalies, events
+
+
+def test_correlate_frames_nearest_within_window():
+    anomalies, events = _frames()
+    matched = correlate_frames(anomalies, events, window_seconds=60)
+    assert matched["event_id"].tolist()[0] == 2
+    assert pd.isna(matched["event_id"].iloc[1])
+    assert matched["event_id"].iloc[2] == 3
+    assert matched["lag_seconds"].iloc[2] == -30
+    assert matched["events_in_window"].tolist() == [2, 0, 1]
+
+
+def test_correlate_frames_forward_and_bad_direction():
+    anomalies, events = _frames()
+    matched = correlate_frames(anomalies, events, window_seconds=60, direction="forward")
+    assert matched["event_id"].isna().all()
+    with pytest.raises(ValueError):
+        correlate_frames(anomalies, events, direction="sideways")
+
+
+def test_correlate_upload(temp_engine):
+    df = pd.DataFrame(
+        {
+            "cell_id": ["A", "A", "B"],
+            "timestamp": pd.to_datetime(["2024-01-01 10:01:00", "2024-01-01 10:05:00", "2024-01-01 10:10:00"]),
+            "anomaly": [-1, 1, -1],
+            "score": [-0.2, 0.1, -0.1],
+        }
+    )
+    bulk_insert_scores(1, df)
+    log_upload_id = create_log_upload("test.log")
+    scan = scan_log_stream(io.BytesIO(LOG), event_sink=LogEventWriter(log_upload_id))
+    finish_log_upload(log_upload_id, scan)
+
+    result = correlate_upload(1, log_upload_id, window_seconds=60)
+    assert result["anomalies"] == 2
+    assert result["correlated_anomalies"] == 2
+    assert result["by_severity"] == {"error": 1, "alarm": 1}
+    assert result["matches"][0]["cell_id"] == "A"
+    assert result["matches"][0]["message"] == "Connection timeout to db 10.0.0.1"
+    assert result["by_template"][0]["template"] is not None
+
+    assert correlate_upload(99, log_upload_id) is None
+
+
+def test_correlate_offset_kpi_upload_with_utc_logs(temp_engine, tmp_path):
+    csv = tmp_path / "kpis.csv"
+    csv.write_text(
+        "cell_id,timestamp,PRB_Util,RRC_Conn,Throughput_Mbps,BLER\n"
+        "A,2024-01-01T12:01:00+02:00,90,100,5,0.2\n"
+        "A,2024-01-01T12:05:00+02:00,40,100,50,0.01\n"
+        "B,2024-01-01T10:10:00Z,95,100,4,0.3\n"
+    )
+    for chunk in iter_kpi_csv(str(csv)):
+        bulk_insert_scores(1, chunk.assign(anomaly=[-1, 1, -1], score=[-0.2, 0.1, -0.1]))
+    log = b"""2024-01-01T10:00:50Z ERROR Connection timeout to db 10.0.0.1
+2024-01-01T11:09:30+01:00 ALARM CPU usage exceeded threshold
+"""
+    log_upload_id = create_log_upload("test.log")
+    finish_log_upload(log_upload_id, scan_log_stream(io.BytesIO(log), event_sink=LogEventWriter(log_upload_id)))
+
+    result = correlate_upload(1, log_upload_id, window_seconds=60)
+    assert result["correlated_anomalies"] == 2
+    assert [m["timestamp"] for m in result["matches"]] == ["2024-01-01 10:01:00", "2024-01-01 10:10:00"]
+    assert [m["lag_seconds"] for m in result["matches"]] == [-10.0, -30.0]
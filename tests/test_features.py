@@ -1,5 +1,6 @@
 import pandas as pd
-from features import to_matrix, FEATURES, load_kpi_csv
+import pytest
+from features import to_matrix, FEATURES, load_kpi_csv, iter_kpi_csv, sample_kpi_csv
 import tempfile
 import os
 
@@ -30,3 +31,55 @@ CELL002,2024-01-01 10:00:00,52.3,140,24.8,0.01"""
         assert pd.api.types.is_datetime64_any_dtype(df["timestamp"])
     finally:
         os.unlink(temp_path)
+
+
+def test_iter_kpi_csv_chunks():
+    csv_content = """cell_id,timestamp,PRB_Util,RRC_Conn,Throughput_Mbps,BLER,extra
+CELL001,2024-01-01 10:00:00,45.2,150,25.5,0.02,x
+CELL001,2024-01-01 10:01:00,,155,26.1,0.03,x
+CELL002,2024-01-01 10:00:00,52.3,140,24.8,0.01,x
+CELL002,2024-01-01 10:01:00,50.1,141,24.1,0.02,x
+CELL003,2024-01-01 10:00:00,47.9,139,25.0,0.01,x"""
+
+    with tempfile.NamedTemporaryFile(mode="w", suffix=".csv", delete=False) as f:
+        f.write(csv_content)
+        temp_path = f.name
+
+    try:
+        chunks = list(iter_kpi_csv(temp_path, chunksize=2))
+        assert [len(c) for c in chunks] == [1, 2, 1]
+        df = pd.concat(chunks)
+        assert list(df.index) == [0, 2, 3, 4]
+        assert "extra" not in df.columns
+        assert pd.api.types.is_datetime64_any_dtype(df["timestamp"])
+        assert all(df[col].dtype == "float64" for col in FEATURES)
+
+        sample = sample_kpi_csv(temp_path, max_rows=2, chunksize=2)
+        assert len(sample) == 2
+        assert set(sample.index) <= {0, 2, 3, 4}
+    finally:
+        os.unlink(temp_path)
+
+
+def test_iter_kpi_csv_converts_offsets_to_naive_utc(tmp_path):
+    path = tmp_path / "kpis.csv"
+    path.write_text(
+        "cell_id,timestamp,PRB_Util,RRC_Conn,Throughput_Mbps,BLER\n"
+        "CELL001,2024-01-01T12:00:00+02:00,45.2,150,25.5,0.02\n"
+        "CELL001,2024-01-01T10:01:00Z,48.1,155,26.1,0.03\n"
+    )
+    df = next(iter_kpi_csv(str(path)))
+    assert df["timestamp"].dt.tz is None
+    assert df["timestamp"].astype(str).tolist() == ["2024-01-01 10:00:00", "2024-01-01 10:01:00"]
+
+
+def test_iter_kpi_csv_missing_columns():
+    with tempfile.NamedTemporaryFile(mode="w", suffix=".csv", delete=False) as f:
+        f.write("cell_id,timestamp,PRB_Util\nCELL001,2024-01-01 10:00:00,45.2\n")
+        temp_path = f.name
+
+    try:
+        with pytest.raises(ValueError):
+            next(iter_kpi_csv(temp_path))
+    finally:
+        os.unlink(temp_path)
@@ -0,0 +1,43 @@
+import time
+
+from job_queue import JobQueue
+
+
+def wait_for(job, timeout=5.0):
+    deadline = time.time() + timeout
+    while not job.done and time.time() < deadline:
+        time.sleep(0.01)
+    return job
+
+
+def test_job_reports_stages_and_result():
+    queue = JobQueue(workers=1)
+
+    def work(job, n):
+        with job.stage("parse"):
+            pass
+        with job.stage("score"):
+            job.update(rows_processed=n)
+        return {"rows": n}
+
+    job = wait_for(queue.submit("test", work, 3, stages=["parse", "score", "chart"]))
+    queue.shutdown()
+
+    status = job.to_dict()
+    assert status["status"] == "completed"
+    assert job.result == {"rows": 3}
+    assert status["progress"] == {"rows_processed": 3}
+    assert [s["status"] for s in status["stages"]] == ["done", "done", "pending"]
+
+
+def test_failed_job_records_error():
+    queue = JobQueue(workers=1)
+
+    def work(job):
+        raise ValueError("bad input")
+
+    job = wait_for(queue.submit("test", work))
+    queue.shutdown()
+
+    assert job.status == "failed"
+    assert job.error == "bad input"
@@ -0,0 +1,115 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from kpi_stats import KpiStatsAccumulator, anomaly_severity, compute_kpi_stats, get_upload_stats, refresh_upload_stats
+import storage
+from storage import bulk_insert_scores, upload_frames
+
+
+def _frame(n: int = 100) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(
+        {
+            "cell_id": [f"CELL{i % 4:03d}" for i in range(n)],
+            "timestamp": pd.date_range("2024-01-01", periods=n, freq="min"),
+            "anomaly": [-1 if i % 20 in (3, 7) else 1 for i in range(n)],
+            "score": rng.normal(0, 0.1, n),
+            "PRB_Util": rng.uniform(0, 100, n),
+            "RRC_Conn": rng.uniform(0, 500, n),
+            "Throughput_Mbps": rng.uniform(0, 200, n),
+            "BLER": rng.uniform(0, 0.1, n),
+        }
+    )
+
+
+def test_compute_kpi_stats_matches_pandas():
+    df = _frame()
+    stats = compute_kpi_stats(df)
+    assert stats["total"] == 100
+    assert stats["anomalies"] == 10
+    assert stats["anomaly_rate"] == 10.0
+    assert stats["severity"] == "MEDIUM"
+    assert stats["missing_values"] == 0
+    assert stats["first_ts"] == "2024-01-01 00:00:00"
+    assert stats["last_ts"] == "2024-01-01 01:39:00"
+
+    prb = stats["columns"]["PRB_Util"]
+    assert prb["mean"] == pytest.approx(df["PRB_Util"].mean())
+    assert prb["std"] == pytest.approx(df["PRB_Util"].std())
+    assert prb["max"] == pytest.approx(df["PRB_Util"].max())
+    assert prb["quantiles"]["p95"] == pytest.approx(df["PRB_Util"].quantile(0.95))
+    assert stats["columns"]["BLER"]["last"] == pytest.approx(df["BLER"].iloc[-1])
+    assert "score" in stats["columns"]
+
+    # CELL003 holds every anomaly (rows 3, 7, 23, 27, ...), so it ranks first
+    assert stats["cells"] == 4
+    top = stats["per_cell"][0]
+    assert top["cell_id"] == "CELL003"
+    assert top["anomalies"] == 10 and top["total"] == 25
+    assert top["mean"]["RRC_Conn"] == pytest.approx(df[df["cell_id"] == "CELL003"]["RRC_Conn"].mean())
+
+
+def test_compute_kpi_stats_empty_and_partial():
+    stats = compute_kpi_stats(_frame().iloc[:0])
+    assert stats["total"] == 0 and stats["columns"] == {} and stats["severity"] == "LOW"
+
+    partial = compute_kpi_stats(_frame()[["anomaly", "score", "BLER"]])
+    assert set(partial["columns"]) == {"BLER", "score"}
+    assert partial["per_cell"] == [] and partial["first_ts"] is None
+
+
+def test_accumulated_stats_match_one_pass():
+    df = _frame()
+    df.loc[5, "BLER"] = np.nan
+    expected = compute_kpi_stats(df)
+    stats = KpiStatsAccumulator()
+    for start in range(0, len(df), 30):
+        stats.add(df.iloc[start:start + 30])
+    result = stats.result()
+
+    assert [c["cell_id"] for c in result["per_cell"]] == [c["cell_id"] for c in expected["per_cell"]]
+    for cell, expected_cell in zip(result["per_cell"], expected["per_cell"]):
+        assert cell["mean"] == pytest.approx(expected_cell["mean"])
+        assert (cell["total"], cell["anomalies"]) == (expected_cell["total"], expected_cell["anomalies"])
+    assert result["first_ts"] == expected["first_ts"] and result["last_ts"] == expected["last_ts"]
+    assert result["missing_values"] == expected["missing_values"] == 1
+    for col, column_stats in expected["columns"].items():
+        column_stats = dict(column_stats)
+        assert result["columns"][col]["quantiles"] == pytest.approx(column_stats.pop("quantiles"))
+        assert {k: v for k, v in result["columns"][col].items() if k != "quantiles"} == pytest.approx(column_stats)
+
+    # A sample smaller than the upload still gives close quantiles
+    sampled = KpiStatsAccumulator(sample_rows=50)
+    sampled.add(df)
+    p50 = sampled.result()["columns"]["PRB_Util"]["quantiles"]["p50"]
+    assert p50 == pytest.approx(df["PRB_Util"].median(), abs=15)
+
+
+def test_anomaly_severity():
+    assert anomaly_severity(10.5) == "HIGH"
+    assert anomaly_severity(10) == "MEDIUM"
+    assert anomaly_severity(5) == "LOW"
+
+
+def test_upload_stats_are_persisted_and_invalidated(temp_engine):
+    upload_frames.clear()
+    df = _frame()
+    bulk_insert_scores(1, df)
+    assert refresh_upload_stats(1)["total"] == 100
+    assert get_upload_stats(1)["anomalies"] == 10
+
+    # New scores drop the stored stats; the next read recomputes them
+    bulk_insert_scores(1, df.iloc[:10])
+    assert get_upload_stats(1)["total"] == 110
+    assert get_upload_stats(2) is None
+
+
+def test_upload_stats_agree_with_upload_summary(temp_engine):
+    # Midnight-only timestamps render as bare dates, which must not split the two paths
+    df = _frame(10).assign(timestamp=pd.date_range("2024-01-01", periods=10, freq="D"))
+    bulk_insert_scores(1, df)
+    stats, summary = refresh_upload_stats(1), storage.get_upload_summary(1)
+    for field in ("total", "anomalies", "first_ts", "last_ts", "cells"):
+        assert stats[field] == summary[field]
+    assert round(stats["anomaly_rate"], 2) == summary["anomaly_rate"]
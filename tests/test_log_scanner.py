@@ -0,0 +1,140 @@
+import gzip
+import io
+import os
+import re
+import tempfile
+
+import pytest
+import zstandard
+
+import log_scanner
+from log_scanner import LogScanner, normalize_timestamp, parse_line, scan_log_file, scan_log_stream, scan_log_text
+from summarize import extract_incidents
+
+SAMPLE_LOG = """2024-01-01 10:00:00 INFO System backup completed
+2024-01-01 10:01:00 WARN High memory usage detected: 85%
+2024-01-01 10:02:00 ERROR Connection timeout to database server
+2024-01-01T10:03:00Z [CRIT] System failure: Network interface down
+Jan  1 10:04:00 enb01 oam[42]: ALARM CPU usage exceeded threshold
+2024-01-01 10:05:00 ERROR
+free text line mentioning WARN and ERROR twice
+"""
+
+
+def test_parse_line_formats():
+    assert parse_line("2024-01-01 10:00:00 ERROR Connection timeout") == (
+        "2024-01-01 10:00:00",
+        "ERROR",
+        "Connection timeout",
+    )
+    assert parse_line("2024-01-01T10:03:00Z [CRIT] down") == ("2024-01-01T10:03:00Z", "CRIT", "down")
+    ts, level, msg = parse_line("Jan  1 10:04:00 enb01 oam[42]: ALARM CPU high")
+    assert ts == "Jan  1 10:04:00"
+    assert level is None
+    assert msg.startswith("enb01")
+    assert parse_line("no structure here") == (None, None, "no structure here")
+
+
+def test_scan_matches_findall_counts():
+    result = scan_log_text(SAMPLE_LOG)
+    for category, keyword in [
+        ("critical_errors", "CRIT"),
+        ("errors", "ERROR"),
+        ("alarms", "ALARM"),
+        ("warnings", "WARN"),
+    ]:
+        expected = re.findall(keyword + r".*", SAMPLE_LOG)
+        assert result["incident_counts"][category] == len(expected)
+        assert result["top_incidents"][category] == expected
+
+    flagged = len(re.findall(r"(ERROR|CRIT|ALARM).+", SAMPLE_LOG))
+    assert result["flagged_lines"] == flagged
+    assert result["total_lines"] == 7
+    assert result["severity_buckets"]["error"] == 2
+    assert result["severity_buckets"]["unknown"] == 2
+    assert result["first_timestamp"] == "2024-01-01 10:00:00"
+    assert result["last_timestamp"] == "2024-01-01 10:05:00"
+
+
+def test_scan_without_line_parsing_keeps_incident_aggregates():
+    full = scan_log_text(SAMPLE_LOG)
+    scanner = LogScanner(mine_templates=False, parse_lines=False)
+    scanner.feed(SAMPLE_LOG)
+    result = scanner.result()
+    for key in ("total_lines", "incident_counts", "top_incidents", "flagged_lines", "head"):
+        assert result[key] == full[key]
+    assert result["severity_buckets"] is None
+    assert result["first_timestamp"] is None
+
+    parsed = LogScanner(mine_templates=False)
+    parsed.feed(SAMPLE_LOG)
+    for key in ("severity_buckets", "first_timestamp", "last_timestamp"):
+        assert parsed.result()[key] == full[key]
+
+
+def test_scan_log_file_matches_text_and_bounds_examples():
+    with tempfile.NamedTemporaryFile(mode="w", suffix=".log", delete=False) as f:
+        f.write(SAMPLE_LOG * 50)
+        temp_path = f.name
+
+    try:
+        result = scan_log_file(temp_path, top_per_category=3)
+        assert result["incident_counts"] == scan_log_text(SAMPLE_LOG * 50)["incident_counts"]
+        assert all(len(v) <= 3 for v in result["top_incidents"].values())
+    finally:
+        os.unlink(temp_path)
+
+
+def test_extract_incidents_keeps_response_shape():
+    incidents = extract_incidents(SAMPLE_LOG)
+    assert set(incidents) >= {"summary", "incident_counts", "top_incidents", "severity_buckets"}
+    assert incidents["incident_counts"]["errors"] == 3
+
+
+def test_scan_log_stream_decompresses_and_tolerates_bad_bytes():
+    data = SAMPLE_LOG.encode()
+    expected = scan_log_text(SAMPLE_LOG)["incident_counts"]
+    for blob in (data, gzip.compress(data), zstandard.ZstdCompressor().compress(data)):
+        raw = io.BytesIO(blob)
+        assert scan_log_stream(raw)["incident_counts"] == expected
+        assert not raw.closed
+
+    bad = b"2024-01-01 10:00:00 ERROR caf\xe9\n"
+    assert scan_log_stream(io.BytesIO(bad))["incident_counts"]["errors"] == 1
+    with pytest.raises(UnicodeDecodeError):
+        scan_log_stream(io.BytesIO(bad), errors="strict")
+
+
+def test_block_scan_agrees_with_parse_line():
+    text = SAMPLE_LOG + "2024-01-01 10:06:00  [FOO] odd level\n\n2024-01-01T10:07:00+02:00 WARNING: late\n"
+    events = []
+    scanner = LogScanner(event_sink=events.extend)
+    scanner.feed(text)
+    scanner.flush()
+    lines = text.split("\n")[:-1]
+    assert [e[0] for e in events] == list(range(1, len(lines) + 1))
+    for (_, ts, level, message, _), line in zip(events, lines):
+        assert (ts, level, message) == parse_line(line)
+
+
+def test_scan_treats_cr_line_endings_like_newlines():
+    expected = scan_log_text(SAMPLE_LOG)
+    for newline in ("\r\n", "\r"):
+        text = SAMPLE_LOG.replace("\n", newline)
+        assert scan_log_text(text) == expected
+        assert scan_log_stream(io.BytesIO(text.encode())) == expected
+
+
+def test_scan_log_stream_joins_lines_across_blocks(monkeypatch):
+    monkeypatch.setattr(log_scanner, "SCAN_BLOCK_CHARS", 7)
+    expected = scan_log_text(SAMPLE_LOG * 3)
+    assert scan_log_stream(io.BytesIO((SAMPLE_LOG * 3).encode())) == expected
+
+
+def test_normalize_timestamp_converts_offsets_to_utc():
+    assert normalize_timestamp("2024-03-01T10:15:00") == "2024-03-01 10:15:00"
+    assert normalize_timestamp("2024-03-01T10:15:00.123Z") == "2024-03-01 10:15:00"
+    assert normalize_timestamp("2024-03-01T01:15:00+02:00") == "2024-02-29 23:15:00"
+    assert normalize_timestamp("2024-03-01 23:45:00,5-0530") == "2024-03-02 05:15:00"
+    assert normalize_timestamp("Mar  1 10:15:00", year=2024) == "2024-03-01 10:15:00"
+    assert normalize_timestamp(None) is None
@@ -0,0 +1,113 @@
+import io
+
+import pytest
+from sqlalchemy import event
+
+import storage
+from log_scanner import scan_log_stream
+from log_store import (
+    LogEventWriter,
+    create_log_upload,
+    finish_log_upload,
+    get_log_upload,
+    log_event_histogram,
+    query_log_events,
+)
+
+LOG = b"""2024-01-01 10:00:05 INFO Backup started
+2024-01-01 10:00:30 ERROR Connection timeout to db 10.0.0.1
+  at retry loop
+2024-01-01 10:01:10 WARN High memory usage detected: 85%
+2024-01-01T10:01:50Z ERROR Connection timeout to db 10.0.0.2
+2024-01-01 10:02:00 INFO Backup completed
+"""
+
+
+def _ingest():
+    log_upload_id = create_log_upload("test.log")
+    writer = LogEventWriter(log_upload_id)
+    scan = scan_log_stream(io.BytesIO(LOG), event_sink=writer)
+    finish_log_upload(log_upload_id, scan, "summary text")
+    return log_upload_id, writer
+
+
+def test_ingest_and_upload_record(temp_engine):
+    log_upload_id, writer = _ingest()
+    assert writer.rows_written == 6
+
+    upload = get_log_upload(log_upload_id)
+    assert upload["total_lines"] == 6
+    assert upload["first_ts"] == "2024-01-01 10:00:05"
+    assert upload["last_ts"] == "2024-01-01 10:02:00"
+    assert upload["summary"] == "summary text"
+    assert upload["scan"]["incident_counts"]["errors"] == 2
+
+
+def test_event_batches_commit_in_bulk_slices(temp_engine, monkeypatch):
+    monkeypatch.setattr(storage, "SCORE_COMMIT_ROWS", 4)
+    monkeypatch.setattr(storage, "writer", storage.WriteQueue())
+    log_upload_id = create_log_upload("test.log")
+    submitted = []
+    submit = storage.writer.submit
+    monkeypatch.setattr(storage.writer, "submit", lambda fn, bulk=False: submitted.append(bulk) or submit(fn, bulk))
+
+    writer = LogEventWriter(log_upload_id)
+    writer([(i, f"2024-01-01 10:00:{i:02d}", "INFO", f"line {i}", None) for i in range(1, 11)])
+
+    # 4 + 4 + 2 rows, each slice its own bulk commit
+    assert submitted == [True, True, True]
+    assert storage.writer.stats()["commits"] == 4
+    events, _ = query_log_events(log_upload_id, limit=20)
+    assert [e["line_no"] for e in events] == list(range(1, 11))
+    storage.writer.close()
+
+
+def test_query_events_filters_and_pages(temp_engine):
+    log_upload_id, _ = _ingest()
+
+    errors, next_cursor = query_log_events(log_upload_id, severities=["error"])
+    assert [e["line_no"] for e in errors] == [2, 5]
+    assert next_cursor is None
+
+    window, _ = query_log_events(log_upload_id, start="2024-01-01 10:00:10", end="2024-01-01 10:01:30")
+    # The continuation line inherits its parent's timestamp
+    assert [e["line_no"] for e in window] == [2, 3, 4]
+
+    seen = []
+    cursor = None
+    while True:
+        page, cursor = query_log_events(log_upload_id, limit=2, cursor=cursor)
+        seen += [e["line_no"] for e in page]
+        if cursor is None:
+            break
+    assert seen == [1, 2, 3, 4, 5, 6]
+
+    with pytest.raises(ValueError):
+        query_log_events(log_upload_id, severities=["bogus"])
+
+
+def test_histogram_per_minute(temp_engine):
+    log_upload_id, _ = _ingest()
+    buckets = log_event_histogram(log_upload_id)
+    assert [b["minute"] for b in buckets] == ["2024-01-01 10:00", "2024-01-01 10:01", "2024-01-01 10:02"]
+    assert buckets[0]["total"] == 3
+    assert buckets[1]["by_severity"] == {"warning": 1, "error": 1}
+
+
+def test_query_events_pages_through_lines_without_timestamp(temp_engine):
+    log_upload_id = create_log_upload("test.log")
+    writer = LogEventWriter(log_upload_id)
+    scan_log_stream(io.BytesIO(b"boot banner\nsecond banner\n" + LOG), event_sink=writer)
+
+    statements = []
+    event.listen(temp_engine, "before_cursor_execute", lambda conn, cur, stmt, *args: statements.append(stmt))
+    seen = []
+    cursor = None
+    while True:
+        page, cursor = query_log_events(log_upload_id, limit=1, cursor=cursor)
+        seen += [e["line_no"] for e in page]
+        if cursor is None:
+            break
+    assert seen == list(range(1, 9))
+    # NULL timestamps sort first on every backend, not just SQLite
+    assert any("NULLS FIRST" in stmt for stmt in statements)
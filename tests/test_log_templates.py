@@ -0,0 +1,43 @@
+from log_templates import TemplateMiner, mask_variables
+from log_scanner import scan_log_text
+from summarize import summarize_logs_heuristic
+
+
+def test_mask_variables():
+    assert mask_variables("timeout to 10.0.0.1 after 30s") == "timeout to <*> after <*>s"
+    assert mask_variables("ptr 0x7fff cell=12") == "ptr <*> cell=<*>"
+
+
+def test_miner_clusters_and_generalizes():
+    miner = TemplateMiner()
+    miner.add("Connection timeout to server alpha after 30s", "ERROR")
+    miner.add("Connection timeout to server beta after 45s", "ERROR")
+    miner.add("Connection timeout to server beta after 45s", "ERROR")
+    miner.add("High memory usage detected: 85%", "WARN")
+
+    top = miner.top()
+    assert len(top) == 2
+    assert top[0]["template"] == "Connection timeout to server <*> after <*>s"
+    assert top[0]["count"] == 3
+    assert top[0]["level"] == "ERROR"
+    assert ["beta", "45s"] in top[0]["examples"]
+
+
+def test_miner_separates_levels_and_respects_cap():
+    miner = TemplateMiner(max_templates=2)
+    miner.add("link down", "ERROR")
+    miner.add("link down", "INFO")
+    assert miner.add("completely different message here", "INFO") is None
+    assert len(miner.templates) == 2
+    assert miner.unclustered == 1
+
+
+def test_scan_and_heuristic_use_templates():
+    log = "".join(
+        f"2024-01-01 10:00:{i:02d} ERROR Connection timeout to database server cell={i}\n" for i in range(20)
+    ) + "2024-01-01 10:01:00 INFO Backup completed\n"
+    scan = scan_log_text(log)
+    assert scan["template_count"] == 2
+    assert scan["templates"][0]["count"] == 20
+    summary = summarize_logs_heuristic(scan=scan)
+    assert "Connection timeout to database server cell=<*> (x20)" in summary
@@ -0,0 +1,64 @@
+import os
+import stat
+
+import model_registry
+from model_registry import ModelRegistry
+
+
+def test_registry_caches_and_hot_swaps(tmp_path):
+    registry = ModelRegistry()
+    path = str(tmp_path / "artifact.joblib")
+
+    assert registry.get(path) is None
+
+    registry.save({"version": 1}, path)
+    first = registry.get(path)
+    assert first == {"version": 1}
+    assert registry.get(path) is first
+    version = registry.info(path)["version"]
+
+    # A fresh registry simulates another process writing a new artifact
+    ModelRegistry().save({"version": 2}, path)
+    second = registry.get(path)
+    assert second == {"version": 2}
+    assert registry.info(path)["version"] != version
+
+
+def test_registry_loads_existing_file_once(tmp_path):
+    path = str(tmp_path / "artifact.joblib")
+    ModelRegistry().save([1, 2, 3], path)
+
+    registry = ModelRegistry()
+    loaded = registry.get(path)
+    assert loaded == [1, 2, 3]
+    assert registry.get(path) is loaded
+    assert registry.info(path)["model_type"] == "list"
+
+
+def test_saved_artifacts_follow_the_umask(tmp_path):
+    path = str(tmp_path / "artifact.joblib")
+    ModelRegistry().save([1], path)
+    assert stat.S_IMODE(os.stat(path).st_mode) == model_registry.FILE_MODE
+
+
+def test_model_set_swaps_all_members_at_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(model_registry, "MODEL_SET_VERSIONS_KEPT", 2)
+    root = str(tmp_path / "models")
+    registry = ModelRegistry()
+    assert registry.get_set(root) is None
+
+    registry.save_set({"classifier": "clf-1", "encoder": "enc-1"}, root)
+    first_paths = registry.set_paths(root)
+    assert registry.get_set(root) == {"classifier": "clf-1", "encoder": "enc-1"}
+
+    # Another process saves a new version; the reader switches both members together
+    ModelRegistry().save_set({"classifier": "clf-2", "encoder": "enc-2"}, root)
+    assert registry.get_set(root) == {"classifier": "clf-2", "encoder": "enc-2"}
+    # The old version stays on disk for readers mid-load, but is no longer cached
+    assert all(path not in registry._entries for path in first_paths.values())
+    assert os.path.exists(first_paths["classifier"])
+
+    ModelRegistry().save_set({"classifier": "clf-3", "encoder": "enc-3"}, root)
+    versions = [name for name in os.listdir(root) if name.startswith("v")]
+    assert len(versions) == 2
+    assert not os.path.exists(first_paths["classifier"])
@@ -0,0 +1,71 @@
+import pandas as pd
+
+import pdf_pipeline
+import summarize
+from artifact_store import LocalArtifactStore, sniff_content_type
+from pdf_pipeline import cached_pdf, pdf_key, render_pdf_report, summary_version
+from storage import bulk_insert_scores, upload_frames
+from summary_cache import invalidate_summaries, store_summary
+
+
+def _store_scores(upload_id: int, n: int = 20):
+    df = pd.DataFrame(
+        {
+            "cell_id": [f"CELL{i % 3:03d}" for i in range(n)],
+            "timestamp": pd.date_range("2024-01-01", periods=n, freq="min"),
+            "anomaly": [-1 if i % 5 == 0 else 1 for i in range(n)],
+            "score": [-0.1 if i % 5 == 0 else 0.1 for i in range(n)],
+            "PRB_Util": [float(i) for i in range(n)],
+            "RRC_Conn": [100.0] * n,
+            "Throughput_Mbps": [50.0] * n,
+            "BLER": [0.01] * n,
+        }
+    )
+    bulk_insert_scores(upload_id, df)
+
+
+def test_summary_version_follows_cached_summary(temp_engine):
+    assert summary_version(1).endswith(":fallback")
+    store_summary("kpi_summary", "model", "prompt", "{}", upload_id=1)
+    version = summary_version(1)
+    assert not version.endswith(":fallback")
+    store_summary("chat", "model", "other", "{}", upload_id=1)
+    assert summary_version(1) == version
+    invalidate_summaries(upload_id=1)
+    assert summary_version(1).endswith(":fallback")
+
+
+def test_render_pdf_report_is_cached_per_summary_version(temp_engine, tmp_path, monkeypatch):
+    store = LocalArtifactStore(str(tmp_path / "artifacts"))
+    monkeypatch.setattr(pdf_pipeline, "artifact_store", store)
+    upload_frames.clear()
+    _store_scores(5)
+
+    info = render_pdf_report(5)
+    assert info["key"] == pdf_key(5)
+    assert sniff_content_type(store.open_path(info["digest"])) == "application/pdf"
+    assert cached_pdf(5)["digest"] == info["digest"]
+    assert cached_pdf(5, log_upload_id=1, window_seconds=60) is None
+
+    # A new LLM summary retires the stored report
+    store_summary("kpi_summary", "model", "prompt", "{}", upload_id=5)
+    assert cached_pdf(5) is None
+
+    assert render_pdf_report(99) is None
+
+
+def test_fallback_report_expires_when_llm_configured(temp_engine, tmp_path, monkeypatch):
+    store = LocalArtifactStore(str(tmp_path / "artifacts"))
+    monkeypatch.setattr(pdf_pipeline, "artifact_store", store)
+    upload_frames.clear()
+    _store_scores(6)
+
+    info = render_pdf_report(6)
+    assert info["fallback_summary"] is True
+    assert cached_pdf(6)["digest"] == info["digest"]
+
+    # With an LLM configured the fallback report is only served for a while
+    monkeypatch.setattr(summarize, "async_openai_client", object())
+    assert cached_pdf(6) is not None
+    monkeypatch.setattr(pdf_pipeline, "PDF_FALLBACK_TTL_SECONDS", -1)
+    assert cached_pdf(6) is None
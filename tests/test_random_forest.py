@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+from random_forest_model import create_labels, encode_labels, fit_label_encoder, label_classes
+
+
+def test_create_labels_thresholds():
+    df = pd.DataFrame(
+        {
+            "PRB_Util": [95.0, 85.0, 50.0, 50.0, np.nan],
+            "Throughput_Mbps": [50.0, 50.0, 50.0, 10.0, 50.0],
+            "BLER": [0.01, 0.01, 0.01, 0.01, 0.03],
+        }
+    )
+    assert create_labels(df) == ["CRITICAL", "WARNING", "NORMAL", "CRITICAL", "WARNING"]
+
+
+def test_encode_labels_custom_rules():
+    rules = [("HOT", {"PRB_Util": (">=", 70)})]
+    df = pd.DataFrame({"PRB_Util": [69.9, 70.0]})
+    assert label_classes(rules, "OK") == ["HOT", "OK"]
+    assert encode_labels(df, rules, "OK").tolist() == [1, 0]
+
+
+def test_fit_label_encoder_uses_present_classes():
+    df = pd.DataFrame({"PRB_Util": [50.0, 85.0], "Throughput_Mbps": [60.0, 60.0], "BLER": [0.0, 0.0]})
+    y, le = fit_label_encoder(df)
+    assert list(le.classes_) == ["NORMAL", "WARNING"]
+    assert y.tolist() == [0, 1]
+
+
+def test_analyze_columnar_matches_rows(tmp_path, monkeypatch):
+    import random_forest_model as rf
+    monkeypatch.setattr(rf, "RF_MODEL_DIR", str(tmp_path / "model_rf"))
+
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        {
+            "PRB_Util": rng.uniform(0, 100, 200),
+            "RRC_Conn": rng.uniform(0, 300, 200),
+            "Throughput_Mbps": rng.uniform(0, 100, 200),
+            "BLER": rng.uniform(0, 0.1, 200),
+        }
+    )
+
+    rows = rf.analyze_with_random_forest(df)
+    columnar = rf.analyze_with_random_forest(df, output="columnar")
+    summary = rf.analyze_with_random_forest(df, output="summary")
+
+    assert rows["summary"] == columnar["summary"] == summary["summary"]
+    assert summary["status_predictions"] is None
+    status = columnar["status_predictions"]
+    assert [r["predicted_status"] for r in rows["status_predictions"]] == status["predicted_status"].tolist()
+    assert np.allclose([r["confidence"] for r in rows["status_predictions"]], status["confidence"])
+    assert sum(rows["summary"]["status_distribution"].values()) == len(df)
+
+    page = rf.slice_columns(columnar["throughput_predictions"], 10, 15)
+    assert len(page["predicted_throughput"]) == 5
+    assert all(lo <= hi for lo, hi in zip(page["lower"], page["upper"]))
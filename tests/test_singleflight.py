@@ -0,0 +1,54 @@
+import asyncio
+import threading
+import time
+
+from singleflight import AsyncSingleFlight, SingleFlight
+
+
+def test_sync_calls_are_coalesced():
+    flight = SingleFlight()
+    started = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        return "result"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do(("pdf", 1), slow)))
+    leader.start()
+    started.wait()
+    followers = [threading.Thread(target=lambda: results.append(flight.do(("pdf", 1), slow))) for _ in range(3)]
+    for t in followers:
+        t.start()
+    for t in [leader] + followers:
+        t.join()
+
+    assert results == ["result"] * 4
+    assert len(calls) == 1
+    assert flight.stats() == {"executed": {"pdf": 1}, "coalesced": {"pdf": 3}}
+
+    # Finished calls are not reused
+    assert flight.do(("pdf", 1), lambda: "again") == "again"
+
+
+def test_async_calls_are_coalesced():
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def compute(value):
+        calls.append(value)
+        await asyncio.sleep(0.05)
+        return value * 2
+
+    async def main():
+        return await asyncio.gather(
+            *(flight.do(("summary", 1), compute, 21) for _ in range(5)),
+            flight.do(("summary", 2), compute, 1),
+        )
+
+    assert asyncio.run(main()) == [42] * 5 + [2]
+    assert calls == [21, 1]
+    assert flight.stats() == {"executed": {"summary": 2}, "coalesced": {"summary": 4}}
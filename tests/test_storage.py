@@ -0,0 +1,324 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+from sqlmodel import SQLModel, create_engine
+
+import storage
+from storage import Score, WriteQueue, bulk_insert_scores, get_session
+
+
+def test_bulk_insert_scores(temp_engine):
+    df = pd.DataFrame(
+        {
+            "cell_id": ["CELL001", "CELL002", "CELL003"],
+            "timestamp": pd.to_datetime(["2024-01-01 10:00:00"] * 3),
+            "anomaly": [1, -1, 1],
+            "score": [0.1, -0.2, 0.05],
+            "PRB_Util": [45.2, 92.0, 48.1],
+        }
+    )
+
+    assert bulk_insert_scores(7, df, batch_size=2) == 3
+
+    with get_session() as s:
+        rows = s.query(Score).filter(Score.upload_id == 7).order_by(Score.id).all()
+    assert [r.cell_id for r in rows] == ["CELL001", "CELL002", "CELL003"]
+    assert rows[1].anomaly == -1
+    assert rows[1].prb_util == 92.0
+    assert rows[0].ts == "2024-01-01 10:00:00"
+    assert rows[0].bler is None
+
+
+def test_migrate_db_adds_score_indexes(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    monkeypatch.setattr(storage, "engine", engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "CREATE TABLE score (id INTEGER PRIMARY KEY, upload_id INTEGER NOT NULL, "
+            "cell_id VARCHAR NOT NULL, ts VARCHAR NOT NULL, anomaly INTEGER NOT NULL, "
+            "score FLOAT NOT NULL)"
+        )
+
+    applied = storage.init_db()
+
+    assert "create index ix_score_upload_id" in applied
+    assert "create index ix_score_cell_id_ts" in applied
+    assert "add column score.prb_util" in applied
+    assert storage.migrate_db() == []
+    engine.dispose()
+
+
+def test_list_upload_stats_pages(temp_engine):
+    with get_session() as s:
+        for name in ["a.csv", "b.csv", "c.csv"]:
+            s.add(storage.Upload(filename=name))
+        s.commit()
+
+    df = pd.DataFrame(
+        {
+            "cell_id": ["CELL001"] * 4,
+            "timestamp": pd.to_datetime(["2024-01-01 10:00:00"] * 4),
+            "anomaly": [1, -1, -1, 1],
+            "score": [0.1, -0.2, -0.3, 0.05],
+        }
+    )
+    bulk_insert_scores(3, df)
+
+    page, cursor = storage.list_upload_stats(limit=2)
+    assert [u["id"] for u in page] == [3, 2]
+    assert (page[0]["total_samples"], page[0]["anomalies"]) == (4, 2)
+    assert (page[1]["total_samples"], page[1]["anomalies"]) == (0, 0)
+    assert cursor == 2
+
+    page, cursor = storage.list_upload_stats(limit=2, cursor=cursor)
+    assert [u["id"] for u in page] == [1]
+    assert cursor is None
+    assert storage.count_uploads() == 3
+
+
+def test_load_upload_frame_cached_and_invalidated(temp_engine):
+    storage.upload_frames.clear()
+    df = pd.DataFrame(
+        {
+            "cell_id": ["CELL001", "CELL002"],
+            "timestamp": pd.to_datetime(["2024-01-01 10:00:00", "2024-01-01 10:01:00"]),
+            "anomaly": [1, -1],
+            "score": [0.1, -0.2],
+            "PRB_Util": [45.2, 92.0],
+        }
+    )
+    bulk_insert_scores(5, df)
+
+    frame = storage.load_upload_frame(5)
+    assert list(frame.columns) == list(storage.FRAME_COLUMNS)
+    assert frame["anomaly"].tolist() == [1, -1]
+    assert frame["BLER"].tolist() == [0.0, 0.0]
+    assert frame["PRB_Util"].dtype == "float64"
+    assert storage.upload_frames.get((5, tuple(storage.FRAME_COLUMNS))) is not None
+
+    anomalies = storage.load_upload_frame(5, columns=["anomaly"])
+    assert list(anomalies.columns) == ["anomaly"]
+
+    bulk_insert_scores(5, df)
+    assert storage.upload_frames.get((5, tuple(storage.FRAME_COLUMNS))) is None
+    assert len(storage.load_upload_frame(5)) == 4
+    assert storage.load_upload_frame(99).empty
+
+
+def test_iter_upload_frames_pages_like_the_cached_frame(temp_engine):
+    storage.upload_frames.clear()
+    df = pd.DataFrame(
+        {
+            "cell_id": [f"CELL{i % 3}" for i in range(7)],
+            "timestamp": pd.date_range("2024-01-01", periods=7, freq="h"),
+            "anomaly": [1, -1, 1, 1, -1, 1, 1],
+            "score": [0.1 * i for i in range(7)],
+            "BLER": [0.01, float("nan"), 0.03, 0.04, 0.05, 0.06, 0.07],
+        }
+    )
+    bulk_insert_scores(5, df)
+
+    chunks = list(storage.iter_upload_frames(5, chunk_rows=3))
+    assert [len(chunk) for chunk in chunks] == [3, 3, 1]
+    expected = storage.load_upload_frame(5)
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), expected)
+    # Chunks scored in memory take the same form as once stored
+    pd.testing.assert_frame_equal(storage.score_frame(df), expected)
+
+
+def test_frame_cache_drops_frames_read_before_invalidation():
+    cache = storage.FrameCache()
+    df = pd.DataFrame({"anomaly": [1, -1]})
+    generation = cache.generation(5)
+    # A write lands while the loader is still querying
+    cache.invalidate(5)
+    cache.put((5, ("anomaly",)), df, generation)
+    assert cache.get((5, ("anomaly",))) is None
+
+    cache.put((5, ("anomaly",)), df, cache.generation(5))
+    assert cache.get((5, ("anomaly",))) is df
+
+
+def test_frame_cache_evicts_by_size():
+    frame = pd.DataFrame({"x": range(100)})
+    size = int(frame.memory_usage(index=True, deep=True).sum())
+    cache = storage.FrameCache(max_bytes=size * 2)
+    for upload_id in range(3):
+        cache.put((upload_id, ("x",)), frame)
+    assert cache.get((0, ("x",))) is None
+    assert cache.get((2, ("x",))) is not None
+    assert cache.current_bytes <= size * 2
+
+
+def test_upload_summary_accumulates_batches(temp_engine):
+    first = pd.DataFrame(
+        {
+            "cell_id": ["CELL001", "CELL002"],
+            "timestamp": pd.to_datetime(["2024-01-01 10:05:00", "2024-01-01 10:01:00"]),
+            "anomaly": [1, -1],
+            "score": [0.1, -0.2],
+            "PRB_Util": [40.0, 90.0],
+        }
+    )
+    second = first.assign(
+        cell_id=["CELL002", "CELL003"],
+        timestamp=pd.to_datetime(["2024-01-01 09:59:00", "2024-01-01 10:10:00"]),
+        PRB_Util=[10.0, 20.0],
+    )
+    bulk_insert_scores(8, first)
+    bulk_insert_scores(8, second, batch_size=1)
+
+    summary = storage.get_upload_summary(8)
+    assert (summary["total"], summary["anomalies"], summary["cells"]) == (4, 2, 3)
+    assert summary["anomaly_rate"] == 50.0
+    assert (summary["first_ts"], summary["last_ts"]) == ("2024-01-01 09:59:00", "2024-01-01 10:10:00")
+    assert summary["kpis"]["PRB_Util"] == {"count": 4, "sum": 160.0, "min": 10.0, "max": 90.0, "mean": 40.0}
+    assert "BLER" not in summary["kpis"]
+    assert storage.get_upload_summary(99) is None
+
+    # /report shows the rate with two decimals
+    bulk_insert_scores(9, pd.concat([first, second.iloc[:1]]))
+    assert storage.get_upload_summary(9)["anomaly_rate"] == 33.33
+
+
+def test_backfill_upload_summaries(temp_engine):
+    with get_session() as s:
+        s.add(storage.Upload(filename="old.csv"))
+        s.commit()
+    # Scores written before UploadSummary existed
+    with temp_engine.begin() as conn:
+        conn.execute(
+            Score.__table__.insert(),
+            [
+                {"upload_id": 1, "cell_id": "A", "ts": "2024-01-01 10:00:00", "anomaly": -1, "score": -0.1, "bler": 0.02},
+                {"upload_id": 1, "cell_id": "B", "ts": "2024-01-01 11:00:00", "anomaly": 1, "score": 0.1, "bler": 0.04},
+            ],
+        )
+
+    with get_session() as s:
+        s.add(storage.Upload(filename="failed.csv"))
+        s.commit()
+
+    assert storage.backfill_upload_summaries() == 2
+    assert storage.backfill_upload_summaries() == 0
+    assert storage.get_upload_summary(2)["total"] == 0
+    summary = storage.get_upload_summary(1)
+    assert (summary["total"], summary["anomalies"], summary["cells"]) == (2, 1, 2)
+    assert summary["kpis"]["BLER"]["mean"] == pytest.approx(0.03)
+    assert [u["total_samples"] for u in storage.list_upload_stats()[0]] == [0, 2]
+
+
+def test_storage_engine_applies_pragmas(temp_engine):
+    stats = storage.database_stats()
+    assert stats["pragmas"]["journal_mode"] == "wal"
+    assert stats["pragmas"]["synchronous"] == 1  # NORMAL
+    assert stats["pragmas"]["cache_size"] == -storage.SQLITE_CACHE_KB
+
+
+def test_write_queue_batches_and_isolates_failures(temp_engine):
+    writes = storage.WriteQueue()
+    release = threading.Event()
+    blocker = writes.submit(lambda conn: release.wait(5))
+    while not blocker.running():
+        time.sleep(0.001)
+
+    # Queued behind the blocker, so they share the next commit
+    insert_upload = storage.Upload.__table__.insert()
+    ok = [
+        writes.submit(lambda conn, i=i: conn.execute(insert_upload.values(filename=f"{i}.csv")).inserted_primary_key[0])
+        for i in range(3)
+    ]
+    bad = writes.submit(lambda conn: conn.exec_driver_sql("INSERT INTO nonexistent VALUES (1)"))
+    release.set()
+
+    assert blocker.result() is True
+    assert [f.result() for f in ok] == [1, 2, 3]
+    with pytest.raises(Exception):
+        bad.result()
+    assert storage.count_uploads() == 3
+    assert writes.stats()["commits"] == 2
+    assert writes.stats()["failed_writes"] == 1
+    writes.close()
+
+
+def test_write_queue_commits_bulk_writes_after_waiting_writes(temp_engine):
+    writes = storage.WriteQueue()
+    release = threading.Event()
+    order = []
+    blocker = writes.submit(lambda conn: release.wait(5) and order.append("bulk 1"), bulk=True)
+    while not blocker.running():
+        time.sleep(0.001)
+
+    second = writes.submit(lambda conn: order.append("bulk 2"), bulk=True)
+    small = writes.submit(lambda conn: order.append("small"))
+    release.set()
+    second.result(), small.result()
+
+    assert order == ["bulk 1", "small", "bulk 2"]
+    # Bulk writes are never batched with others
+    assert writes.stats()["commits"] == 3
+    writes.close()
+
+
+def test_bulk_insert_scores_commits_in_bounded_batches(temp_engine, monkeypatch):
+    monkeypatch.setattr(storage, "SCORE_COMMIT_ROWS", 2)
+    monkeypatch.setattr(storage, "writer", WriteQueue())
+    df = pd.DataFrame(
+        {"cell_id": ["A", "B", "A", "C", "B"], "timestamp": "2024-01-01 00:00:00", "anomaly": [1, -1, 1, 1, -1], "score": 0.0}
+    )
+    # Uncontended commits grow from SCORE_COMMIT_ROWS up to batch_size: 2 + 4 rows
+    assert bulk_insert_scores(3, df, batch_size=4) == 5
+    assert storage.writer.stats()["commits"] == 2
+    summary = storage.get_upload_summary(3)
+    assert (summary["total"], summary["anomalies"], summary["cells"]) == (5, 2, 3)
+    storage.writer.close()
+
+
+def test_scores_csv_marks_missing_values_null():
+    rows = pd.DataFrame(
+        {"upload_id": [1, 1], "cell_id": ["", "C,1"], "ts": ["2024-01-01 00:00:00"] * 2, "prb_util": [float("nan"), 1.5]}
+    )
+    assert storage.scores_csv(rows) == '1,,2024-01-01 00:00:00,\\N\n1,"C,1",2024-01-01 00:00:00,1.5\n'
+
+
+@pytest.mark.skipif(not os.getenv("TEST_DATABASE_URL"), reason="TEST_DATABASE_URL (PostgreSQL) not set")
+def test_bulk_insert_scores_postgres_copy(monkeypatch):
+    engine = storage.create_storage_engine(os.environ["TEST_DATABASE_URL"])
+    monkeypatch.setattr(storage, "engine", engine)
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+    df = pd.DataFrame(
+        {
+            "cell_id": ["CELL001", "CELL002", "CELL003"],
+            "timestamp": pd.to_datetime(["2024-01-01 10:00:00"] * 3),
+            "anomaly": [1, -1, 1],
+            "score": [0.1, -0.2, 0.05],
+            "PRB_Util": [45.2, float("nan"), 48.1],
+        }
+    )
+    try:
+        assert bulk_insert_scores(7, df, batch_size=2) == 3
+        with get_session() as s:
+            rows = s.query(Score).filter(Score.upload_id == 7).order_by(Score.id).all()
+        assert [r.cell_id for r in rows] == ["CELL001", "CELL002", "CELL003"]
+        assert rows[1].prb_util is None
+        assert storage.get_upload_summary(7)["anomalies"] == 1
+        assert "pool" in storage.database_stats()
+    finally:
+        SQLModel.metadata.drop_all(engine)
+        engine.dispose()
+
+
+@pytest.mark.skipif(not os.getenv("TEST_DATABASE_URL"), reason="TEST_DATABASE_URL (PostgreSQL) not set")
+def test_write_queue_counts_concurrent_direct_writes(monkeypatch):
+    engine = storage.create_storage_engine(os.environ["TEST_DATABASE_URL"])
+    monkeypatch.setattr(storage, "engine", engine)
+    queue = WriteQueue()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda _: queue.run(lambda conn: conn.exec_driver_sql("SELECT 1")), range(400)))
+    engine.dispose()
+    assert queue.stats()["writes"] == 400
@@ -0,0 +1,158 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pandas as pd
+
+import summarize
+from summary_cache import get_cached_summary, invalidate_summaries, store_summary
+
+
+def test_store_get_and_expire(temp_engine):
+    store_summary("kpi_summary", "m", "prompt", "payload", upload_id=1)
+    assert get_cached_summary("kpi_summary", "m", "prompt", upload_id=1) == "payload"
+    assert get_cached_summary("kpi_summary", "other-model", "prompt", upload_id=1) is None
+    assert get_cached_summary("kpi_summary", "m", "prompt", upload_id=2) is None
+
+    store_summary("kpi_summary", "m", "old", "payload", upload_id=1, ttl_hours=-1)
+    assert get_cached_summary("kpi_summary", "m", "old", upload_id=1) is None
+
+    assert invalidate_summaries(upload_id=1) == 2
+    assert get_cached_summary("kpi_summary", "m", "prompt", upload_id=1) is None
+
+
+class FakeAsyncCompletions:
+    def __init__(self, delay, content='{"executive_summary": "async ok"}'):
+        self.delay = delay
+        self.content = content
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        message = SimpleNamespace(content=self.content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def kpi_frame():
+    df = pd.DataFrame(
+        {
+            "cell_id": ["CELL001", "CELL002"],
+            "anomaly": [1, -1],
+            "score": [0.1, -0.2],
+            "PRB_Util": [45.2, 92.0],
+            "Throughput_Mbps": [25.5, 5.0],
+            "BLER": [0.02, 0.1],
+        }
+    )
+    return df, df[df["anomaly"] == -1]
+
+
+def test_async_summary_caches_and_times(temp_engine, monkeypatch):
+    completions = FakeAsyncCompletions(delay=0)
+    monkeypatch.setattr(summarize, "async_openai_client", SimpleNamespace(chat=SimpleNamespace(completions=completions)))
+    df, anomalies = kpi_frame()
+
+    first = asyncio.run(summarize.agenerate_ai_kpi_summary(df, anomalies, df["score"], upload_id=4))
+    second = asyncio.run(summarize.agenerate_ai_kpi_summary(df, anomalies, df["score"], upload_id=4))
+
+    assert first["summary"] == second["summary"] == "async ok"
+    assert first["timing"]["outcome"] == "ok"
+    assert second["timing"]["outcome"] == "cache_hit"
+    assert completions.calls == 1
+
+
+def test_repeated_log_summary_is_a_cache_hit(temp_engine, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import app
+
+    completions = FakeAsyncCompletions(delay=0, content='{"summary": "link flap on CELL001"}')
+    monkeypatch.setattr(summarize, "async_openai_client", SimpleNamespace(chat=SimpleNamespace(completions=completions)))
+    log = b"2024-01-01T10:00:00Z ERROR link down on CELL001\n2024-01-01T10:00:05Z ALARM CELL001 flapping\n"
+    client = TestClient(app.app)
+
+    first = client.post("/logs/summarize", files={"file": ("site.log", log)}).json()
+    second = client.post("/logs/summarize", files={"file": ("site.log", log)}).json()
+
+    assert first["summary"] == second["summary"] == "link flap on CELL001"
+    assert completions.calls == 1
+    assert summarize.ai_call_log[-1]["kind"] == "log_summary"
+    assert summarize.ai_call_log[-1]["outcome"] == "cache_hit"
+
+
+def test_blocking_kpi_summary_uses_async_client_and_cache(temp_engine, monkeypatch):
+    completions = FakeAsyncCompletions(delay=0)
+    monkeypatch.setattr(summarize, "async_openai_client", SimpleNamespace(chat=SimpleNamespace(completions=completions)))
+    df, anomalies = kpi_frame()
+
+    first = summarize.generate_ai_kpi_summary(df, anomalies, df["score"], upload_id=3)
+    second = summarize.generate_ai_kpi_summary(df, anomalies, df["score"], upload_id=3)
+    assert first["summary"] == second["summary"] == "async ok"
+    assert first["ai_generated"]
+    assert completions.calls == 1
+
+    invalidate_summaries(upload_id=3)
+    summarize.generate_ai_kpi_summary(df, anomalies, df["score"], upload_id=3)
+    assert completions.calls == 2
+
+
+def test_llm_calls_share_one_limit_across_event_loops(temp_engine, monkeypatch):
+    monkeypatch.setattr(summarize, "_ai_slots", threading.BoundedSemaphore(2))
+    running = []
+    peak = []
+
+    class Completions:
+        async def create(self, **kwargs):
+            running.append(1)
+            peak.append(len(running))
+            await asyncio.sleep(0.05)
+            running.pop()
+            message = SimpleNamespace(content=kwargs["messages"][1]["content"])
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    monkeypatch.setattr(summarize, "async_openai_client", SimpleNamespace(chat=SimpleNamespace(completions=Completions())))
+
+    def call(i):
+        # asyncio.run per thread, as blocking callers and PDF workers do
+        return asyncio.run(summarize.acached_chat_completion("kpi_summary", "system", f"prompt {i}", 10, deadline=5))
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(peak) == 6
+    assert max(peak) == 2
+
+
+def test_async_summary_falls_back_after_deadline(temp_engine, monkeypatch):
+    completions = FakeAsyncCompletions(delay=5)
+    monkeypatch.setattr(summarize, "async_openai_client", SimpleNamespace(chat=SimpleNamespace(completions=completions)))
+    df, anomalies = kpi_frame()
+
+    result = asyncio.run(summarize.agenerate_ai_kpi_summary(df, anomalies, df["score"], upload_id=5, deadline=0.05))
+
+    assert result["ai_generated"] is False
+    assert result["timing"]["outcome"] == "timeout"
+    assert result["timing"]["seconds"] < 1
+
+
+def test_async_summary_keeps_pandas_work_off_the_loop(temp_engine, monkeypatch):
+    completions = FakeAsyncCompletions(delay=0)
+    monkeypatch.setattr(summarize, "async_openai_client", SimpleNamespace(chat=SimpleNamespace(completions=completions)))
+    threads = []
+    build_prompt = summarize.build_kpi_prompt
+    monkeypatch.setattr(
+        summarize, "build_kpi_prompt", lambda *args: threads.append(threading.current_thread()) or build_prompt(*args)
+    )
+    # The cache lookup counts against the deadline as well
+    monkeypatch.setattr(summarize, "get_cached_summary", lambda *args: time.sleep(0.3))
+    df, anomalies = kpi_frame()
+
+    result = asyncio.run(summarize.agenerate_ai_kpi_summary(df, anomalies, df["score"], upload_id=6, deadline=0.05))
+
+    assert threads and threads[0] is not threading.main_thread()
+    assert result["timing"]["outcome"] == "timeout"
+    assert completions.calls == 0